@@ -2,24 +2,29 @@
 This module lists all externally useful classes and functions
 """
 
-from .data_request import WmsRequest, WcsRequest, FisRequest, GeopediaWmsRequest, GeopediaImageRequest, \
-    AwsTileRequest, AwsProductRequest, get_safe_format, download_safe_format
+from .data_request import WmsRequest, WcsRequest, FisRequest, GeopediaWmsRequest, GeopediaImageRequest, DateFilter
+from .aws_request import AwsTileRequest, AwsProductRequest, get_safe_format, download_safe_format
 
 from .aws import AwsProduct, AwsTile
 from .aws_safe import SafeProduct, SafeTile
 
-from .areas import BBoxSplitter, OsmSplitter, TileSplitter, CustomGridSplitter, UtmGridSplitter, UtmZoneSplitter
+from .areas import BBoxSplitter, OsmSplitter, TileSplitter, CustomGridSplitter
+from .utm_splitter import UtmGridSplitter, UtmZoneSplitter
+from .adaptive_splitter import AdaptiveSplitter
 
-from .ogc import WebFeatureService
+from .ogc import WebFeatureService, BatchWebFeatureService
+from .wfs_cache import WfsCache
 from .geopedia import GeopediaFeatureIterator, GeopediaSession
 
-from .geometry import BBox, Geometry, BBoxCollection
+from .geometry import BBox, Geometry, BBoxCollection, BBoxArray, transform_many
 from .constants import DataSource, CustomUrlParam, CRS, MimeType, SHConstants, AwsConstants, ServiceType, \
     HistogramType
+from .transformer_registry import TransformerRegistry
 
 from .config import SHConfig
 
-from .download import DownloadRequest, get_json, get_xml, DownloadClient, AwsDownloadClient, SentinelHubDownloadClient
+from .download import DownloadRequest, get_json, get_xml, DownloadClient, AwsDownloadClient, \
+    SentinelHubDownloadClient, DownloadService
 
 from .exceptions import DownloadFailedException, AwsDownloadFailedException
 
@@ -28,7 +33,7 @@ from .opensearch import get_tile_info_id, get_tile_info, get_area_dates, get_are
 from .io_utils import read_data, write_data
 from .os_utils import get_content_list, get_folder_list, get_file_list, make_folder, create_parent_folder, rename, size
 from .geo_utils import bbox_to_dimensions, bbox_to_resolution, get_image_dimension, to_utm_bbox, get_utm_bbox,\
-    wgs84_to_utm, to_wgs84, utm_to_pixel, pixel_to_utm, wgs84_to_pixel, get_utm_crs, transform_point
+    wgs84_to_utm, to_wgs84, utm_to_pixel, pixel_to_utm, wgs84_to_pixel, get_utm_crs, group_by_utm_crs, transform_point
 from .time_utils import next_date, prev_date, get_current_date
 
 from .testing_utils import TestSentinelHub, TestCaseContainer
@@ -36,6 +41,7 @@ from .testing_utils import TestSentinelHub, TestCaseContainer
 from .sentinelhub_session import SentinelHubSession
 
 from .sentinelhub_request import SentinelHubRequest
+from .sentinelhub_cost import ProcessingCostEstimator
 
 from .time_utils import parse_time_interval, filter_times
 
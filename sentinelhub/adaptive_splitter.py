@@ -0,0 +1,176 @@
+"""
+Module implementing a splitter of an area into cells of a quadtree with a bounded cost
+"""
+
+import itertools
+
+from .areas import AreaSplitter
+from .geometry import BBox
+from .geo_utils import bbox_to_dimensions
+from .spatial_index import count_vertices
+
+
+class AdaptiveSplitter(AreaSplitter):
+    """ A tool that splits the given area into cells of a quadtree. Starting with the bounding box of the area, each
+    cell which intersects the area is split into 4 equal parts until its cost is at most `max_cost`. If specified,
+    pairs of neighbouring sibling cells are merged back together when the cost of the merged cell is still at most
+    `max_cost`.
+
+    Cost of a cell can be defined with one of the following names or with a custom function:
+      - `'pixels'` is the number of pixels of the cell bounding box at the given `resolution`,
+      - `'covered_pixels'` is the number of pixels multiplied by the fraction of the cell covered by the area,
+      - `'vertices'` is the number of vertices of the intersection between the cell and the area,
+      - a custom function receives a cell bounding box and its intersection with the area and returns a number, e.g.
+        an estimated number of processing units of a request for the cell.
+
+    Info dictionary of a cell contains its `level` in the quadtree, indices `index_x` and `index_y` in a regular grid
+    of `2 ** level` columns and rows over the area bounding box, counted from the lower left corner, numbers of grid
+    columns and rows `num_x` and `num_y` which the cell spans and its `cost`.
+
+    :param shape_list: A list of geometrical shapes describing the area of interest
+    :type shape_list: list(shapely.geometry.multipolygon.MultiPolygon or shapely.geometry.polygon.Polygon)
+    :param crs: Coordinate reference system of the shapes in `shape_list`
+    :type crs: CRS
+    :param max_cost: The maximal cost of a cell
+    :type max_cost: float
+    :param cost_function: A name of a predefined cost or a function with parameters `bbox` and `geometry`
+    :type cost_function: str or callable
+    :param resolution: Resolution in meters, which is required for costs based on number of pixels
+    :type resolution: float or (float, float) or None
+    :param max_depth: The maximal level of the quadtree. Cells at this level are not split any further, even if their
+        cost is too high.
+    :type max_depth: int
+    :param merge_siblings: If `True` neighbouring sibling cells are merged when the merged cell is not too expensive
+    :type merge_siblings: bool
+    :param reduce_bbox_sizes: If `True` it will reduce the sizes of bounding boxes so that they will tightly fit
+        the given area geometry from `shape_list`.
+    :type reduce_bbox_sizes: bool
+    """
+    COST_FUNCTIONS = ('pixels', 'covered_pixels', 'vertices')
+    PIXEL_COST_FUNCTIONS = ('pixels', 'covered_pixels')
+
+    def __init__(self, shape_list, crs, max_cost, cost_function='pixels', resolution=None, max_depth=10,
+                 merge_siblings=False, **kwargs):
+        super().__init__(shape_list, crs, **kwargs)
+
+        if not callable(cost_function) and cost_function not in self.COST_FUNCTIONS:
+            raise ValueError('Parameter cost_function should be a callable or one of {}, got '
+                             '{}'.format(self.COST_FUNCTIONS, cost_function))
+        if cost_function in self.PIXEL_COST_FUNCTIONS and resolution is None:
+            raise ValueError('Parameter resolution is required for cost function {}'.format(cost_function))
+        if not isinstance(max_depth, int) or max_depth < 0:
+            raise ValueError('Parameter max_depth should be a non-negative integer, got {}'.format(max_depth))
+
+        self.max_cost = max_cost
+        self.cost_function = cost_function
+        self.resolution = resolution
+        self.max_depth = max_depth
+        self.merge_siblings = merge_siblings
+
+        self._cells = None
+
+        self._make_split()
+
+    def _make_split(self):
+        """ Builds the quadtree and collects its leaf cells
+        """
+        self._cells = self._split_cell(0, 0, 0)
+
+    def _iter_split(self):
+        """ Creates bounding boxes and info dictionaries of leaf cells
+        """
+        for level, index_x, index_y, num_x, num_y, cost in self._cells:
+            info = {'parent_bbox': self.area_bbox,
+                    'level': level,
+                    'index_x': index_x,
+                    'index_y': index_y,
+                    'num_x': num_x,
+                    'num_y': num_y,
+                    'cost': cost}
+            yield self._get_cell_bbox(level, index_x, index_y, num_x, num_y), info
+
+    def _split_cell(self, level, index_x, index_y):
+        """ Recursively splits a cell of the quadtree
+
+        :return: A list of leaf cells in form of tuples `(level, index_x, index_y, num_x, num_y, cost)`
+        :rtype: list(tuple)
+        """
+        cost = self._get_cell_cost(level, index_x, index_y, 1, 1)
+        if cost is None:
+            return []
+        if cost <= self.max_cost or level == self.max_depth:
+            return [(level, index_x, index_y, 1, 1, cost)]
+
+        children = [self._split_cell(level + 1, 2 * index_x + i, 2 * index_y + j)
+                    for i, j in itertools.product(range(2), range(2))]
+
+        if self.merge_siblings:
+            children = self._merge_children(children)
+
+        return [cell for child_cells in children for cell in child_cells]
+
+    def _merge_children(self, children):
+        """ Merges pairs of neighbouring children which are leaf cells. Children are either merged in pairs along
+        columns or along rows, whichever gives more merged cells.
+
+        :param children: Lists of leaf cells of 4 children in order `(0, 0)`, `(0, 1)`, `(1, 0)`, `(1, 1)`
+        :type children: list(list(tuple))
+        :return: Lists of leaf cells which replace children, in the same order
+        :rtype: list(list(tuple))
+        """
+        best_children, best_merge_count = children, 0
+        # Pairs of positions in the list of children, first along columns and then along rows
+        for pairs, (num_x, num_y) in [([(0, 1), (2, 3)], (1, 2)), ([(0, 2), (1, 3)], (2, 1))]:
+            merged_children = list(children)
+            merge_count = 0
+
+            for first, second in pairs:
+                if len(children[first]) != 1 or len(children[second]) != 1:
+                    continue
+                level, index_x, index_y, cell_num_x, cell_num_y, _ = children[first][0]
+                if (cell_num_x, cell_num_y) != (1, 1) or children[second][0][3:5] != (1, 1):
+                    continue
+
+                cost = self._get_cell_cost(level, index_x, index_y, num_x, num_y)
+                if cost is not None and cost <= self.max_cost:
+                    merged_children[first] = [(level, index_x, index_y, num_x, num_y, cost)]
+                    merged_children[second] = []
+                    merge_count += 1
+
+            if merge_count > best_merge_count:
+                best_children, best_merge_count = merged_children, merge_count
+
+        return best_children
+
+    def _get_cell_bbox(self, level, index_x, index_y, num_x, num_y):
+        """ Calculates a bounding box of a cell. Coordinates are calculated from the area bounding box so that
+        neighbouring cells share exactly the same edges.
+        """
+        min_x, min_y, max_x, max_y = self.area_bbox
+        size_x, size_y = (max_x - min_x) / 2 ** level, (max_y - min_y) / 2 ** level
+
+        return BBox((min_x + index_x * size_x, min_y + index_y * size_y,
+                     min_x + (index_x + num_x) * size_x, min_y + (index_y + num_y) * size_y), crs=self.crs)
+
+    def _get_cell_cost(self, level, index_x, index_y, num_x, num_y):
+        """ Calculates the cost of a cell
+
+        :return: The cost or `None` if the cell doesn't intersect the area
+        :rtype: float or None
+        """
+        bbox = self._get_cell_bbox(level, index_x, index_y, num_x, num_y)
+        if not self._intersects_area(bbox):
+            return None
+
+        if self.cost_function == 'pixels':
+            width, height = bbox_to_dimensions(bbox, self.resolution)
+            return width * height
+
+        geometry = self._intersection_area(bbox)
+
+        if self.cost_function == 'covered_pixels':
+            width, height = bbox_to_dimensions(bbox, self.resolution)
+            return width * height * geometry.area / bbox.geometry.area
+        if self.cost_function == 'vertices':
+            return count_vertices(geometry)
+        return self.cost_function(bbox, geometry)
@@ -0,0 +1,105 @@
+"""
+Module implementing preprocessing of area shapes before they are split
+"""
+
+import logging
+import time
+
+import numpy as np
+import shapely.ops
+import shapely.geometry
+from shapely.geometry import Polygon, MultiPolygon
+
+from .spatial_index import count_vertices
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def join_shapes(shape_list, grid_size=None, simplify_tolerance=None, min_area=None):
+    """ Joins a list of shapes together into one shape and optionally preprocesses it
+
+    Durations of preprocessing steps and numbers of vertices after each of them are logged at debug level.
+
+    :param shape_list: A list of geometrical shapes describing the area of interest
+    :type shape_list: list(shapely.geometry.multipolygon.MultiPolygon or shapely.geometry.polygon.Polygon)
+    :param grid_size: A cell size of a grid to which coordinates are snapped before the union
+    :type grid_size: float or None
+    :param simplify_tolerance: A tolerance of topology-preserving simplification of the union
+    :type simplify_tolerance: float or None
+    :param min_area: Polygons and holes with a smaller area are removed from the union
+    :type min_area: float or None
+    :return: A multipolygon which is a union of shapes in given list
+    :rtype: shapely.geometry.multipolygon.MultiPolygon
+    :raises: ValueError
+    """
+    for name, value in [('grid_size', grid_size), ('simplify_tolerance', simplify_tolerance),
+                        ('min_area', min_area)]:
+        if value is not None and not (isinstance(value, (int, float)) and value > 0):
+            raise ValueError('Parameter {} should be a positive number or None, got {}'.format(name, value))
+
+    steps = []
+    if grid_size:
+        steps.append(('snap', lambda shapes: [_snap_to_grid(shape, grid_size) for shape in shapes]))
+    steps.append(('union', shapely.ops.unary_union))
+    if simplify_tolerance:
+        steps.append(('simplify', lambda shape: shape.simplify(simplify_tolerance, preserve_topology=True)))
+    if min_area:
+        steps.append(('remove small parts', lambda shape: _remove_small_parts(shape, min_area)))
+
+    shape = shape_list
+    for step_name, step_function in steps:
+        start_time = time.perf_counter()
+        shape = step_function(shape)
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            vertex_count = count_vertices(shapely.geometry.GeometryCollection(shape)) \
+                if isinstance(shape, list) else count_vertices(shape)
+            LOGGER.debug('Area preprocessing step %s took %.3fs, %d vertices remain', step_name,
+                         time.perf_counter() - start_time, vertex_count)
+
+    if shape.is_empty and len(steps) > 1 and any(not input_shape.is_empty for input_shape in shape_list):
+        raise ValueError('Area preprocessing with grid_size={}, simplify_tolerance={} and min_area={} removed the '
+                         'entire area'.format(grid_size, simplify_tolerance, min_area))
+    return shape
+
+
+def _snap_to_grid(shape, grid_size):
+    """ Rounds coordinates of a shape to a grid with given cell size and removes repeated vertices. Rings which
+    collapse are removed and the shape is repaired if snapping made it invalid.
+    """
+    polygons = []
+    for polygon in getattr(shape, 'geoms', [shape]):
+        exterior = _snap_ring_to_grid(polygon.exterior, grid_size)
+        if exterior is not None:
+            interiors = [_snap_ring_to_grid(interior, grid_size) for interior in polygon.interiors]
+            polygons.append(Polygon(exterior, [interior for interior in interiors if interior is not None]))
+
+    snapped_shape = polygons[0] if len(polygons) == 1 else MultiPolygon(polygons)
+    return snapped_shape if snapped_shape.is_valid else snapped_shape.buffer(0)
+
+
+def _snap_ring_to_grid(ring, grid_size):
+    """ Rounds coordinates of a ring to a grid and removes repeated vertices. If fewer than 3 distinct vertices remain
+    it returns `None`.
+    """
+    coordinates = np.round(np.asarray(ring.coords)[:, :2] / grid_size) * grid_size
+    is_new_vertex = np.ones(len(coordinates), dtype=bool)
+    is_new_vertex[1:] = np.any(coordinates[1:] != coordinates[:-1], axis=1)
+    coordinates = coordinates[is_new_vertex]
+
+    return coordinates if len(coordinates) >= 4 else None
+
+
+def _remove_small_parts(shape, min_area):
+    """ Removes polygons and holes of a shape with an area smaller than the given one
+    """
+    polygons = []
+    for polygon in getattr(shape, 'geoms', [shape]):
+        if not isinstance(polygon, Polygon) or polygon.area < min_area:
+            continue
+        interiors = [interior for interior in polygon.interiors if Polygon(interior).area >= min_area]
+        polygons.append(Polygon(polygon.exterior, interiors))
+
+    if len(polygons) == 1:
+        return polygons[0]
+    return MultiPolygon(polygons)
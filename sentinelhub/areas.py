@@ -2,27 +2,36 @@
 Module for working with large geographical areas
 """
 
-import os
 import itertools
-from abc import ABC, abstractmethod
+from abc import ABC
 import json
 import math
 
-import shapely.ops
+import dateutil.parser
+import numpy as np
 import shapely.geometry
-from shapely.geometry import Polygon, MultiPolygon, GeometryCollection
+import shapely.wkb
+from shapely.geometry import Polygon, MultiPolygon
 
+from .area_preprocessing import join_shapes
 from .config import SHConfig
 from .constants import CRS, DataSource
-from .geometry import BBox, BBoxCollection, BaseGeometry, Geometry
+from .geometry import BBox, BBoxCollection, BBoxArray, BaseGeometry
+from .split_table import SplitTable, read_npz_columns
+from .spatial_index import AreaIndex
 from .geo_utils import transform_point
 from .ogc import WebFeatureService
+from .os_utils import create_parent_folder
 
 
 class AreaSplitter(ABC):
     """ Abstract class for splitter classes. It implements common methods used for splitting large area into smaller
     parts.
 
+    Bounding boxes of the split are created by a generator, either one by one with `iter_split` or all at once when
+    `bbox_list` and `info_list` are first accessed. Results of a split can be saved into a file with `save` and
+    loaded again with `load`.
+
     :param shape_list: A list of geometrical shapes describing the area of interest
     :type shape_list: list(shapely.geometry.multipolygon.MultiPolygon or shapely.geometry.polygon.Polygon)
     :param crs: Coordinate reference system of the shapes in `shape_list`
@@ -30,17 +39,63 @@ class AreaSplitter(ABC):
     :param reduce_bbox_sizes: If `True` it will reduce the sizes of bounding boxes so that they will tightly fit the
         given geometry in `shape_list`.
     :type reduce_bbox_sizes: bool
+    :param grid_size: If given, coordinates of shapes are snapped to a grid with this cell size, in units of `crs`,
+        before they are joined. Snapping removes vertices closer than the cell size and makes the union faster.
+    :type grid_size: float or None
+    :param simplify_tolerance: If given, the joined area is simplified with this tolerance, in units of `crs`, while
+        preserving its topology. A tolerance of about half of the target resolution doesn't change the area at the
+        pixel level but can remove most vertices of very detailed shapes.
+    :type simplify_tolerance: float or None
+    :param min_area: If given, polygons and holes of the joined area with smaller area, in units of `crs` squared, are
+        removed. Setting it to the area of a pixel at the target resolution removes slivers which would otherwise
+        produce bounding boxes without any useful data.
+    :type min_area: float or None
     """
-    def __init__(self, shape_list, crs, reduce_bbox_sizes=False):
+    def __init__(self, shape_list, crs, reduce_bbox_sizes=False, grid_size=None, simplify_tolerance=None,
+                 min_area=None):
         self.crs = CRS(crs)
         self._parse_shape_list(shape_list, self.crs)
         self.shape_list = shape_list
-        self.area_shape = self._join_shape_list(shape_list)
+        self.area_shape = join_shapes(shape_list, grid_size=grid_size, simplify_tolerance=simplify_tolerance,
+                                      min_area=min_area)
         self.reduce_bbox_sizes = reduce_bbox_sizes
 
         self.area_bbox = self.get_area_bbox()
-        self.bbox_list = None
-        self.info_list = None
+        self._bbox_list = None
+        self._info_list = None
+        self._split_table = None
+
+        self._area_index = None
+
+    @property
+    def bbox_list(self):
+        """ A list of bounding boxes obtained in split, which is created when it is first needed
+
+        :return: List of bounding boxes
+        :rtype: list(BBox)
+        """
+        if self._bbox_list is None:
+            self._collect_split()
+        return self._bbox_list
+
+    @bbox_list.setter
+    def bbox_list(self, bbox_list):
+        self._bbox_list = bbox_list
+
+    @property
+    def info_list(self):
+        """ A list of info dictionaries of bounding boxes obtained in split, which is created when it is first needed
+
+        :return: List of dictionaries
+        :rtype: list(dict)
+        """
+        if self._info_list is None:
+            self._collect_split()
+        return self._info_list
+
+    @info_list.setter
+    def info_list(self, info_list):
+        self._info_list = info_list
 
     @staticmethod
     def _parse_shape_list(shape_list, crs):
@@ -90,22 +145,179 @@ class AreaSplitter(ABC):
         raise ValueError("Split parameter must be an int{0} or a tuple of 2 int{0}.".format('/float' if allow_float
                                                                                             else ''))
 
-    @staticmethod
-    def _join_shape_list(shape_list):
-        """ Joins a list of shapes together into one shape
+    def _make_split(self):
+        """ Prepares everything which is needed to create bounding boxes of the split. By default there is nothing to
+        prepare.
 
-        :param shape_list: A list of geometrical shapes describing the area of interest
-        :type shape_list: list(shapely.geometry.multipolygon.MultiPolygon or shapely.geometry.polygon.Polygon)
-        :return: A multipolygon which is a union of shapes in given list
-        :rtype: shapely.geometry.multipolygon.MultiPolygon
+        Splitters which don't implement `_iter_split` should instead create the entire split here and assign it to
+        `bbox_list` and `info_list`.
         """
-        return shapely.ops.cascaded_union(shape_list)
 
-    @abstractmethod
-    def _make_split(self):
-        """ The abstract method where the splitting will happen
+    def _iter_split(self):
+        """ The method where the splitting will happen. It yields pairs of a bounding box and its info dictionary in a
+        deterministic order.
+
+        By default it calls `_make_split` and yields from lists which it assigned to `bbox_list` and `info_list`.
+
+        :raises: NotImplementedError
+        """
+        if self._bbox_list is None or self._info_list is None:
+            self._make_split()
+        if self._bbox_list is None or self._info_list is None:
+            raise NotImplementedError('Splitter {} should either implement method _iter_split or assign bbox_list and '
+                                      'info_list in method _make_split'.format(self.__class__.__name__))
+        yield from zip(self._bbox_list, self._info_list)
+
+    def _collect_split(self):
+        """ Creates lists of all bounding boxes and info dictionaries
+        """
+        bbox_list, info_list = [], []
+        for bbox, info in self._get_split_iterator():
+            bbox_list.append(bbox)
+            info_list.append(info)
+
+        self._bbox_list, self._info_list = bbox_list, info_list
+
+    def iter_split(self, offset=0, shard_index=0, num_shards=1):
+        """ Lazily yields bounding boxes obtained in split together with their info dictionaries. The order is the
+        same as the order of `get_bbox_list` and `get_info_list`. Unless these lists have already been created, only a
+        small number of bounding boxes is kept in memory at a time.
+
+        Bounding boxes are distributed among shards in a round-robin way, i.e. a bounding box at position `n` belongs
+        to the shard `n % num_shards`.
+
+        :param offset: Position in the entire split from which to start. Bounding boxes at lower positions are skipped,
+            which can be used to resume an interrupted iteration.
+        :type offset: int
+        :param shard_index: Index of the shard which should be yielded
+        :type shard_index: int
+        :param num_shards: Number of shards into which the split is divided
+        :type num_shards: int
+        :return: A generator of pairs of a bounding box and its info dictionary
+        :rtype: Iterator[(BBox, dict)]
+        :raises: ValueError
+        """
+        if not isinstance(num_shards, int) or num_shards < 1:
+            raise ValueError('Parameter num_shards should be a positive integer, got {}'.format(num_shards))
+        if not isinstance(shard_index, int) or not 0 <= shard_index < num_shards:
+            raise ValueError('Parameter shard_index should be an integer between 0 and {}, got '
+                             '{}'.format(num_shards - 1, shard_index))
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError('Parameter offset should be a non-negative integer, got {}'.format(offset))
+
+        start = offset + (shard_index - offset) % num_shards
+        return self._get_split_iterator(start=start, step=num_shards)
+
+    def _get_split_iterator(self, start=0, step=1):
+        """ Provides an iterator over bounding boxes and info dictionaries at positions `start`, `start + step`, ...
+        It uses lists if they already exist, otherwise a loaded split table or a generator of the split.
+        """
+        if self._bbox_list is not None and self._info_list is not None:
+            return itertools.islice(zip(self._bbox_list, self._info_list), start, None, step)
+        if self._split_table is not None:
+            return self._split_table.iter_rows(start=start, step=step)
+        return itertools.islice(self._iter_split(), start, None, step)
+
+    def save(self, filename):
+        """ Saves the area and results of the split into an uncompressed NumPy `npz` file. Coordinates of bounding
+        boxes, their CRS and each field of info dictionaries are stored in separate columns.
+
+        Supported types of info values are `bool`, `int`, `float`, `str` and `BBox`. All info dictionaries must have
+        the same keys with values of the same type.
+
+        :param filename: Path to the file. The extension `npz` is not added automatically.
+        :type filename: str
+        :raises: ValueError
+        """
+        columns = SplitTable.from_split(self._get_split_iterator()).columns
+
+        metadata = {
+            'splitter': '{}.{}'.format(self.__class__.__module__, self.__class__.__name__),
+            'crs': self.crs.value,
+            'area_bbox': list(self.area_bbox),
+            'area_bbox_crs': self.area_bbox.crs.value,
+            'reduce_bbox_sizes': bool(self.reduce_bbox_sizes),
+            'state': self._get_state()
+        }
+        columns['metadata'] = np.array(json.dumps(metadata))
+        columns['area'] = np.frombuffer(self.area_shape.wkb, dtype=np.uint8)
+
+        create_parent_folder(filename)
+        with open(filename, 'wb') as file:
+            np.savez(file, **columns)
+
+    @classmethod
+    def load(cls, filename):
+        """ Loads a splitter from a file created with `save`. Columns of the file are memory-mapped, therefore loading
+        is fast and iterating over a part of the split with `iter_split` reads only that part of the file.
+
+        The loaded splitter is an instance of the class which was saved, however its constructor is not called. The
+        class has to be already defined, it is never imported by this method. Only the area, the CRS, results of the
+        split and the state which is needed by methods of the class, such as `OsmSplitter.get_tile_array` and
+        `TileSplitter.get_tile_dict`, are restored.
+
+        :param filename: Path to the file
+        :type filename: str
+        :return: A splitter with the saved area and split
+        :rtype: AreaSplitter
+        :raises: ValueError
+        """
+        # pylint: disable=protected-access
+        columns = read_npz_columns(filename)
+        metadata = json.loads(str(columns.pop('metadata')))
+
+        splitter_class = cls._find_subclass(metadata['splitter'])
+        if splitter_class is None:
+            raise ValueError('File {} contains a split of {}, which is not a defined subclass of '
+                             '{}'.format(filename, metadata['splitter'], cls.__name__))
+
+        splitter = splitter_class.__new__(splitter_class)
+        splitter.crs = CRS(metadata['crs'])
+        splitter.area_shape = shapely.wkb.loads(columns.pop('area').tobytes())
+        splitter.shape_list = [splitter.area_shape]
+        splitter.reduce_bbox_sizes = metadata['reduce_bbox_sizes']
+        splitter.area_bbox = BBox(metadata['area_bbox'], crs=metadata['area_bbox_crs'])
+
+        splitter._bbox_list = None
+        splitter._info_list = None
+        splitter._split_table = SplitTable(columns)
+        splitter._area_index = None
+        splitter._set_state(metadata.get('state', {}))
+        return splitter
+
+    @classmethod
+    def _find_subclass(cls, name):
+        """ Finds the class itself or one of its subclasses, which have already been defined, by its full name
+
+        :param name: A name of the class in form `<module>.<class>`
+        :type name: str
+        :return: The class or `None` if there is no such class
+        :rtype: type or None
+        """
+        classes = [cls]
+        while classes:
+            splitter_class = classes.pop()
+            if '{}.{}'.format(splitter_class.__module__, splitter_class.__name__) == name:
+                return splitter_class
+            classes.extend(splitter_class.__subclasses__())
+        return None
+
+    def _get_state(self):
+        """ Provides a state of the splitter which is saved together with the split and is needed by methods of a
+        subclass after it is loaded. By default there is no such state.
+
+        :return: A dictionary which can be serialized to JSON
+        :rtype: dict
+        """
+        return {}
+
+    def _set_state(self, state):
+        """ Restores the state provided by `_get_state` to a loaded splitter. The split table is already available at
+        this point.
+
+        :param state: A dictionary of a saved state, which is empty for files without a state
+        :type state: dict
         """
-        raise NotImplementedError
 
     def get_bbox_list(self, crs=None, buffer=None, reduce_bbox_sizes=None):
         """ Returns a list of bounding boxes that are the result of the split
@@ -122,17 +334,47 @@ class AreaSplitter(ABC):
         :rtype: list(BBox)
         """
         bbox_list = self.bbox_list
-        if buffer:
-            bbox_list = [bbox.buffer(buffer) for bbox in bbox_list]
 
         if reduce_bbox_sizes is None:
             reduce_bbox_sizes = self.reduce_bbox_sizes
-        if reduce_bbox_sizes:
-            bbox_list = self._reduce_sizes(bbox_list)
+        if not (buffer or reduce_bbox_sizes or crs):
+            return bbox_list
+
+        # Bounding boxes are processed in arrays, one for each CRS, so that all operations are vectorized
+        processed_bbox_list = [None] * len(bbox_list)
+        for positions, bbox_array in self._group_by_crs(bbox_list):
+            if buffer:
+                bbox_array = bbox_array.buffer(buffer)
+            if reduce_bbox_sizes:
+                bbox_array = self._reduce_sizes(bbox_array)
+            if crs:
+                bbox_array = bbox_array.transform(crs)
+
+            for position, bbox in zip(positions, bbox_array):
+                processed_bbox_list[position] = bbox
+
+        return processed_bbox_list
+
+    @staticmethod
+    def _group_by_crs(bbox_list):
+        """ Groups bounding boxes by their CRS
+
+        :param bbox_list: A list of bounding boxes
+        :type bbox_list: list(BBox)
+        :return: Pairs of positions of bounding boxes in the list and an array of these bounding boxes
+        :rtype: list((list(int), BBoxArray))
+        """
+        crs_groups = {}
+        for position, bbox in enumerate(bbox_list):
+            crs_groups.setdefault(bbox.crs, []).append(position)
+
+        bbox_groups = []
+        for crs, positions in crs_groups.items():
+            coordinates = [(bbox_list[position].min_x, bbox_list[position].min_y,
+                            bbox_list[position].max_x, bbox_list[position].max_y) for position in positions]
+            bbox_groups.append((positions, BBoxArray(coordinates, crs=crs)))
 
-        if crs:
-            return [bbox.transform(crs) for bbox in bbox_list]
-        return bbox_list
+        return bbox_groups
 
     def get_geometry_list(self):
         """ For each bounding box an intersection with the shape of entire given area is calculated. CRS of the returned
@@ -179,6 +421,16 @@ class AreaSplitter(ABC):
             return bbox
         return bbox.transform(crs)
 
+    def get_area_index(self):
+        """ Returns a spatial index of the entire area, which is built when it is first needed
+
+        :return: A spatial index of the area shape
+        :rtype: AreaIndex
+        """
+        if self._area_index is None:
+            self._area_index = AreaIndex(self.area_shape)
+        return self._area_index
+
     def _intersects_area(self, bbox):
         """ Checks if the bounding box intersects the entire area
 
@@ -187,7 +439,7 @@ class AreaSplitter(ABC):
         :return: `True` if bbox intersects the entire area else False
         :rtype: bool
         """
-        return self._bbox_to_area_polygon(bbox).intersects(self.area_shape)
+        return self.get_area_index().intersects(self._bbox_to_area_polygon(bbox))
 
     def _intersection_area(self, bbox):
         """ Calculates the intersection of a given bounding box and the entire area
@@ -197,7 +449,9 @@ class AreaSplitter(ABC):
         :return: A shape of intersection
         :rtype: shapely.geometry.multipolygon.MultiPolygon or shapely.geometry.polygon.Polygon
         """
-        return self._bbox_to_area_polygon(bbox).intersection(self.area_shape)
+        if bbox.crs is not self.crs:
+            bbox = bbox.transform(self.crs)
+        return self.get_area_index().clip(bbox)
 
     def _bbox_to_area_polygon(self, bbox):
         """ Transforms bounding box into a polygon object in the area CRS.
@@ -207,13 +461,26 @@ class AreaSplitter(ABC):
         :return: A polygon
         :rtype: shapely.geometry.polygon.Polygon
         """
-        projected_bbox = bbox.transform(self.crs)
-        return projected_bbox.geometry
+        if bbox.crs is not self.crs:
+            bbox = bbox.transform(self.crs)
+        return bbox.geometry
 
-    def _reduce_sizes(self, bbox_list):
-        """ Reduces sizes of bounding boxes
+    def _reduce_sizes(self, bbox_array):
+        """ Reduces sizes of bounding boxes to bounds of their intersections with the area
+
+        :param bbox_array: An array of bounding boxes
+        :type bbox_array: BBoxArray
+        :return: An array of reduced bounding boxes in the same CRS
+        :rtype: BBoxArray
+        :raises: ValueError
         """
-        return [BBox(self._intersection_area(bbox).bounds, self.crs).transform(bbox.crs) for bbox in bbox_list]
+        area_bbox_array = bbox_array if bbox_array.crs is self.crs else bbox_array.transform(self.crs)
+
+        reduced_bounds = self.get_area_index().clip_bounds(area_bbox_array.array)
+        if np.isnan(reduced_bounds).any():
+            raise ValueError('Sizes of bounding boxes which do not intersect the area cannot be reduced')
+
+        return BBoxArray(reduced_bounds, crs=self.crs).transform(bbox_array.crs)
 
 
 class BBoxSplitter(AreaSplitter):
@@ -238,24 +505,21 @@ class BBoxSplitter(AreaSplitter):
 
         self.split_shape = self._parse_split_parameters(split_shape)
 
-        self._make_split()
-
-    def _make_split(self):
-        """ This method makes the split
+    def _iter_split(self):
+        """ This method makes the split, one column of bounding boxes at a time
         """
         columns, rows = self.split_shape
-        bbox_partition = self.area_bbox.get_partition(num_x=columns, num_y=rows)
+        bbox_columns = self.area_bbox.iter_partition(num_x=columns, num_y=rows)
 
-        self.bbox_list = []
-        self.info_list = []
-        for i, j in itertools.product(range(columns), range(rows)):
-            if self._intersects_area(bbox_partition[i][j]):
-                self.bbox_list.append(bbox_partition[i][j])
+        for i, bbox_column in enumerate(bbox_columns):
+            intersections = self.get_area_index().intersects_many([bbox.geometry for bbox in bbox_column])
 
-                info = {'parent_bbox': self.area_bbox,
-                        'index_x': i,
-                        'index_y': j}
-                self.info_list.append(info)
+            for j, (bbox, intersects) in enumerate(zip(bbox_column, intersections)):
+                if intersects:
+                    info = {'parent_bbox': self.area_bbox,
+                            'index_x': i,
+                            'index_y': j}
+                    yield bbox, info
 
 
 class OsmSplitter(AreaSplitter):
@@ -263,6 +527,11 @@ class OsmSplitter(AreaSplitter):
     the specified zoom level. It calculates bounding boxes of all OSM tiles that intersect the area. If specified by
     user it can also reduce the sizes of the remaining bounding boxes to best fit the area.
 
+    For areas in WGS84 or Popular Web Mercator CRS the range of candidate tiles is computed directly from the bounds
+    of the area. Blocks of tiles which are completely inside or outside the area are resolved with a single test and
+    only tiles on the boundary of the area are tested one by one. Bounding boxes and info dictionaries of tiles are
+    created only when they are requested.
+
     :param shape_list: A list of geometrical shapes describing the area of interest
     :type shape_list: list(shapely.geometry.multipolygon.MultiPolygon or shapely.geometry.polygon.Polygon)
     :param crs: Coordinate reference system of the shapes in `shape_list`
@@ -274,20 +543,52 @@ class OsmSplitter(AreaSplitter):
     :type reduce_bbox_sizes: bool
     """
     POP_WEB_MAX = transform_point((180, 0), CRS.WGS84, CRS.POP_WEB)[0]
+    TILE_CHUNK_SIZE = 4096
 
     def __init__(self, shape_list, crs, zoom_level, **kwargs):
         super().__init__(shape_list, crs, **kwargs)
 
         self.zoom_level = zoom_level
+        self._tile_array = None
 
         self._make_split()
 
+    def get_tile_array(self):
+        """ Returns indices of all tiles obtained in the split. The order matches the order of the list of bounding
+        boxes.
+
+        :return: An array of shape `(n, 3)` where each row contains `index_x`, `index_y` and `zoom_level` of a tile
+        :rtype: numpy.ndarray
+        """
+        return self._tile_array
+
+    def _get_state(self):
+        """ Saves the zoom level, tile indices are restored from the split
+        """
+        return {'zoom_level': self.zoom_level}
+
+    def _set_state(self, state):
+        """ Restores the zoom level and the array of tile indices
+        """
+        self.zoom_level = state.get('zoom_level')
+
+        columns = self._split_table.columns
+        if len(self._split_table):
+            self._tile_array = np.stack([columns['info.index_x'], columns['info.index_y'], columns['info.zoom_level']],
+                                        axis=-1).astype(np.int64)
+        else:
+            self._tile_array = np.zeros((0, 3), dtype=np.int64)
+
     def _make_split(self, ):
         """This method makes the split
         """
         self.area_bbox = self.get_area_bbox(CRS.POP_WEB)
         self._check_area_bbox()
 
+        if self.crs in (CRS.WGS84, CRS.POP_WEB):
+            self._tile_array = self._find_tiles()
+            return
+
         self.bbox_list = []
         self.info_list = []
         self._recursive_split(self.get_world_bbox(), 0, 0, 0)
@@ -295,6 +596,24 @@ class OsmSplitter(AreaSplitter):
         for i, bbox in enumerate(self.bbox_list):
             self.bbox_list[i] = bbox.transform(self.crs)
 
+        self._tile_array = np.array([[info['index_x'], info['index_y'], info['zoom_level']] for info in self.info_list],
+                                    dtype=np.int64).reshape(-1, 3)
+
+    def _iter_split(self):
+        """ Creates bounding boxes and info dictionaries of tiles in chunks
+        """
+        for start in range(0, len(self._tile_array), self.TILE_CHUNK_SIZE):
+            tile_chunk = self._tile_array[start: start + self.TILE_CHUNK_SIZE]
+
+            tile_bboxes = BBoxArray(np.stack(self._get_tile_coordinates(tile_chunk[:, 0], tile_chunk[:, 1]), axis=-1),
+                                    crs=CRS.POP_WEB)
+
+            for bbox, (column, row, zoom_level) in zip(tile_bboxes.transform(self.crs).to_bbox_list(),
+                                                       tile_chunk.tolist()):
+                yield bbox, {'zoom_level': zoom_level,
+                             'index_x': column,
+                             'index_y': row}
+
     def _check_area_bbox(self):
         """ The method checks if the area bounding box is completely inside the OSM grid. That means that its latitudes
         must be contained in the interval (-85.0511, 85.0511)
@@ -314,6 +633,132 @@ class OsmSplitter(AreaSplitter):
         """
         return BBox((-self.POP_WEB_MAX, -self.POP_WEB_MAX, self.POP_WEB_MAX, self.POP_WEB_MAX), crs=CRS.POP_WEB)
 
+    def _find_tiles(self):
+        """ Finds all tiles which intersect the area. Tiles are ordered in the same way as they would be visited by a
+        recursive split of the world bounding box.
+
+        This is equivalent to the recursive split because with area CRS either WGS84 or Popular Web Mercator a tile
+        intersects the area exactly when all its parent tiles intersect the area.
+
+        :return: An array of shape `(n, 3)` where each row contains `index_x`, `index_y` and `zoom_level` of a tile
+        :rtype: numpy.ndarray
+        """
+        column_indices, row_indices = self._get_index_ranges()
+        tile_grid = self._get_tile_grid(column_indices, row_indices)
+
+        coverage = np.zeros((len(column_indices), len(row_indices)), dtype=bool)
+        self._fill_coverage(coverage, tile_grid, (0, coverage.shape[0]), (0, coverage.shape[1]))
+
+        columns, rows = np.nonzero(coverage)
+        columns, rows = columns + column_indices[0], rows + row_indices[0]
+        order = np.argsort(self._get_split_order(columns, rows), kind='stable')
+
+        return np.stack([columns[order], rows[order], np.full(len(order), self.zoom_level)], axis=-1).astype(np.int64)
+
+    def _get_index_ranges(self):
+        """ Finds ranges of column and row indices of tiles at the zoom level which could intersect the area
+
+        :return: Arrays of consecutive column indices and of consecutive row indices
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        tile_count = 2 ** self.zoom_level
+        world_size = 2 * self.POP_WEB_MAX
+
+        def get_index(coordinate):
+            return min(max(int(math.floor(coordinate / world_size * tile_count)), 0), tile_count - 1)
+
+        min_x, min_y, max_x, max_y = self.area_bbox
+        # A margin of one tile covers rounding errors, tiles outside the area are removed by the test anyway
+        min_column = max(get_index(min_x + self.POP_WEB_MAX) - 1, 0)
+        max_column = min(get_index(max_x + self.POP_WEB_MAX) + 1, tile_count - 1)
+        min_row = max(get_index(self.POP_WEB_MAX - max_y) - 1, 0)
+        max_row = min(get_index(self.POP_WEB_MAX - min_y) + 1, tile_count - 1)
+
+        return np.arange(min_column, max_column + 1), np.arange(min_row, max_row + 1)
+
+    def _get_tile_grid(self, column_indices, row_indices):
+        """ Calculates edges of tile columns and rows in the area CRS
+
+        :return: Lists of minimal x, minimal y, maximal x and maximal y coordinates of columns and rows
+        :rtype: (list(float), list(float), list(float), list(float))
+        """
+        column_min_x, _, column_max_x, _ = self._get_tile_coordinates(column_indices, np.zeros_like(column_indices))
+        _, row_min_y, _, row_max_y = self._get_tile_coordinates(np.zeros_like(row_indices), row_indices)
+
+        # Transformation from Popular Web Mercator to WGS84 is separable, therefore tile edges can be transformed only
+        # once and tile bounding boxes in area CRS are the same as if they were transformed one by one
+        column_min_x, _ = transform_point((column_min_x, np.zeros_like(column_min_x)), CRS.POP_WEB, self.crs)
+        column_max_x, _ = transform_point((column_max_x, np.zeros_like(column_max_x)), CRS.POP_WEB, self.crs)
+        _, row_min_y = transform_point((np.zeros_like(row_min_y), row_min_y), CRS.POP_WEB, self.crs)
+        _, row_max_y = transform_point((np.zeros_like(row_max_y), row_max_y), CRS.POP_WEB, self.crs)
+
+        return column_min_x.tolist(), row_min_y.tolist(), column_max_x.tolist(), row_max_y.tolist()
+
+    def _fill_coverage(self, coverage, tile_grid, column_range, row_range):
+        """ Marks tiles of a block which intersect the area. A block which is completely inside or outside the area is
+        resolved at once, otherwise it is split in half along its longer side.
+        """
+        start_column, end_column = column_range
+        start_row, end_row = row_range
+
+        column_min_x, row_min_y, column_max_x, row_max_y = tile_grid
+        block_polygon = shapely.geometry.box(column_min_x[start_column], row_min_y[end_row - 1],
+                                             column_max_x[end_column - 1], row_max_y[start_row])
+
+        area_index = self.get_area_index()
+        if not area_index.intersects(block_polygon):
+            return
+
+        if end_column - start_column == 1 and end_row - start_row == 1:
+            coverage[start_column, start_row] = True
+            return
+
+        if area_index.contains(block_polygon):
+            coverage[start_column: end_column, start_row: end_row] = True
+            return
+
+        if end_column - start_column >= end_row - start_row:
+            middle_column = (start_column + end_column) // 2
+            self._fill_coverage(coverage, tile_grid, (start_column, middle_column), row_range)
+            self._fill_coverage(coverage, tile_grid, (middle_column, end_column), row_range)
+        else:
+            middle_row = (start_row + end_row) // 2
+            self._fill_coverage(coverage, tile_grid, column_range, (start_row, middle_row))
+            self._fill_coverage(coverage, tile_grid, column_range, (middle_row, end_row))
+
+    def _get_tile_coordinates(self, columns, rows):
+        """ Calculates Popular Web Mercator coordinates of tiles. The arithmetic is the same as in a recursive split of
+        the world bounding box, therefore the coordinates are exactly the same.
+
+        :param columns: An array of tile column indices
+        :type columns: numpy.ndarray
+        :param rows: An array of tile row indices
+        :type rows: numpy.ndarray
+        :return: Arrays of `min_x`, `min_y`, `max_x` and `max_y` coordinates of tiles
+        :rtype: tuple(numpy.ndarray)
+        """
+        columns, rows = np.asarray(columns, dtype=np.int64), np.asarray(rows, dtype=np.int64)
+        min_x, min_y = np.full(columns.shape, -self.POP_WEB_MAX), np.full(columns.shape, -self.POP_WEB_MAX)
+        max_x, max_y = np.full(columns.shape, self.POP_WEB_MAX), np.full(columns.shape, self.POP_WEB_MAX)
+
+        for shift in range(self.zoom_level - 1, -1, -1):
+            x_parts = (columns >> shift) & 1
+            y_parts = 1 - ((rows >> shift) & 1)
+            size_x, size_y = (max_x - min_x) / 2, (max_y - min_y) / 2
+
+            min_x, max_x = min_x + x_parts * size_x, min_x + (x_parts + 1) * size_x
+            min_y, max_y = min_y + y_parts * size_y, min_y + (y_parts + 1) * size_y
+
+        return min_x, min_y, max_x, max_y
+
+    def _get_split_order(self, columns, rows):
+        """ Calculates keys which sort tiles in the order of a recursive split of the world bounding box
+        """
+        keys = np.zeros(columns.shape, dtype=np.int64)
+        for shift in range(self.zoom_level - 1, -1, -1):
+            keys = 4 * keys + 2 * ((columns >> shift) & 1) + 1 - ((rows >> shift) & 1)
+        return keys
+
     def _recursive_split(self, bbox, zoom_level, column, row):
         """ Method that recursively creates bounding boxes of OSM grid that intersect the area.
 
@@ -383,7 +828,7 @@ class TileSplitter(AreaSplitter):
         self._make_split()
 
     def _make_split(self):
-        """ This method makes the split
+        """ This method collects satellite tiles which intersect the area
         """
         self.tile_dict = {}
 
@@ -404,20 +849,18 @@ class TileSplitter(AreaSplitter):
         self.tile_dict = {tile_name: tile_props for tile_name, tile_props in self.tile_dict.items() if
                           self._intersects_area(tile_props['bbox'])}
 
-        self.bbox_list = []
-        self.info_list = []
-
+    def _iter_split(self):
+        """ This method splits bounding boxes of satellite tiles
+        """
         for tile_name, tile_info in self.tile_dict.items():
             tile_bbox = tile_info['bbox']
             bbox_splitter = BBoxSplitter([tile_bbox.geometry], tile_bbox.crs,
                                          split_shape=self.tile_split_shape)
 
-            for bbox, info in zip(bbox_splitter.get_bbox_list(), bbox_splitter.get_info_list()):
+            for bbox, info in bbox_splitter.iter_split():
                 if self._intersects_area(bbox):
                     info['tile'] = tile_name
-
-                    self.bbox_list.append(bbox)
-                    self.info_list.append(info)
+                    yield bbox, info
 
     def get_tile_dict(self):
         """ Returns the dictionary of satellite tiles intersecting the area geometry. For each tile they contain info
@@ -428,6 +871,33 @@ class TileSplitter(AreaSplitter):
         """
         return self.tile_dict
 
+    def _get_state(self):
+        """ Saves the dictionary of satellite tiles with bounding boxes, ISO 8601 times and GeoJSON geometries
+        """
+        return {
+            'tile_dict': {tile_name: {'bbox': list(tile_props['bbox']),
+                                      'crs': tile_props['bbox'].crs.value,
+                                      'times': [tile_time.isoformat() if tile_time else None
+                                                for tile_time in tile_props['times']],
+                                      'geometries': [shapely.geometry.mapping(geometry)
+                                                     for geometry in tile_props['geometries']]}
+                          for tile_name, tile_props in self.tile_dict.items()}
+        }
+
+    def _set_state(self, state):
+        """ Restores the dictionary of satellite tiles
+        """
+        if 'tile_dict' not in state:
+            self.tile_dict = None
+            return
+
+        self.tile_dict = {tile_name: {'bbox': BBox(tile_props['bbox'], crs=tile_props['crs']),
+                                      'times': [dateutil.parser.parse(tile_time) if tile_time else None
+                                                for tile_time in tile_props['times']],
+                                      'geometries': [shapely.geometry.shape(geometry)
+                                                     for geometry in tile_props['geometries']]}
+                          for tile_name, tile_props in state['tile_dict'].items()}
+
 
 class CustomGridSplitter(AreaSplitter):
     """ Splitting class which can split according to given custom collection of bounding boxes
@@ -453,8 +923,6 @@ class CustomGridSplitter(AreaSplitter):
         self.bbox_grid = self._parse_bbox_grid(bbox_grid)
         self.bbox_split_shape = bbox_split_shape
 
-        self._make_split()
-
     @staticmethod
     def _parse_bbox_grid(bbox_grid):
         """ Helper method for parsing bounding box grid. It will try to parse it into `BBoxCollection`
@@ -467,188 +935,16 @@ class CustomGridSplitter(AreaSplitter):
 
         raise ValueError("Parameter 'bbox_grid' should be an instance of {}".format(BBoxCollection.__name__))
 
-    def _make_split(self):
+    def _iter_split(self):
         """ This method makes the split
         """
-        self.bbox_list = []
-        self.info_list = []
-
         for grid_idx, grid_bbox in enumerate(self.bbox_grid):
             if self._intersects_area(grid_bbox):
 
                 bbox_splitter = BBoxSplitter([grid_bbox.geometry], grid_bbox.crs,
                                              split_shape=self.bbox_split_shape)
 
-                for bbox, info in zip(bbox_splitter.get_bbox_list(), bbox_splitter.get_info_list()):
+                for bbox, info in bbox_splitter.iter_split():
                     if self._intersects_area(bbox):
                         info['grid_index'] = grid_idx
-
-                        self.bbox_list.append(bbox)
-                        self.info_list.append(info)
-
-
-class BaseUtmSplitter(AreaSplitter):
-    """ Base splitter that returns bboxes of fixed size aligned to UTM zones or UTM grid tiles as defined by the MGRS
-    """
-    def __init__(self, shape_list, crs, bbox_size):
-        """
-        :param shape_list: A list of geometrical shapes describing the area of interest
-        :type shape_list: list(shapely.geometry.multipolygon.MultiPolygon or shapely.geometry.polygon.Polygon)
-        :param crs: Coordinate reference system of the shapes in `shape_list`
-        :type crs: CRS
-        :param bbox_size: Physical size in metres of generated bounding boxes. Could be a float or tuple of floats
-        :type bbox_size: int or (int, int) or float or (float, float)
-        """
-        super().__init__(shape_list, crs)
-
-        self.bbox_size = self._parse_split_parameters(bbox_size, allow_float=True)
-
-        self.shape_geometry = Geometry(self.area_shape, self.crs).transform(CRS.WGS84)
-
-        self.utm_grid = self._get_utm_polygons()
-
-        self._make_split()
-
-    @abstractmethod
-    def _get_utm_polygons(self):
-        raise NotImplementedError
-
-    @staticmethod
-    def _get_utm_from_props(utm_dict):
-        """ Return the UTM CRS corresponding to the UTM described by the properties dictionary
-
-        :param utm_dict: Dictionary reporting name of the UTM zone and MGRS grid
-        :type utm_dict: dict
-        :return: UTM coordinate reference system
-        :rtype: sentinelhub.CRS
-        """
-        return CRS('32{}{}'.format(6 if utm_dict['direction'] == 'N' else 7, str(utm_dict['zone']).zfill(2)))
-
-    def _align_bbox_to_size(self, bbox):
-        """ Align input bbox coordinates to be multiples of the bbox size
-
-        :param bbox: Bounding box in UTM coordinates
-        :type bbox: sentinelhub.BBox
-        :return: BBox objects with coordinates multiples of the bbox size
-        :rtype: sentinelhub.BBox
-        """
-        size_x, size_y = self.bbox_size
-        lower_left_x, lower_left_y = bbox.lower_left
-        return BBox([(math.floor(lower_left_x / size_x) * size_x, math.floor(lower_left_y / size_y) * size_y),
-                     bbox.upper_right], crs=bbox.crs)
-
-    def _make_split(self):
-        """ Split each UTM grid into equally sized bboxes in correct UTM zone
-        """
-        size_x, size_y = self.bbox_size
-        self.bbox_list = []
-        self.info_list = []
-
-        index = 0
-
-        for utm_cell in self.utm_grid:
-            utm_cell_geom, utm_cell_prop = utm_cell
-            # the UTM MGRS grid definition contains four 0 zones at the poles (0A, 0B, 0Y, 0Z)
-            if utm_cell_prop['zone'] == 0:
-                continue
-            utm_crs = self._get_utm_from_props(utm_cell_prop)
-
-            intersection = utm_cell_geom.intersection(self.shape_geometry.geometry)
-
-            if not intersection.is_empty and isinstance(intersection, GeometryCollection):
-                intersection = MultiPolygon(geo_object for geo_object in intersection
-                                            if isinstance(geo_object, (Polygon, MultiPolygon)))
-
-            if not intersection.is_empty:
-                intersection = Geometry(intersection, CRS.WGS84).transform(utm_crs)
-
-                bbox_partition = self._align_bbox_to_size(intersection.bbox).get_partition(size_x=size_x, size_y=size_y)
-
-                columns, rows = len(bbox_partition), len(bbox_partition[0])
-                for i, j in itertools.product(range(columns), range(rows)):
-                    if bbox_partition[i][j].geometry.intersects(intersection.geometry):
-                        self.bbox_list.append(bbox_partition[i][j])
-                        self.info_list.append(dict(crs=utm_crs.name,
-                                                   utm_zone=str(utm_cell_prop['zone']).zfill(2),
-                                                   utm_row=utm_cell_prop['row'],
-                                                   direction=utm_cell_prop['direction'],
-                                                   index=index,
-                                                   index_x=i,
-                                                   index_y=j))
-                        index += 1
-
-    def get_bbox_list(self, buffer=None):
-        """ Get list of bounding boxes.
-
-        The CRS is fixed to the computed UTM CRS. This BBox splitter does not support reducing size of output
-        bounding boxes
-
-        :param buffer: A percentage of each BBox size increase. This will cause neighbouring bounding boxes to overlap.
-        :type buffer: float or None
-        :return: List of bounding boxes
-        :rtype: list(BBox)
-        """
-        return super().get_bbox_list(buffer=buffer)
-
-
-class UtmGridSplitter(BaseUtmSplitter):
-    """ Splitter that returns bounding boxes of fixed size aligned to the UTM MGRS grid
-    """
-    def _get_utm_polygons(self):
-        """ Find UTM grid zones overlapping with input area shape
-
-        :return: List of geometries and properties of UTM grid zones overlapping with input area shape
-        :rtype: list
-        """
-        # file downloaded from faculty.baruch.cuny.edu/geoportal/data/esri/world/utmzone.zip
-        utm_grid_filename = os.path.join(os.path.dirname(__file__), '.utmzones.geojson')
-
-        if not os.path.isfile(utm_grid_filename):
-            raise IOError('UTM grid definition file does not exist: %s' % os.path.abspath(utm_grid_filename))
-
-        with open(utm_grid_filename) as utm_grid_file:
-            utm_grid = json.load(utm_grid_file)['features']
-
-        utm_geom_list = [shapely.geometry.shape(utm_zone['geometry']) for utm_zone in utm_grid]
-        utm_prop_list = [dict(zone=utm_zone['properties']['ZONE'],
-                              row=utm_zone['properties']['ROW_'],
-                              direction='N' if utm_zone['properties']['ROW_'] >= 'N' else 'S') for utm_zone in utm_grid]
-
-        return list(zip(utm_geom_list, utm_prop_list))
-
-
-class UtmZoneSplitter(BaseUtmSplitter):
-    """ Splitter that returns bounding boxes of fixed size aligned to the equator and the UTM zones.
-    """
-    LNG_MIN, LNG_MAX, LNG_UTM = -180, 180, 6
-    LAT_MIN, LAT_MAX, LAT_EQ = -80, 84, 0
-
-    def _get_utm_polygons(self):
-        """ Find UTM zones overlapping with input area shape
-
-        The returned geometry corresponds to the a triangle ranging from the equator to the north/south pole
-
-        :return: List of geometries and properties of UTM zones overlapping with input area shape
-        :rtype: list
-        """
-        utm_geom_list = []
-        for lat in [(self.LAT_EQ, self.LAT_MAX), (self.LAT_MIN, self.LAT_EQ)]:
-            for lng in range(self.LNG_MIN, self.LNG_MAX, self.LNG_UTM):
-                points = []
-                # A new point is added per each degree - this is inline with geometries used by UtmGridSplitter
-                # In the future the number of points will be calculated according to bbox_size parameter
-                for degree in range(lat[0], lat[1]):
-                    points.append((lng, degree))
-                for degree in range(lng, lng + self.LNG_UTM):
-                    points.append((degree, lat[1]))
-                for degree in range(lat[1], lat[0], -1):
-                    points.append((lng + self.LNG_UTM, degree))
-                for degree in range(lng + self.LNG_UTM, lng, -1):
-                    points.append((degree, lat[0]))
-
-                utm_geom_list.append(Polygon(points))
-
-        utm_prop_list = [dict(zone=zone, row='', direction=direction)
-                         for direction in ['N', 'S'] for zone in range(1, 61)]
-
-        return list(zip(utm_geom_list, utm_prop_list))
+                        yield bbox, info
@@ -6,7 +6,7 @@ import click
 
 from .config import SHConfig
 from .constants import DataSource
-from .data_request import get_safe_format, download_safe_format
+from .aws_request import get_safe_format, download_safe_format
 from .download import DownloadRequest, DownloadClient
 
 
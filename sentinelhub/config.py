@@ -31,6 +31,12 @@ class SHConfig:
         - `download_sleep_time`: Number of seconds between the failed download attempt and the next attempt.
         - `download_timeout_seconds`: Maximum number of seconds before download attempt is canceled.
         - `number_of_download_processes`: Number of download processes, used to calculate rate-limit sleep time.
+        - `sh_token_cache_folder`: A folder where OAuth tokens for Sentinel Hub service are cached and shared between
+            processes. If empty, tokens are not cached on disk.
+        - `wfs_cache_folder`: A folder with a persistent cache of tile metadata obtained from Sentinel Hub WFS service.
+            If empty, WFS results are not cached.
+        - `wfs_cache_latest_ttl_seconds`: Number of seconds for which cached WFS results of queries for the latest
+            acquisition are valid.
 
     Usage in the code:
 
@@ -59,7 +65,10 @@ class SHConfig:
             'max_download_attempts': 4,
             'download_sleep_time': 5,
             'download_timeout_seconds': 120,
-            'number_of_download_processes': 1
+            'number_of_download_processes': 1,
+            'sh_token_cache_folder': '',
+            'wfs_cache_folder': '',
+            'wfs_cache_latest_ttl_seconds': 3600
         }
 
         def __init__(self):
@@ -2,18 +2,19 @@
 Module defining constants and enumerate types used in the package
 """
 import re
-import functools
 import itertools as it
 import mimetypes
 import warnings
 from enum import Enum, EnumMeta
 
+import numpy as np
 import utm
 import pyproj
 from aenum import extend_enum
 
 from .config import SHConfig
 from .exceptions import SHDeprecationWarning
+from .transformer_registry import TransformerRegistry
 from ._version import __version__
 
 
@@ -482,31 +483,30 @@ class CRS(Enum, metaclass=CRSMeta):
         """
         return self.name.startswith('UTM')
 
-    @functools.lru_cache(maxsize=5)
     def projection(self):
-        """ Returns a projection in form of pyproj class. For better time performance it will cache results of
-        5 most recently used CRS classes.
+        """ Returns a projection in form of pyproj class. For better time performance results are cached in a registry
+        obtained with `TransformerRegistry.get_instance`.
 
         :return: pyproj projection class
         :rtype: pyproj.Proj
         """
-        return pyproj.Proj(self._get_pyproj_projection_def(), preserve_units=True)
+        return TransformerRegistry.get_instance().get_projection(self.get_pyproj_projection_def())
 
-    @functools.lru_cache(maxsize=5)
     def pyproj_crs(self):
-        """ Returns a pyproj CRS class. For better time performance it will cache results of
-        5 most recently used CRS classes.
+        """ Returns a pyproj CRS class. For better time performance results are cached in a registry obtained with
+        `TransformerRegistry.get_instance`.
 
         :return: pyproj CRS class
         :rtype: pyproj.CRS
         """
-        return pyproj.CRS(self._get_pyproj_projection_def())
+        return TransformerRegistry.get_instance().get_pyproj_crs(self.get_pyproj_projection_def())
 
-    @functools.lru_cache(maxsize=10)
     def get_transform_function(self, other):
         """ Returns a function for transforming geometrical objects from one CRS to another. The function will support
         transformations between any objects that pyproj supports.
-        For better time performance this method will cache results of 10 most recently used pairs of CRS classes.
+        For better time performance transformers are cached in a registry obtained with
+        `TransformerRegistry.get_instance`. Because pyproj transformers are not thread-safe, the function should only
+        be used in the thread which obtained it.
 
         :param self: Initial CRS
         :type self: CRS
@@ -515,27 +515,67 @@ class CRS(Enum, metaclass=CRSMeta):
         :return: A projection function obtained from pyproj package
         :rtype: function
         """
-        return pyproj.Transformer.from_proj(self.projection(), other.projection(), skip_equivalent=True).transform
+        return TransformerRegistry.get_instance().get_transformer(self.get_pyproj_projection_def(),
+                                                                  other.get_pyproj_projection_def()).transform
 
     @staticmethod
     def get_utm_from_wgs84(lng, lat):
         """ Convert from WGS84 to UTM coordinate system
 
-        :param lng: Longitude
-        :type lng: float
-        :param lat: Latitude
-        :type lat: float
-        :return: UTM coordinates
-        :rtype: tuple
+        :param lng: Longitude or an array of longitudes
+        :type lng: float or numpy.ndarray
+        :param lat: Latitude or an array of latitudes
+        :type lat: float or numpy.ndarray
+        :return: UTM CRS of a point or an array of UTM CRS, one for each point
+        :rtype: CRS or numpy.ndarray
         """
-        _, _, zone, _ = utm.from_latlon(lat, lng)
-        direction = 'N' if lat >= 0 else 'S'
-        return CRS['UTM_{}{}'.format(str(zone), direction)]
+        if np.ndim(lng) == 0 and np.ndim(lat) == 0:
+            _, _, zone, _ = utm.from_latlon(lat, lng)
+            direction = 'N' if lat >= 0 else 'S'
+            return CRS['UTM_{}{}'.format(str(zone), direction)]
 
-    def _get_pyproj_projection_def(self):
-        """ Returns a pyproj crs definition
+        utm_codes, inverse = CRS._get_utm_codes(lng, lat)
+        utm_crs_list = np.empty(len(utm_codes), dtype=object)
+        utm_crs_list[:] = [CRS(str(code)) for code in utm_codes]
+
+        return utm_crs_list[inverse].reshape(np.broadcast(lng, lat).shape)
+
+    @staticmethod
+    def _get_utm_codes(lng, lat):
+        """ Calculates EPSG codes of UTM zones for arrays of points with the same rules as `utm.from_latlon`
+
+        :return: An array of unique EPSG codes and a flat array of indices of codes for each point
+        :rtype: (numpy.ndarray, numpy.ndarray)
+        """
+        lng, lat = np.broadcast_arrays(np.asarray(lng, dtype=np.float64), np.asarray(lat, dtype=np.float64))
+        lng, lat = lng.ravel(), lat.ravel()
+
+        if np.any((lat < -80) | (lat > 84)):
+            raise ValueError('latitude out of range (must be between 80 deg S and 84 deg N)')
+        if np.any((lng < -180) | (lng > 180)):
+            raise ValueError('longitude out of range (must be between 180 deg W and 180 deg E)')
+
+        normalized_lng = (lng % 360 + 540) % 360 - 180
+        is_svalbard = (lat >= 72) & (normalized_lng >= 0)
+        zones = np.select(
+            [(lat >= 56) & (lat < 64) & (normalized_lng >= 3) & (normalized_lng < 12),
+             is_svalbard & (normalized_lng < 9),
+             is_svalbard & (normalized_lng < 21),
+             is_svalbard & (normalized_lng < 33),
+             is_svalbard & (normalized_lng < 42)],
+            [32, 31, 33, 35, 37],
+            default=((normalized_lng + 180) / 6).astype(int) + 1
+        )
+
+        return np.unique(np.where(lat >= 0, 32600, 32700) + zones, return_inverse=True)
+
+    def get_pyproj_projection_def(self):
+        """ Returns a pyproj CRS definition, which is also used as a key of cached objects in `TransformerRegistry`
 
         For WGS 84 it ensures lng-lat order
+
+        :return: A pyproj CRS definition
+        :rtype: str
         """
         return '+proj=longlat +ellps=WGS84 +datum=WGS84 +no_defs' if self is CRS.WGS84 else self.ogc_string()
 
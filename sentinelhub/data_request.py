@@ -8,14 +8,14 @@ import logging
 import copy
 import warnings
 from abc import ABC, abstractmethod
+from collections import namedtuple
+from collections.abc import Sequence
 
 from .config import SHConfig
 from .ogc import OgcImageService
 from .fis import FisService
 from .geopedia import GeopediaWmsService, GeopediaImageService
-from .aws import AwsProduct, AwsTile
-from .aws_safe import SafeProduct, SafeTile
-from .download import DownloadRequest, DownloadClient, AwsDownloadClient, SentinelHubDownloadClient
+from .download import DownloadRequest, DownloadClient, SentinelHubDownloadClient, OutputAssembler
 from .exceptions import SHDeprecationWarning
 from .os_utils import make_folder
 from .constants import DataSource, MimeType, CustomUrlParam, ServiceType, CRS, HistogramType
@@ -29,7 +29,7 @@ class DataRequest(ABC):
     Every data request type can write the fetched data to disk and then read it again (and hence avoid the need to
     download the same data again).
     """
-    def __init__(self, download_client_class, *, data_folder=None, config=None, instance_id=None):
+    def __init__(self, download_client_class, *, data_folder=None, config=None, instance_id=None, priority=None):
         """
         :param download_client_class: A class implementing a download client
         :type download_client_class: type
@@ -37,10 +37,15 @@ class DataRequest(ABC):
         :type data_folder: str
         :param config: A custom instance of config class to override parameters from the saved configuration.
         :type config: SHConfig or None
+        :param priority: Download priority of this request. Downloads with a higher priority are executed before
+            downloads of other requests in the same process which have a lower priority. By default priorities of
+            download requests are not changed.
+        :type priority: int or float or None
         """
         self.download_client_class = download_client_class
         self.data_folder = data_folder
         self.config = config or SHConfig()
+        self.priority = priority
 
         if instance_id is not None:
             warnings.warn("Parameter 'instance_id' is deprecated and will soon removed. Use parameter 'config' instead",
@@ -62,7 +67,7 @@ class DataRequest(ABC):
         Returns a list of download requests for requested data.
 
         :return: List of data to be downloaded
-        :rtype: list(sentinelhub.DownloadRequest)
+        :rtype: list(sentinelhub.DownloadRequest) or Sequence(sentinelhub.DownloadRequest)
         """
         return self.download_list
 
@@ -90,9 +95,21 @@ class DataRequest(ABC):
         :return: `True` if request is valid and `False` otherwise
         :rtype: bool
         """
-        return isinstance(self.download_list, list) and \
+        return isinstance(self.download_list, Sequence) and \
             all(isinstance(request, DownloadRequest) for request in self.download_list)
 
+    def requires_assembly(self, decode_data=True):
+        """ Checks if downloaded data has to be assembled by `get_data` method of this request. Such data cannot be
+        obtained only by executing download requests from `prepare_download`.
+
+        :param decode_data: Whether data will be decoded
+        :type decode_data: bool
+        :return: `True` if data has to be obtained with `get_data` and `False` otherwise
+        :rtype: bool
+        """
+        # pylint: disable=unused-argument,no-self-use
+        return False
+
     def get_data(self, *, save_data=False, redownload=False, data_filter=None, max_threads=None,
                  decode_data=True, raise_download_errors=True):
         """ Get requested data either by downloading it or by reading it from the disk (if it
@@ -142,6 +159,30 @@ class DataRequest(ABC):
         self._preprocess_request(True, False)
         self._execute_data_download(data_filter, redownload, max_threads, raise_download_errors)
 
+    def prepare_download(self, *, save_data=False, return_data=True, redownload=False, raise_download_errors=True,
+                         download_service=None):
+        """ Prepares download requests together with a download client which can execute them. This way the download
+        can be executed jointly with downloads of other data requests, e.g. with `DownloadService.gather`.
+
+        :param save_data: flag to turn on/off saving of data to disk. Default is `False`.
+        :type save_data: bool
+        :param return_data: flag to turn on/off returning of data. Default is `True`.
+        :type return_data: bool
+        :param redownload: if `True`, download again the requested data even though it's already saved to disk.
+        :type redownload: bool
+        :param raise_download_errors: If `True` any error in download process should be raised as
+            ``DownloadFailedException``. If `False` failed downloads will only raise warnings.
+        :type raise_download_errors: bool
+        :param download_service: A download service which will execute the downloads. By default a service shared by
+            the entire process is used.
+        :type download_service: DownloadService or None
+        :return: A download client and a list of download requests
+        :rtype: (DownloadClient, list(DownloadRequest))
+        """
+        self._preprocess_request(save_data, return_data)
+        client = self._create_download_client(redownload, raise_download_errors, download_service=download_service)
+        return client, self.download_list
+
     def _execute_data_download(self, data_filter, redownload, max_threads, raise_download_errors, decode_data=True):
         """ Calls download module and executes the download process
 
@@ -176,11 +217,7 @@ class DataRequest(ABC):
         else:
             raise ValueError('data_filter parameter must be a list of indices')
 
-        client = self.download_client_class(
-            redownload=redownload,
-            raise_download_errors=raise_download_errors,
-            config=self.config
-        )
+        client = self._create_download_client(redownload, raise_download_errors)
         data_list = client.download(filtered_download_list, max_threads=max_threads, decode_data=decode_data)
 
         if is_repeating_filter:
@@ -188,6 +225,16 @@ class DataRequest(ABC):
 
         return data_list
 
+    def _create_download_client(self, redownload, raise_download_errors, download_service=None):
+        """ Creates an instance of download client which will execute download requests of this data request
+        """
+        return self.download_client_class(
+            redownload=redownload,
+            raise_download_errors=raise_download_errors,
+            config=self.config,
+            service=download_service
+        )
+
     @staticmethod
     def _filter_repeating_items(download_list):
         """ Because of data_filter some requests in download list might be the same. In order not to download them again
@@ -228,18 +275,42 @@ class DataRequest(ABC):
             download_request.save_response = save_data
             download_request.return_data = return_data
             download_request.data_folder = self.data_folder
+            if self.priority is not None:
+                download_request.priority = self.priority
 
         if save_data:
             for folder in self.folder_list:
                 make_folder(os.path.join(self.data_folder, folder))
 
 
+class DateFilter(namedtuple('DateFilter', ['min_coverage', 'bbox_maxcc'])):
+    """ Options of `OgcRequest` for skipping dates which would give mostly empty or clouded images. Both are computed
+    from footprints and cloud coverage of satellite tiles within the bounding box of the request.
+    """
+    __slots__ = ()
+
+    def __new__(cls, min_coverage=None, bbox_maxcc=None):
+        """
+        :param min_coverage: If set, dates for which satellite tiles cover a smaller part of the bounding box are
+            skipped. Float between 0.0 and 1.0. Default is ``None``.
+        :type min_coverage: float or None
+        :param bbox_maxcc: If set, dates for which cloud coverage of satellite tiles, averaged over the bounding box,
+            is higher are skipped. Float between 0.0 and 1.0. Default is ``None``.
+        :type bbox_maxcc: float or None
+        """
+        for param_name, value in [('min_coverage', min_coverage), ('bbox_maxcc', bbox_maxcc)]:
+            if value is not None and not 0 <= value <= 1:
+                raise ValueError('Parameter {} should be between 0 and 1, got {}'.format(param_name, value))
+
+        return super().__new__(cls, min_coverage, bbox_maxcc)
+
+
 class OgcRequest(DataRequest):
     """ The base class for OGC-type requests (WMS and WCS) where all common parameters are defined
     """
     def __init__(self, layer, bbox, *, time='latest', service_type=None, data_source=DataSource.SENTINEL2_L1C,
                  size_x=None, size_y=None, maxcc=1.0, image_format=MimeType.PNG, custom_url_params=None,
-                 time_difference=datetime.timedelta(seconds=-1), **kwargs):
+                 time_difference=datetime.timedelta(seconds=-1), wfs_iterator=None, date_filter=None, **kwargs):
         """
         :param layer: An ID of a layer configured in Sentinel Hub Configurator. It has to be configured for the same
             instance ID which will be used for this request. Also the satellite source of the layer in Configurator must
@@ -283,6 +354,12 @@ class OgcRequest(DataRequest):
             `dk-dj>time_difference` will be considered. The default time difference is negative (`-1s`), meaning
             that all dates are considered by default.
         :type time_difference: datetime.timedelta
+        :param wfs_iterator: Info about satellite tiles which was already obtained, e.g. with
+            `BatchWebFeatureService`. If given, WFS service is not queried again.
+        :type wfs_iterator: WebFeatureService or None
+        :param date_filter: If set, dates which would give mostly empty or clouded images of the bounding box are
+            skipped. Default is ``None``.
+        :type date_filter: DateFilter or None
         :param data_folder: location of the directory where the fetched data will be saved.
         :type data_folder: str
         :param config: A custom instance of config class to override parameters from the saved configuration.
@@ -303,7 +380,11 @@ class OgcRequest(DataRequest):
         if self.custom_url_params is not None:
             self._check_custom_url_parameters()
 
-        self.wfs_iterator = None
+        self.wfs_iterator = wfs_iterator
+        self.date_filter = date_filter
+
+        if self.date_filter is not None and not isinstance(self.date_filter, DateFilter):
+            raise ValueError('Parameter date_filter should be an instance of DateFilter, got {}'.format(date_filter))
 
         super().__init__(SentinelHubDownloadClient, **kwargs)
 
@@ -351,6 +432,38 @@ class OgcRequest(DataRequest):
         """
         return OgcImageService(config=self.config).get_dates(self)
 
+    def get_cube(self, *, save_data=False, redownload=False, max_threads=None, raise_download_errors=True,
+                 memmap_folder=None):
+        """ Get requested images as a single time series cube. The cube is allocated only once and each image is
+        decoded straight into its time slice, therefore images are never held in memory twice.
+
+        :param save_data: flag to turn on/off saving of data to disk. Default is `False`.
+        :type save_data: bool
+        :param redownload: if `True`, download again the requested data even though it's already saved to disk.
+        :type redownload: bool
+        :param max_threads: Maximum number of threads to be used for download in parallel.
+        :type max_threads: int or None
+        :param raise_download_errors: If `True` any error in download process should be raised as
+            ``DownloadFailedException``. If `False` failed downloads will only raise warnings and their time slices
+            will be filled with zeros.
+        :type raise_download_errors: bool
+        :param memmap_folder: If given, the cube is stored in a `.npy` file in this folder and returned as a
+            memory-mapped array.
+        :type memmap_folder: str or None
+        :return: A cube of shape ``[time, height, width, channels]`` and a list of dates of its time slices. If no image
+            is obtained, the cube is `None`.
+        :rtype: (numpy.ndarray or None, list(datetime.datetime))
+        """
+        client, download_list = self.prepare_download(save_data=save_data, redownload=redownload,
+                                                      raise_download_errors=raise_download_errors)
+
+        assembler = OutputAssembler((len(download_list),), len(download_list), self.layer,
+                                    memmap_folder=memmap_folder)
+        assembler.download([(client, request, index, (index,)) for index, request in enumerate(download_list)],
+                           max_threads=max_threads)
+
+        return assembler.get_result(), self.get_dates()
+
     def get_tiles(self):
         """ Returns iterator over info about all satellite tiles used for the OgcRequest
 
@@ -422,6 +535,12 @@ class WmsRequest(OgcRequest):
             `dk-dj>time_difference` will be considered. The default time difference is negative (`-1s`), meaning
             that all dates are considered by default.
         :type time_difference: datetime.timedelta
+        :param wfs_iterator: Info about satellite tiles which was already obtained, e.g. with
+            `BatchWebFeatureService`. If given, WFS service is not queried again.
+        :type wfs_iterator: WebFeatureService or None
+        :param date_filter: If set, dates which would give mostly empty or clouded images of the bounding box are
+            skipped. Default is ``None``.
+        :type date_filter: DateFilter or None
         :param data_folder: location of the directory where the fetched data will be saved.
         :type data_folder: str
         :param config: A custom instance of config class to override parameters from the saved configuration.
@@ -491,6 +610,12 @@ class WcsRequest(OgcRequest):
             `dk-dj>time_difference` will be considered. The default time difference is negative (`-1s`), meaning
             that all dates are considered by default.
         :type time_difference: datetime.timedelta
+        :param wfs_iterator: Info about satellite tiles which was already obtained, e.g. with
+            `BatchWebFeatureService`. If given, WFS service is not queried again.
+        :type wfs_iterator: WebFeatureService or None
+        :param date_filter: If set, dates which would give mostly empty or clouded images of the bounding box are
+            skipped. Default is ``None``.
+        :type date_filter: DateFilter or None
         :param data_folder: location of the directory where the fetched data will be saved.
         :type data_folder: str
         :param config: A custom instance of config class to override parameters from the saved configuration.
@@ -738,211 +863,3 @@ class GeopediaImageRequest(GeopediaRequest):
         :rtype: Iterator[dict] or None
         """
         return self.gpd_iterator
-
-
-class AwsRequest(DataRequest):
-    """ The base class for Amazon Web Service request classes. Common parameters are defined here.
-
-    Collects and provides data from AWS.
-
-    AWS database is available at:
-    http://sentinel-s2-l1c.s3-website.eu-central-1.amazonaws.com/
-    """
-    def __init__(self, *, bands=None, metafiles=None, safe_format=False, **kwargs):
-        """
-        :param bands: List of Sentinel-2 bands for request. If `None` all bands will be obtained
-        :type bands: list(str) or None
-        :param metafiles: list of additional metafiles available on AWS
-                          (e.g. ``['metadata', 'tileInfo', 'preview/B01', 'TCI']``)
-        :type metafiles: list(str)
-        :param safe_format: flag that determines the structure of saved data. If `True` it will be saved in .SAFE format
-                            defined by ESA. If `False` it will be saved in the same structure as the structure at AWS.
-        :type safe_format: bool
-        :param data_folder: location of the directory where the fetched data will be saved.
-        :type data_folder: str
-        :param config: A custom instance of config class to override parameters from the saved configuration.
-        :type config: SHConfig or None
-        """
-        self.bands = bands
-        self.metafiles = metafiles
-        self.safe_format = safe_format
-
-        self.aws_service = None
-        super().__init__(AwsDownloadClient, **kwargs)
-
-    @abstractmethod
-    def create_request(self):
-        raise NotImplementedError
-
-    def get_aws_service(self):
-        """
-        :return: initialized AWS service class
-        :rtype: aws.AwsProduct or aws.AwsTile or aws_safe.SafeProduct or aws_safe.SafeTile
-        """
-        return self.aws_service
-
-
-class AwsProductRequest(AwsRequest):
-    """ AWS Service request class for an ESA product
-
-    List of available products:
-    http://sentinel-s2-l1c.s3-website.eu-central-1.amazonaws.com/#products/
-    """
-    def __init__(self, product_id, *, tile_list=None, **kwargs):
-        """
-        :param product_id: original ESA product identification string
-            (e.g. ``'S2A_MSIL1C_20170414T003551_N0204_R016_T54HVH_20170414T003551'``)
-        :type product_id: str
-        :param tile_list: list of tiles inside the product to be downloaded. If parameter is set to `None` all
-            tiles inside the product will be downloaded.
-        :type tile_list: list(str) or None
-        :param bands: List of Sentinel-2 bands for request. If `None` all bands will be obtained
-        :type bands: list(str) or None
-        :param metafiles: list of additional metafiles available on AWS
-            (e.g. ``['metadata', 'tileInfo', 'preview/B01', 'TCI']``)
-        :type metafiles: list(str)
-        :param safe_format: flag that determines the structure of saved data. If `True` it will be saved in .SAFE format
-            defined by ESA. If `False` it will be saved in the same structure as the structure at AWS.
-        :type safe_format: bool
-        :param data_folder: location of the directory where the fetched data will be saved.
-        :type data_folder: str
-        :param config: A custom instance of config class to override parameters from the saved configuration.
-        :type config: SHConfig or None
-        """
-        self.product_id = product_id
-        self.tile_list = tile_list
-
-        super().__init__(**kwargs)
-
-    def create_request(self):
-        if self.safe_format:
-            self.aws_service = SafeProduct(self.product_id, tile_list=self.tile_list, bands=self.bands,
-                                           metafiles=self.metafiles, config=self.config)
-        else:
-            self.aws_service = AwsProduct(self.product_id, tile_list=self.tile_list, bands=self.bands,
-                                          metafiles=self.metafiles, config=self.config)
-
-        self.download_list, self.folder_list = self.aws_service.get_requests()
-
-
-class AwsTileRequest(AwsRequest):
-    """ AWS Service request class for an ESA tile
-
-    List of available products:
-    http://sentinel-s2-l1c.s3-website.eu-central-1.amazonaws.com/#tiles/
-    """
-    def __init__(self, *, tile=None, time=None, aws_index=None, data_source=DataSource.SENTINEL2_L1C, **kwargs):
-        """
-        :param tile: tile name (e.g. ``'T10UEV'``)
-        :type tile: str
-        :param time: tile sensing time in ISO8601 format
-        :type time: str
-        :param aws_index: there exist Sentinel-2 tiles with the same tile and time parameter. Therefore each tile on
-            AWS also has an index which is visible in their url path. If aws_index is set to `None` the class
-            will try to find the index automatically. If there will be multiple choices it will choose the
-            lowest index and inform the user.
-        :type aws_index: int or None
-        :param data_source: Source of requested AWS data. Supported sources are Sentinel-2 L1C and Sentinel-2 L2A,
-            default is Sentinel-2 L1C data.
-        :type data_source: constants.DataSource
-        :param bands: List of Sentinel-2 bands for request. If `None` all bands will be obtained
-        :type bands: list(str) or None
-        :param metafiles: list of additional metafiles available on AWS
-            (e.g. ``['metadata', 'tileInfo', 'preview/B01', 'TCI']``)
-        :type metafiles: list(str)
-        :param safe_format: flag that determines the structure of saved data. If `True` it will be saved in .SAFE
-            format defined by ESA. If `False` it will be saved in the same structure as the structure at AWS.
-        :type safe_format: bool
-        :param data_folder: location of the directory where the fetched data will be saved.
-        :type data_folder: str
-        :param config: A custom instance of config class to override parameters from the saved configuration.
-        :type config: SHConfig or None
-        """
-        self.tile = tile
-        self.time = time
-        self.aws_index = aws_index
-        self.data_source = data_source
-
-        super().__init__(**kwargs)
-
-    def create_request(self):
-        if self.safe_format:
-            self.aws_service = SafeTile(self.tile, self.time, self.aws_index, bands=self.bands,
-                                        metafiles=self.metafiles, data_source=self.data_source, config=self.config)
-        else:
-            self.aws_service = AwsTile(self.tile, self.time, self.aws_index, bands=self.bands,
-                                       metafiles=self.metafiles, data_source=self.data_source, config=self.config)
-
-        self.download_list, self.folder_list = self.aws_service.get_requests()
-
-
-def get_safe_format(product_id=None, tile=None, entire_product=False, bands=None, data_source=DataSource.SENTINEL2_L1C):
-    """ Returns .SAFE format structure in form of nested dictionaries. Either ``product_id`` or ``tile`` must be
-    specified.
-
-    :param product_id: original ESA product identification string. Default is `None`
-    :type product_id: str
-    :param tile: tuple containing tile name and sensing time/date. Default is `None`
-    :type tile: (str, str)
-    :param entire_product: in case tile is specified this flag determines if it will be place inside a .SAFE structure
-                           of the product. Default is `False`
-    :type entire_product: bool
-    :param bands: list of bands to download. If `None` all bands will be downloaded. Default is `None`
-    :type bands: list(str) or None
-    :param data_source: In case of tile request the source of satellite data has to be specified. Default is Sentinel-2
-                        L1C data.
-    :type data_source: constants.DataSource
-    :return: Nested dictionaries representing .SAFE structure.
-    :rtype: dict
-    """
-    entire_product = entire_product and product_id is None
-    if tile is not None:
-        safe_tile = SafeTile(tile_name=tile[0], time=tile[1], bands=bands, data_source=data_source)
-        if not entire_product:
-            return safe_tile.get_safe_struct()
-        product_id = safe_tile.get_product_id()
-    if product_id is None:
-        raise ValueError('Either product_id or tile must be specified')
-    safe_product = SafeProduct(product_id, tile_list=[tile[0]], bands=bands) if entire_product else \
-        SafeProduct(product_id, bands=bands)
-    return safe_product.get_safe_struct()
-
-
-def download_safe_format(product_id=None, tile=None, folder='.', redownload=False, entire_product=False, bands=None,
-                         data_source=DataSource.SENTINEL2_L1C):
-    """ Downloads .SAFE format structure in form of nested dictionaries. Either ``product_id`` or ``tile`` must
-    be specified.
-
-    :param product_id: original ESA product identification string. Default is `None`
-    :type product_id: str
-    :param tile: tuple containing tile name and sensing time/date. Default is `None`
-    :type tile: (str, str)
-    :param folder: location of the directory where the fetched data will be saved. Default is ``'.'``
-    :type folder: str
-    :param redownload: if `True`, download again the requested data even though it's already saved to disk. If
-                       `False`, do not download if data is already available on disk. Default is `False`
-    :type redownload: bool
-    :param entire_product: in case tile is specified this flag determines if it will be place inside a .SAFE structure
-                           of the product. Default is `False`
-    :type entire_product: bool
-    :param bands: list of bands to download. If `None` all bands will be downloaded. Default is `None`
-    :type bands: list(str) or None
-    :param data_source: In case of tile request the source of satellite data has to be specified. Default is Sentinel-2
-                        L1C data.
-    :type data_source: constants.DataSource
-    :return: Nested dictionaries representing .SAFE structure.
-    :rtype: dict
-    """
-    entire_product = entire_product and product_id is None
-    if tile is not None:
-        safe_request = AwsTileRequest(tile=tile[0], time=tile[1], data_folder=folder, bands=bands,
-                                      safe_format=True, data_source=data_source)
-        if entire_product:
-            safe_tile = safe_request.get_aws_service()
-            product_id = safe_tile.get_product_id()
-    if product_id is not None:
-        safe_request = AwsProductRequest(product_id, tile_list=[tile[0]], data_folder=folder, bands=bands,
-                                         safe_format=True) if entire_product else \
-            AwsProductRequest(product_id, data_folder=folder, bands=bands, safe_format=True)
-
-    safe_request.save_data(redownload=redownload)
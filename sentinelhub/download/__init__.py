@@ -6,3 +6,5 @@ from .request import DownloadRequest
 from .client import DownloadClient, get_json, get_xml
 from .sentinelhub_client import SentinelHubDownloadClient
 from .aws_client import AwsDownloadClient
+from .service import DownloadService
+from .assembler import OutputAssembler
@@ -0,0 +1,117 @@
+"""
+Module implementing assembly of decoded outputs of many download requests into preallocated arrays
+"""
+import os
+from threading import Lock
+
+import numpy as np
+
+from ..os_utils import make_folder
+from .handlers import collect_download_results
+
+
+class OutputAssembler:
+    """ Writes decoded outputs of many download requests into outputs which are allocated only once
+
+    Each download request is written into a window of the assembled output, e.g. a time index of a time series cube or
+    a pixel window of a tiled image. Image outputs are allocated when the first of them is decoded, because their data
+    type and number of channels are not known in advance. Outputs which are not images, e.g. `userdata.json` of a TAR
+    response, are collected into lists with one item per download request.
+    """
+    def __init__(self, output_shape, item_count, default_name, *, memmap_folder=None):
+        """
+        :param output_shape: The leading part of the shape of assembled images, which is covered by windows. The rest
+            of the shape is taken from the shape of decoded images.
+        :type output_shape: tuple(int)
+        :param item_count: Number of download requests which will be assembled
+        :type item_count: int
+        :param default_name: A name of the output if responses are not TAR files. It is used to name memmap files.
+        :type default_name: str
+        :param memmap_folder: If given, images are assembled in memory-mapped `.npy` files in this folder
+        :type memmap_folder: str or None
+        """
+        self.output_shape = tuple(output_shape)
+        self.item_count = item_count
+        self.default_name = default_name
+        self.memmap_folder = memmap_folder
+
+        self.outputs = {}
+        self.lock = Lock()
+
+        if memmap_folder is not None:
+            make_folder(memmap_folder)
+
+    def download(self, jobs, max_threads=None):
+        """ Downloads requests in parallel and writes each decoded response into its window as soon as it is obtained
+
+        :param jobs: A list of tuples `(download_client, download_request, item_index, window)`
+        :type jobs: list(tuple)
+        :param max_threads: Maximum number of requests which are downloaded in parallel
+        :type max_threads: int or None
+        """
+        if not jobs:
+            return
+
+        futures = jobs[0][0].service.scheduler.submit_batch(
+            self._download_item,
+            jobs,
+            priorities=[request.priority for _, request, _, _ in jobs],
+            max_concurrency=max_threads
+        )
+
+        collect_download_results(futures, [client.raise_download_errors for client, _, _, _ in jobs])
+
+    def add(self, item_index, window, data):
+        """ Adds decoded data of a single download request, which is either an output of a single response or a
+        dictionary of multiple outputs obtained from a TAR response
+
+        :param item_index: An index of the download request
+        :type item_index: int
+        :param window: An index of the assembled output where the data will be written
+        :type window: tuple(int or slice)
+        :param data: Decoded data
+        :type data: object
+        """
+        items = data.items() if isinstance(data, dict) else [(None, data)]
+
+        for name, value in items:
+            if isinstance(value, np.ndarray):
+                self._get_array(name, window, value)[window] = value
+            else:
+                with self.lock:
+                    self.outputs.setdefault(name, [None] * self.item_count)[item_index] = value
+
+    def get_result(self):
+        """ Provides the assembled output, which has the same structure as the output of a single download request. If
+        none of the requests was successful it returns `None`.
+
+        :return: An assembled array or a dictionary of assembled outputs
+        :rtype: numpy.ndarray or dict or list or None
+        """
+        if not self.outputs or list(self.outputs) == [None]:
+            return self.outputs.get(None)
+        return self.outputs
+
+    def _download_item(self, client, request, item_index, window):
+        """ Downloads a single request and writes its decoded data into the assembled output
+        """
+        # pylint: disable=protected-access
+        data = client._single_download(request, True)
+        self.add(item_index, window, data)
+
+    def _get_array(self, name, window, array):
+        """ Provides an output array, which is allocated if it doesn't exist yet
+        """
+        with self.lock:
+            if name not in self.outputs:
+                window_dims = sum(isinstance(index, slice) for index in window)
+                shape = self.output_shape + array.shape[window_dims:]
+
+                if self.memmap_folder is None:
+                    self.outputs[name] = np.zeros(shape, dtype=array.dtype)
+                else:
+                    base_name = os.path.splitext(name)[0] if name else self.default_name
+                    filename = os.path.join(self.memmap_folder, '{}.npy'.format(base_name))
+                    self.outputs[name] = np.lib.format.open_memmap(filename, mode='w+', dtype=array.dtype,
+                                                                   shape=shape)
+            return self.outputs[name]
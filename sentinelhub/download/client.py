@@ -1,21 +1,16 @@
 """
 Module implementing the main download client class
 """
-import concurrent.futures
 import logging
-import warnings
 import os
-import sys
-
-import requests
 
 from ..config import SHConfig
 from ..constants import RequestType, MimeType
 from ..decoding import decode_data as decode_data_function
-from ..exceptions import DownloadFailedException, SHRuntimeWarning
 from ..io_utils import read_data, write_data
-from .handlers import fail_user_errors, retry_temporal_errors
+from .handlers import fail_user_errors, retry_temporal_errors, collect_download_results
 from .request import DownloadRequest
+from .service import DownloadService
 
 
 LOGGER = logging.getLogger(__name__)
@@ -25,12 +20,13 @@ class DownloadClient:
     """ A basic download client object
 
     It does the following:
-      - downloads the data with multiple threads in parallel,
+      - downloads the data with multiple threads in parallel, using a download service shared by all clients in the
+        process, which starts requests with higher priority first and reuses open connections,
       - handles any exceptions that occur during download,
       - decodes downloaded data,
       - reads and writes locally stored/cached data
     """
-    def __init__(self, *, redownload=False, raise_download_errors=True, config=None):
+    def __init__(self, *, redownload=False, raise_download_errors=True, config=None, service=None):
         """
         :param redownload: If `True` the data will always be downloaded again. By default this is set to `False` and
             the data that has already been downloaded and saved to an expected location will be read from the
@@ -41,11 +37,15 @@ class DownloadClient:
         :type raise_download_errors: bool
         :param config: An instance of configuration class
         :type config: SHConfig
+        :param service: A download service which executes the downloads. By default a service shared by the entire
+            process is used.
+        :type service: DownloadService or None
         """
         self.redownload = redownload
         self.raise_download_errors = raise_download_errors
 
         self.config = config or SHConfig()
+        self.service = service or DownloadService.get_instance()
 
     def download(self, download_requests, max_threads=None, decode_data=True):
         """ Download one or multiple requests, provided as a request list.
@@ -53,7 +53,8 @@ class DownloadClient:
         :param download_requests: A list of requests or a single request to be executed.
         :type download_requests: List[DownloadRequest] or DownloadRequest
         :param max_threads: Maximum number of threads to be used for download in parallel. The default is
-            `max_threads=None` which will use the number of processors on the system multiplied by 5.
+            `max_threads=None` which will use all workers of the shared pool, i.e. the number of processors on the
+            system multiplied by 5.
         :type max_threads: int or None
         :param decode_data: If `True` it will decode data otherwise it will return it in binary format.
         :type decode_data: bool
@@ -64,22 +65,14 @@ class DownloadClient:
         if is_single_request:
             download_requests = [download_requests]
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_threads) as executor:
-            download_list = [
-                executor.submit(self._single_download, request, decode_data) for request in download_requests
-            ]
-
-        data_list = []
-        for future in download_list:
-            try:
-                data_list.append(future.result())
-            except DownloadFailedException as download_exception:
-                if self.raise_download_errors:
-                    traceback = sys.exc_info()[2]
-                    raise download_exception.with_traceback(traceback)
+        download_list = self.service.scheduler.submit_batch(
+            self._single_download,
+            [(request, decode_data) for request in download_requests],
+            priorities=[request.priority for request in download_requests],
+            max_concurrency=max_threads
+        )
 
-                warnings.warn(str(download_exception), category=SHRuntimeWarning)
-                data_list.append(None)
+        data_list = collect_download_results(download_list, [self.raise_download_errors] * len(download_list))
 
         if is_single_request:
             return data_list[0]
@@ -119,7 +112,7 @@ class DownloadClient:
     def _execute_download(self, request):
         """ A default way of executing a single download request
         """
-        response = requests.request(
+        response = self.service.http_session.request(
             request.request_type.value,
             url=request.url,
             json=request.post_values,
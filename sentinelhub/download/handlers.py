@@ -3,11 +3,12 @@ Module implementing error handlers which can occur during download procedure
 """
 import logging
 import time
+import warnings
 
 import requests
 
 from ..decoding import decode_sentinelhub_err_msg
-from ..exceptions import DownloadFailedException
+from ..exceptions import DownloadFailedException, SHRuntimeWarning
 
 
 LOGGER = logging.getLogger(__name__)
@@ -76,6 +77,35 @@ def fail_missing_file(download_func):
     return new_download_func
 
 
+def collect_download_results(futures, raise_download_errors):
+    """ Waits for futures of download jobs and collects their results in the same order. If a download fails and its
+    errors should be raised, all remaining jobs are cancelled and the exception is raised. Otherwise the failure is
+    only reported with a warning and `None` is collected in place of the result.
+
+    :param futures: Future objects of download jobs
+    :type futures: list(concurrent.futures.Future)
+    :param raise_download_errors: For each future a flag whether a failed download should raise an exception
+    :type raise_download_errors: list(bool)
+    :return: A list of results
+    :rtype: list(object)
+    :raises: DownloadFailedException
+    """
+    results = []
+    for future, raise_errors in zip(futures, raise_download_errors):
+        try:
+            results.append(future.result())
+        except DownloadFailedException as download_exception:
+            if raise_errors:
+                for remaining_future in futures:
+                    remaining_future.cancel()
+                raise
+
+            warnings.warn(str(download_exception), category=SHRuntimeWarning)
+            results.append(None)
+
+    return results
+
+
 def _is_temporal_problem(exception):
     """ Checks if the obtained exception is temporal and if download attempt should be repeated
 
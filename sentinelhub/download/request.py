@@ -20,7 +20,7 @@ class DownloadRequest:
     """
     def __init__(self, *, url=None, headers=None, request_type=RequestType.GET, post_values=None, use_session=False,
                  data_type=MimeType.RAW, save_response=False, data_folder=None, filename=None, return_data=True,
-                 **properties):
+                 priority=0, **properties):
         """
         :param url: An URL from where to download
         :type url: str or None
@@ -44,6 +44,10 @@ class DownloadRequest:
         :param return_data: A flag defining if the downloaded data will be returned as an output of download procedure.
             Default is `True`.
         :type return_data: bool
+        :param priority: Priority of the request. Requests with a higher priority will be downloaded before requests
+            with a lower priority, even if they were submitted later by another download client in the same process.
+            Default is `0`.
+        :type priority: int or float
         :param properties: Any additional parameters.
         """
         self.url = url
@@ -58,6 +62,7 @@ class DownloadRequest:
         self.data_folder = data_folder
         self.filename = filename
         self.return_data = return_data
+        self.priority = priority
 
         self.properties = properties
 
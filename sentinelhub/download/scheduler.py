@@ -0,0 +1,206 @@
+"""
+Module implementing a priority-aware pool of download workers
+"""
+import collections
+import heapq
+import itertools
+import logging
+import os
+import time
+from concurrent.futures import Future
+from threading import Condition, Lock, Semaphore, Thread, local
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class DownloadScheduler:
+    """ A pool of worker threads which execute jobs in the order of their priority
+
+    Jobs with a higher priority are started first. To prevent starvation of low-priority jobs, each job gains priority
+    while it waits in the queue - after waiting `1 / aging_rate` seconds its priority increases by 1. Jobs with the
+    same effective priority are started in the order in which they were submitted.
+
+    Each `DownloadService` owns a scheduler. Because download clients share a service, concurrent downloads of
+    multiple data requests draw from the same pool of workers.
+    """
+
+    def __init__(self, max_workers=None, aging_rate=0.1):
+        """
+        :param max_workers: Maximum number of worker threads. The default is the number of processors on the system
+            multiplied by 5.
+        :type max_workers: int or None
+        :param aging_rate: By how much the priority of a waiting job increases each second
+        :type aging_rate: float
+        """
+        if max_workers is not None and max_workers <= 0:
+            raise ValueError('Parameter max_workers should be a positive integer')
+
+        self.max_workers = max_workers or (os.cpu_count() or 1) * 5
+        self.aging_rate = aging_rate
+
+        self._queue = []
+        self._counter = itertools.count()
+        self._condition = Condition()
+        self._workers = []
+        self._idle_semaphore = Semaphore(0)
+        self._is_shutdown = False
+        self._thread_context = local()
+
+    def submit(self, function, *args, priority=0, **kwargs):
+        """ Schedules a single job. If it is called from one of the worker threads the job is executed immediately,
+        which prevents deadlocks of nested downloads.
+
+        :param function: A function to be executed
+        :type function: callable
+        :param args: Positional arguments of the function
+        :param priority: Priority of the job, jobs with higher priority are executed first
+        :type priority: int or float
+        :param kwargs: Keyword arguments of the function
+        :return: A future object holding the result of the job
+        :rtype: concurrent.futures.Future
+        """
+        future = Future()
+        if self._is_worker_thread():
+            self._run_job(future, function, args, kwargs)
+        else:
+            self._put(future, function, args, kwargs, priority, time.monotonic())
+        return future
+
+    def submit_batch(self, function, args_list, priorities=None, max_concurrency=None):
+        """ Schedules a batch of jobs. At most `max_concurrency` of them will be executed at the same time, the rest of
+        the workers remain available to other jobs.
+
+        :param function: A function to be executed for each job
+        :type function: callable
+        :param args_list: A list of tuples of positional arguments, one for each job
+        :type args_list: list(tuple)
+        :param priorities: A list of priorities, one for each job. By default all jobs have priority 0.
+        :type priorities: list(int or float) or None
+        :param max_concurrency: Maximum number of jobs from this batch which can run at the same time. By default there
+            is no limit.
+        :type max_concurrency: int or None
+        :return: A list of future objects in the same order as given arguments
+        :rtype: list(concurrent.futures.Future)
+        """
+        if priorities is None:
+            priorities = [0] * len(args_list)
+        if len(priorities) != len(args_list):
+            raise ValueError('Number of priorities should match the number of jobs')
+
+        if self._is_shutdown:
+            raise RuntimeError('Cannot schedule new jobs after the scheduler has been shut down')
+
+        jobs = [(Future(), args, priority) for args, priority in zip(args_list, priorities)]
+        if self._is_worker_thread():
+            for future, args, _ in jobs:
+                self._run_job(future, function, args, {})
+            return [future for future, _, _ in jobs]
+
+        submit_time = time.monotonic()
+        pending_jobs = collections.deque(jobs)
+        pending_lock = Lock()
+
+        def submit_next(_=None):
+            with pending_lock:
+                while pending_jobs:
+                    future, args, priority = pending_jobs.popleft()
+                    if not future.cancelled():
+                        break
+                else:
+                    return
+
+            try:
+                self._put(future, function, args, {}, priority, submit_time)
+            except RuntimeError as exception:
+                # The scheduler was shut down while the batch was running. Because this is usually called from a done
+                # callback, which swallows exceptions, the remaining jobs are failed instead of left pending forever.
+                with pending_lock:
+                    remaining_futures = [future] + [pending_future for pending_future, _, _ in pending_jobs]
+                    pending_jobs.clear()
+                for remaining_future in remaining_futures:
+                    if not remaining_future.cancelled():
+                        remaining_future.set_exception(exception)
+                return
+
+            future.add_done_callback(submit_next)
+
+        for _ in range(min(max_concurrency or len(jobs), len(jobs))):
+            submit_next()
+
+        return [future for future, _, _ in jobs]
+
+    def shutdown(self, wait=True):
+        """ Stops the workers after all already scheduled jobs are finished
+
+        :param wait: If `True` it will wait for workers to finish
+        :type wait: bool
+        """
+        with self._condition:
+            self._is_shutdown = True
+            self._condition.notify_all()
+
+        if wait:
+            for worker in list(self._workers):
+                worker.join()
+
+    def is_shutdown(self):
+        """ Checks if scheduler has been shut down
+
+        :return: `True` if the scheduler no longer accepts jobs and `False` otherwise
+        :rtype: bool
+        """
+        return self._is_shutdown
+
+    def _put(self, future, function, args, kwargs, priority, submit_time):
+        """ Puts a job into the queue and makes sure there is a worker to execute it
+        """
+        sort_key = self.aging_rate * submit_time - priority
+
+        with self._condition:
+            if self._is_shutdown:
+                raise RuntimeError('Cannot schedule new jobs after the scheduler has been shut down')
+
+            heapq.heappush(self._queue, (sort_key, next(self._counter), future, function, args, kwargs))
+            self._condition.notify()
+
+            if not self._idle_semaphore.acquire(timeout=0) and len(self._workers) < self.max_workers:
+                worker = Thread(target=self._work, name='DownloadWorker-{}'.format(len(self._workers)), daemon=True)
+                self._workers.append(worker)
+                worker.start()
+
+    def _work(self):
+        """ The main loop of each worker thread
+        """
+        self._thread_context.is_worker = True
+
+        while True:
+            with self._condition:
+                while not self._queue and not self._is_shutdown:
+                    self._condition.wait()
+
+                if not self._queue:
+                    return
+                _, _, future, function, args, kwargs = heapq.heappop(self._queue)
+
+            self._run_job(future, function, args, kwargs)
+            self._idle_semaphore.release()
+
+    @staticmethod
+    def _run_job(future, function, args, kwargs):
+        """ Executes a single job and stores the result into the future object
+        """
+        if not future.set_running_or_notify_cancel():
+            return
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as exception:  # pylint: disable=broad-except
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def _is_worker_thread(self):
+        """ Checks if the current thread is one of the workers of this scheduler
+        """
+        return getattr(self._thread_context, 'is_worker', False)
@@ -10,7 +10,6 @@ import requests
 from .handlers import fail_user_errors, retry_temporal_errors
 from .client import DownloadClient
 from ..sentinelhub_session import SentinelHubSession
-from ..sentinelhub_rate_limit import SentinelHubRateLimit
 
 
 LOGGER = logging.getLogger(__name__)
@@ -18,13 +17,16 @@ LOGGER = logging.getLogger(__name__)
 
 class SentinelHubDownloadClient(DownloadClient):
     """ Download client specifically configured for download from Sentinel Hub service
-    """
-    _CACHED_SESSIONS = {}
 
-    def __init__(self, *, session=None, **kwargs):
+    All clients of the same download service which use the same credentials share the same session and rate limit
+    object. Therefore concurrent downloads of multiple clients together respect the rate limits of the account.
+    """
+    def __init__(self, *, session=None, cost_estimator=None, **kwargs):
         """
         :param session: An OAuth2 session with Sentinel Hub service
         :type session: SentinelHubSession or None
+        :param cost_estimator: If given, the estimator will be calibrated with processing units reported in responses
+        :type cost_estimator: ProcessingCostEstimator or None
         :param kwargs: Optional parameters from DownloadClient
         """
         super().__init__(**kwargs)
@@ -33,8 +35,9 @@ class SentinelHubDownloadClient(DownloadClient):
             raise ValueError(f'A session parameter has to be an instance of {SentinelHubSession.__name__} or None, but '
                              f'{session} was given')
         self.session = session
+        self.cost_estimator = cost_estimator
 
-        self.rate_limit = SentinelHubRateLimit(num_processes=self.config.number_of_download_processes)
+        self.rate_limit = self.service.get_rate_limit(self.config)
         self.lock = Lock()
 
     @retry_temporal_errors
@@ -45,35 +48,40 @@ class SentinelHubDownloadClient(DownloadClient):
         thread_name = currentThread().getName()
 
         while True:
-            sleep_time = self._execute_with_lock(self.rate_limit.register_next)
+            sleep_time = self._execute_with_lock(self.rate_limit.register_next, lock=self.service.rate_limit_lock)
 
             if sleep_time == 0:
                 response = self._do_download(request)
 
-                self._execute_with_lock(self.rate_limit.update, response.headers)
+                self._execute_with_lock(self.rate_limit.update, response.headers, lock=self.service.rate_limit_lock)
 
                 if response.status_code != requests.status_codes.codes.TOO_MANY_REQUESTS:
                     response.raise_for_status()
 
+                    if self.cost_estimator is not None:
+                        self.cost_estimator.calibrate(request, response.headers)
+
                     LOGGER.debug('%s: Successful download from %s', thread_name, request.url)
                     return response.content
             else:
                 LOGGER.debug('%s: Sleeping for %0.2f', thread_name, sleep_time)
                 time.sleep(sleep_time)
 
-    def _execute_with_lock(self, thread_unsafe_function, *args, **kwargs):
-        """ Executes a function inside a thread lock and handles potential errors
+    def _execute_with_lock(self, thread_unsafe_function, *args, lock=None, **kwargs):
+        """ Executes a function inside a thread lock and handles potential errors. By default it uses the lock of the
+        client instance.
         """
-        self.lock.acquire()
+        lock = lock or self.lock
+        lock.acquire()
         try:
             return thread_unsafe_function(*args, **kwargs)
         finally:
-            self.lock.release()
+            lock.release()
 
     def _do_download(self, request):
         """ Runs the download
         """
-        return requests.request(
+        return self.service.http_session.request(
             request.request_type.value,
             url=request.url,
             json=request.post_values,
@@ -88,20 +96,9 @@ class SentinelHubDownloadClient(DownloadClient):
             return request.headers
 
         if self.session is None:
-            self.session = self._execute_with_lock(self._get_session)
+            self.session = self.service.get_session(self.config)
 
         return {
             **self.session.session_headers,
             **request.headers
         }
-
-    def _get_session(self):
-        """ Provides a session object either from cache or it creates a new one
-        """
-        cache_key = self.config.sh_client_id, self.config.sh_client_secret, self.config.get_sh_oauth_url()
-        if cache_key in SentinelHubDownloadClient._CACHED_SESSIONS:
-            return SentinelHubDownloadClient._CACHED_SESSIONS[cache_key]
-
-        session = SentinelHubSession(config=self.config)
-        SentinelHubDownloadClient._CACHED_SESSIONS[cache_key] = session
-        return session
@@ -0,0 +1,200 @@
+"""
+Module implementing a long-lived download service which is shared by all download clients in a process
+"""
+import logging
+import os
+from http.cookiejar import DefaultCookiePolicy
+from threading import Lock, local
+
+import requests
+
+from ..sentinelhub_rate_limit import SentinelHubRateLimit
+from ..sentinelhub_session import SentinelHubSession
+from .handlers import collect_download_results
+from .scheduler import DownloadScheduler
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class DownloadService:
+    """ A process-level service which owns resources that are expensive to create and should be reused by many
+    downloads:
+
+      - a pool of download workers, which executes download requests in the order of their priority,
+      - a pool of HTTP connections, which is used by a separate HTTP session in each thread,
+      - rate limit objects for Sentinel Hub service, one for each set of credentials,
+      - authentication sessions with Sentinel Hub service, one for each set of credentials.
+
+    By default all download clients use the instance obtained with `DownloadService.get_instance`.
+    """
+    _INSTANCE = None
+    _INSTANCE_LOCK = Lock()
+
+    def __init__(self, max_workers=None):
+        """
+        :param max_workers: Maximum number of download worker threads. The default is the number of processors on
+            the system multiplied by 5.
+        :type max_workers: int or None
+        """
+        self.scheduler = DownloadScheduler(max_workers=max_workers)
+        self.http_adapter = requests.adapters.HTTPAdapter(pool_connections=self.scheduler.max_workers,
+                                                          pool_maxsize=self.scheduler.max_workers)
+        self.rate_limit_lock = Lock()
+
+        self._thread_context = local()
+
+        self._rate_limits = {}
+        self._sessions = {}
+        self._cache_lock = Lock()
+        self.process_id = os.getpid()
+
+    @classmethod
+    def get_instance(cls):
+        """ Provides a service instance which is shared within the process. Because worker threads and open
+        connections do not survive forking, a child process gets its own instance.
+
+        :return: A shared download service
+        :rtype: DownloadService
+        """
+        with cls._INSTANCE_LOCK:
+            if cls._INSTANCE is None or cls._INSTANCE.scheduler.is_shutdown() or \
+                    cls._INSTANCE.process_id != os.getpid():
+                cls._INSTANCE = cls()
+            return cls._INSTANCE
+
+    @property
+    def http_session(self):
+        """ Provides an HTTP session of the current thread. Because `requests.Session` is not thread-safe, each thread
+        has its own session, however all sessions share the same pool of connections. Sessions don't store cookies,
+        so that responses to one download client can't affect requests of another one.
+
+        :return: An HTTP session
+        :rtype: requests.Session
+        """
+        try:
+            return self._thread_context.http_session
+        except AttributeError:
+            http_session = requests.Session()
+            http_session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            http_session.mount('http://', self.http_adapter)
+            http_session.mount('https://', self.http_adapter)
+            self._thread_context.http_session = http_session
+            return http_session
+
+    def get_rate_limit(self, config):
+        """ Provides a rate limit object for Sentinel Hub service. All downloads with the same credentials share the
+        same object. Its methods should only be called while holding `rate_limit_lock`.
+
+        :param config: An instance of package configuration class
+        :type config: SHConfig
+        :return: A rate limit object
+        :rtype: SentinelHubRateLimit
+        """
+        cache_key = config.sh_client_id, config.instance_id, config.sh_base_url
+        with self._cache_lock:
+            if cache_key not in self._rate_limits:
+                self._rate_limits[cache_key] = SentinelHubRateLimit(num_processes=config.number_of_download_processes)
+            return self._rate_limits[cache_key]
+
+    def get_session(self, config):
+        """ Provides an authentication session with Sentinel Hub service. All downloads with the same credentials share
+        the same session.
+
+        :param config: An instance of package configuration class
+        :type config: SHConfig
+        :return: A session object
+        :rtype: SentinelHubSession
+        """
+        cache_key = config.sh_client_id, config.sh_client_secret, config.get_sh_oauth_url()
+        with self._cache_lock:
+            if cache_key not in self._sessions:
+                self._sessions[cache_key] = SentinelHubSession(config=config, refresh_in_background=True)
+            return self._sessions[cache_key]
+
+    def gather(self, data_requests, *, save_data=False, redownload=False, max_threads=None, decode_data=True,
+               raise_download_errors=True):
+        """ Downloads data of multiple data requests together in a single batch. All their download requests are
+        submitted to the worker pool at once and are executed in the order of their priority.
+
+        Data of requests which have to assemble it themselves, e.g. a tiled `SentinelHubRequest`, is obtained with their
+        `get_data` method while the rest of the batch is being downloaded. Their downloads use the default service.
+
+        :param data_requests: A list of data requests, e.g. `WmsRequest` or `SentinelHubRequest` objects
+        :type data_requests: list(DataRequest)
+        :param save_data: Flag to turn on/off saving of data to disk. Default is `False`.
+        :type save_data: bool
+        :param redownload: If `True`, download again the requested data even though it's already saved to disk.
+        :type redownload: bool
+        :param max_threads: Maximum number of requests of this batch which are downloaded in parallel. By default all
+            workers of the service can be used.
+        :type max_threads: int or None
+        :param decode_data: If `True` (default) it decodes data, otherwise it returns binary data.
+        :type decode_data: bool
+        :param raise_download_errors: If `True` any error in download process is raised as
+            ``DownloadFailedException``. If `False` failed downloads only raise warnings and `None` values are returned
+            in place of their data.
+        :type raise_download_errors: bool
+        :return: A list of data lists, one for each data request
+        :rtype: list(list)
+        """
+        batches = [
+            (None, []) if data_request.requires_assembly(decode_data) else
+            data_request.prepare_download(save_data=save_data, redownload=redownload,
+                                          raise_download_errors=raise_download_errors, download_service=self)
+            for data_request in data_requests
+        ]
+
+        jobs = [(client, request) for client, download_list in batches for request in download_list]
+        futures = self.scheduler.submit_batch(
+            _download_single,
+            [(client, request, decode_data) for client, request in jobs],
+            priorities=[request.priority for _, request in jobs],
+            max_concurrency=max_threads
+        )
+
+        results = [[] for _ in data_requests]
+        try:
+            for batch_index, data_request in enumerate(data_requests):
+                if data_request.requires_assembly(decode_data):
+                    results[batch_index] = data_request.get_data(save_data=save_data, redownload=redownload,
+                                                                 max_threads=max_threads, decode_data=decode_data,
+                                                                 raise_download_errors=raise_download_errors)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+        job_results = collect_download_results(futures, [client.raise_download_errors for client, _ in jobs])
+        for batch_index, result in zip(_get_batch_indices(batches), job_results):
+            results[batch_index].append(result)
+
+        return results
+
+    def shutdown(self, wait=True):
+        """ Stops the workers and closes all connections. Afterwards `DownloadService.get_instance` will create a new
+        service.
+
+        :param wait: If `True` it will wait for already scheduled downloads to finish
+        :type wait: bool
+        """
+        self.scheduler.shutdown(wait=wait)
+        self.http_adapter.close()
+
+        for session in self._sessions.values():
+            session.stop_background_refresh()
+
+
+def _download_single(client, request, decode_data):
+    """ Downloads a single request with a given client
+    """
+    # pylint: disable=protected-access
+    return client._single_download(request, decode_data)
+
+
+def _get_batch_indices(batches):
+    """ For each download request in the given batches yields an index of the batch it belongs to
+    """
+    for batch_index, (_, download_list) in enumerate(batches):
+        for _ in download_list:
+            yield batch_index
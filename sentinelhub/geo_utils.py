@@ -3,6 +3,8 @@ Module for manipulation of geographical information
 """
 import logging
 
+import numpy as np
+
 from .constants import CRS
 
 
@@ -107,33 +109,46 @@ def get_utm_bbox(img_bbox, transform):
 
 
 def wgs84_to_utm(lng, lat, utm_crs=None):
-    """ Convert WGS84 coordinates to UTM. If UTM CRS is not set it will be calculated automatically.
+    """ Convert WGS84 coordinates to UTM. If UTM CRS is not set it will be calculated automatically. In case of arrays
+    each point is converted into its own UTM zone, where points of the same zone are transformed together.
 
     :param lng: longitude in WGS84 system
-    :type lng: float
+    :type lng: float or numpy.ndarray
     :param lat: latitude in WGS84 system
-    :type lat: float
+    :type lat: float or numpy.ndarray
     :param utm_crs: UTM coordinate reference system enum constants
     :type utm_crs: constants.CRS or None
     :return: east, north coordinates in UTM system
-    :rtype: float, float
+    :rtype: float, float or numpy.ndarray, numpy.ndarray
     """
-    if utm_crs is None:
-        utm_crs = get_utm_crs(lng, lat)
-    return transform_point((lng, lat), CRS.WGS84, utm_crs)
+    if utm_crs is not None:
+        return transform_point((lng, lat), CRS.WGS84, utm_crs)
+
+    if np.ndim(lng) == 0 and np.ndim(lat) == 0:
+        return transform_point((lng, lat), CRS.WGS84, get_utm_crs(lng, lat))
+
+    lng, lat = np.broadcast_arrays(np.asarray(lng, dtype=np.float64), np.asarray(lat, dtype=np.float64))
+    east, north = np.empty(lng.shape), np.empty(lng.shape)
+
+    for zone_crs, indices in group_by_utm_crs(lng, lat).items():
+        zone_indices = np.unravel_index(indices, lng.shape)
+        east[zone_indices], north[zone_indices] = transform_point((lng[zone_indices], lat[zone_indices]), CRS.WGS84,
+                                                                  zone_crs)
+
+    return east, north
 
 
 def to_wgs84(east, north, crs):
     """ Convert any CRS with (east, north) coordinates to WGS84
 
     :param east: east coordinate
-    :type east: float
+    :type east: float or numpy.ndarray
     :param north: north coordinate
-    :type north: float
+    :type north: float or numpy.ndarray
     :param crs: CRS enum constants
     :type crs: constants.CRS
     :return: latitude and longitude coordinates in WGS84 system
-    :rtype: float, float
+    :rtype: float, float or numpy.ndarray, numpy.ndarray
     """
     return transform_point((east, north), crs, CRS.WGS84)
 
@@ -142,30 +157,38 @@ def utm_to_pixel(east, north, transform, truncate=True):
     """ Convert UTM coordinate to image coordinate given a transform
 
     :param east: east coordinate of point
-    :type east: float
+    :type east: float or numpy.ndarray
     :param north: north coordinate of point
-    :type north: float
+    :type north: float or numpy.ndarray
     :param transform: georeferencing transform of the image, e.g. `(x_upper_left, res_x, 0, y_upper_left, 0, -res_y)`
     :type transform: tuple or list
     :param truncate: Whether to truncate pixel coordinates. Default is `True`
     :type truncate: bool
     :return: row and column pixel image coordinates
-    :rtype: float, float or int, int
+    :rtype: float, float or int, int or numpy.ndarray, numpy.ndarray
     """
     column = (east - transform[0]) / transform[1]
     row = (north - transform[3]) / transform[5]
     if truncate:
-        return int(row + ERR), int(column + ERR)
+        return _truncate(row + ERR), _truncate(column + ERR)
     return row, column
 
 
+def _truncate(value):
+    """ Truncates a number or an array of numbers towards zero
+    """
+    if isinstance(value, np.ndarray):
+        return np.trunc(value).astype(int)
+    return int(value)
+
+
 def pixel_to_utm(row, column, transform):
     """ Convert pixel coordinate to UTM coordinate given a transform
 
     :param row: row pixel coordinate
-    :type row: int or float
+    :type row: int or float or numpy.ndarray
     :param column: column pixel coordinate
-    :type column: int or float
+    :type column: int or float or numpy.ndarray
     :param transform: georeferencing transform of the image, e.g. `(x_upper_left, res_x, 0, y_upper_left, 0, -res_y)`
     :type transform: tuple or list
     :return: east, north UTM coordinates
@@ -181,9 +204,9 @@ def wgs84_to_pixel(lng, lat, transform, utm_epsg=None, truncate=True):
     calculated it automatically.
 
     :param lng: longitude of point
-    :type lng: float
+    :type lng: float or numpy.ndarray
     :param lat: latitude of point
-    :type lat: float
+    :type lat: float or numpy.ndarray
     :param transform: georeferencing transform of the image, e.g. `(x_upper_left, res_x, 0, y_upper_left, 0, -res_y)`
     :type transform: tuple or list
     :param utm_epsg: UTM coordinate reference system enum constants
@@ -191,7 +214,7 @@ def wgs84_to_pixel(lng, lat, transform, utm_epsg=None, truncate=True):
     :param truncate: Whether to truncate pixel coordinates. Default is `True`
     :type truncate: bool
     :return: row and column pixel image coordinates
-    :rtype: float, float or int, int
+    :rtype: float, float or int, int or numpy.ndarray, numpy.ndarray
     """
     east, north = wgs84_to_utm(lng, lat, utm_epsg)
     row, column = utm_to_pixel(east, north, transform, truncate=truncate)
@@ -202,30 +225,53 @@ def get_utm_crs(lng, lat, source_crs=CRS.WGS84):
     """ Get CRS for UTM zone in which (lat, lng) is contained.
 
     :param lng: longitude
-    :type lng: float
+    :type lng: float or numpy.ndarray
     :param lat: latitude
-    :type lat: float
+    :type lat: float or numpy.ndarray
     :param source_crs: source CRS
     :type source_crs: constants.CRS
-    :return: CRS of the zone containing the lat,lon point
-    :rtype: constants.CRS
+    :return: CRS of the zone containing the lat,lon point or an array of CRS, one for each point
+    :rtype: constants.CRS or numpy.ndarray
     """
     if source_crs is not CRS.WGS84:
         lng, lat = transform_point((lng, lat), source_crs, CRS.WGS84)
     return CRS.get_utm_from_wgs84(lng, lat)
 
 
+def group_by_utm_crs(lng, lat, source_crs=CRS.WGS84):
+    """ Groups points by UTM zones in which they are contained
+
+    :param lng: An array of longitudes
+    :type lng: numpy.ndarray
+    :param lat: An array of latitudes
+    :type lat: numpy.ndarray
+    :param source_crs: source CRS
+    :type source_crs: constants.CRS
+    :return: A dictionary mapping UTM CRS into an array of indices of points in flattened input arrays
+    :rtype: dict(constants.CRS: numpy.ndarray)
+    """
+    if source_crs is not CRS.WGS84:
+        lng, lat = transform_point((lng, lat), source_crs, CRS.WGS84)
+
+    utm_codes, inverse = CRS._get_utm_codes(lng, lat)  # pylint: disable=protected-access
+    order = np.argsort(inverse, kind='stable')
+    split_indices = np.cumsum(np.bincount(inverse, minlength=len(utm_codes)))[:-1]
+
+    return {CRS(str(code)): indices for code, indices in zip(utm_codes, np.split(order, split_indices))}
+
+
 def transform_point(point, source_crs, target_crs):
     """ Maps point form src_crs to tgt_crs
 
-    :param point: a tuple `(x, y)`
-    :type point: (float, float)
+    :param point: a tuple `(x, y)`, where `x` and `y` can also be arrays of coordinates of many points, which are then
+        transformed with a single call
+    :type point: (float, float) or (numpy.ndarray, numpy.ndarray)
     :param source_crs: source CRS
     :type source_crs: constants.CRS
     :param target_crs: target CRS
     :type target_crs: constants.CRS
     :return: point in target CRS
-    :rtype: (float, float)
+    :rtype: (float, float) or (numpy.ndarray, numpy.ndarray)
     """
     if source_crs == target_crs:
         return point
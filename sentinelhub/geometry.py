@@ -4,6 +4,7 @@ Module implementing geometry classes
 from abc import ABC, abstractmethod
 from math import ceil
 
+import numpy as np
 import shapely.ops
 import shapely.geometry
 import shapely.wkt
@@ -15,12 +16,14 @@ from .geo_utils import transform_point
 class BaseGeometry(ABC):
     """ Base geometry class
     """
+    __slots__ = ('_crs', '__weakref__')
+
     def __init__(self, crs):
         """
         :param crs: Coordinate reference system of the geometry
         :type crs: constants.CRS
         """
-        self._crs = CRS(crs)
+        self._crs = crs if isinstance(crs, CRS) else CRS(crs)
 
     def _repr_svg_(self):
         """ Using shapely's svg geometry visualization for Jupyter notebooks
@@ -104,20 +107,49 @@ class BBox(BaseGeometry):
         - In case of ``constants.CRS.WGS84`` axis x represents longitude and axis y represents latitude
         - In case of ``constants.CRS.POP_WEB`` axis x represents easting and axis y represents northing
         - In case of ``constants.CRS.UTM_*`` axis x represents easting and axis y represents northing
+
+    Bounding boxes are immutable and hashable, therefore they can be used as dictionary keys or set members. Their
+    shapely geometry and GeoJSON representation are computed only once, when they are first needed.
     """
-    def __init__(self, bbox, crs):
+    __slots__ = ('min_x', 'min_y', 'max_x', 'max_y', '_geometry', '_geojson_mapping')
+
+    def __init__(self, bbox, crs):  # pylint: disable=super-init-not-called
         """
         :param bbox: A bbox in any valid representation
         :param crs: Coordinate reference system of the bounding box
         :type crs: constants.CRS
         """
-        x_fst, y_fst, x_snd, y_snd = BBox._to_tuple(bbox)
-        self.min_x = min(x_fst, x_snd)
-        self.max_x = max(x_fst, x_snd)
-        self.min_y = min(y_fst, y_snd)
-        self.max_y = max(y_fst, y_snd)
+        if isinstance(bbox, tuple) and len(bbox) == 4:
+            x_fst, y_fst, x_snd, y_snd = map(float, bbox)
+        else:
+            x_fst, y_fst, x_snd, y_snd = BBox._to_tuple(bbox)
 
-        super().__init__(crs)
+        # Because instances are immutable the attributes have to be set with object.__setattr__
+        set_attribute = object.__setattr__
+        set_attribute(self, 'min_x', x_fst if x_fst <= x_snd else x_snd)
+        set_attribute(self, 'max_x', x_snd if x_fst <= x_snd else x_fst)
+        set_attribute(self, 'min_y', y_fst if y_fst <= y_snd else y_snd)
+        set_attribute(self, 'max_y', y_snd if y_fst <= y_snd else y_fst)
+        set_attribute(self, '_crs', crs if isinstance(crs, CRS) else CRS(crs))
+
+    def __setattr__(self, name, value):
+        """ Bounding boxes are immutable
+
+        :raises: AttributeError
+        """
+        raise AttributeError('{} is immutable, attribute {} cannot be changed'.format(self.__class__.__name__, name))
+
+    def __delattr__(self, name):
+        """ Bounding boxes are immutable
+
+        :raises: AttributeError
+        """
+        raise AttributeError('{} is immutable, attribute {} cannot be deleted'.format(self.__class__.__name__, name))
+
+    def __reduce__(self):
+        """ Enables copying and pickling of bounding boxes
+        """
+        return self.__class__, ((self.min_x, self.min_y, self.max_x, self.max_y), self.crs)
 
     def __iter__(self):
         """ This method enables iteration over coordinates of bounding box
@@ -142,14 +174,25 @@ class BBox(BaseGeometry):
         return '{},{},{},{}'.format(self.min_x, self.min_y, self.max_x, self.max_y)
 
     def __eq__(self, other):
-        """ Method for comparing two bounding boxes
+        """ Method for comparing a bounding box with another bounding box or with a list or tuple of coordinates
 
-        :param other: Another bounding box object
-        :type other: BBox
-        :return: `True` if bounding boxes have the same coordinates and the same CRS and `False otherwise
+        :param other: Another bounding box object or coordinates in form of `[min_x, min_y, max_x, max_y]`
+        :type other: BBox or list(float) or tuple(float)
+        :return: `True` if bounding boxes have the same coordinates and the same CRS and `False otherwise. Because
+            coordinates have no CRS, only coordinates are compared in such case.
         :rtype: bool
         """
-        return list(self) == list(other) and self.crs == other.crs
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        if not isinstance(other, BBox):
+            return NotImplemented
+        return self.min_x == other.min_x and self.min_y == other.min_y and self.max_x == other.max_x and \
+            self.max_y == other.max_y and self.crs is other.crs
+
+    def __hash__(self):
+        """ Hash of a bounding box is determined by its coordinates and CRS
+        """
+        return hash((self.min_x, self.min_y, self.max_x, self.max_y, self.crs))
 
     @property
     def lower_left(self):
@@ -233,12 +276,36 @@ class BBox(BaseGeometry):
 
     @property
     def geometry(self):
-        """ Returns polygon geometry in shapely format
+        """ Returns polygon geometry in shapely format. The polygon is created only once and then cached.
 
         :return: A polygon in shapely format
         :rtype: shapely.geometry.polygon.Polygon
         """
-        return shapely.geometry.Polygon(self.get_polygon())
+        try:
+            return self._geometry
+        except AttributeError:
+            geometry = shapely.geometry.Polygon(self.get_polygon())
+            object.__setattr__(self, '_geometry', geometry)
+            return geometry
+
+    @property
+    def geojson(self):
+        """ Returns representation in a GeoJSON format. Use json.dump for writing it to file. The geometry part is
+        created only once and then cached.
+
+        :return: A dictionary in GeoJSON format
+        :rtype: dict
+        """
+        try:
+            geojson_mapping = self._geojson_mapping
+        except AttributeError:
+            geojson_mapping = shapely.geometry.mapping(self.geometry)
+            object.__setattr__(self, '_geojson_mapping', geojson_mapping)
+
+        return {
+            **self._crs_to_geojson(),
+            **geojson_mapping
+        }
 
     def get_partition(self, num_x=None, num_y=None, size_x=None, size_y=None):
         """ Partitions bounding box into smaller bounding boxes of the same size.
@@ -258,6 +325,23 @@ class BBox(BaseGeometry):
         :return: Two-dimensional list of smaller bounding boxes. Their location is
         :rtype: list(list(BBox))
         """
+        return list(self.iter_partition(num_x=num_x, num_y=num_y, size_x=size_x, size_y=size_y))
+
+    def iter_partition(self, num_x=None, num_y=None, size_x=None, size_y=None):
+        """ Partitions bounding box the same way as `get_partition`, but creates only one column of smaller bounding
+        boxes at a time.
+
+        :param num_x: Number of parts BBox will be horizontally divided into.
+        :type num_x: int or None
+        :param num_y: Number of parts BBox will be vertically divided into.
+        :type num_y: int or None
+        :param size_x: Physical dimension of BBox along easting coordinate
+        :type size_x: float or None
+        :param size_y: Physical dimension of BBox along northing coordinate
+        :type size_y: float or None
+        :return: A generator of columns of smaller bounding boxes, from left to right
+        :rtype: Iterator[list(BBox)]
+        """
         if (num_x is not None and num_y is not None) and (size_x is None and size_y is None):
             size_x, size_y = (self.max_x - self.min_x) / num_x, (self.max_y - self.min_y) / num_y
         elif (size_x is not None and size_y is not None) and (num_x is None and num_y is None):
@@ -265,9 +349,10 @@ class BBox(BaseGeometry):
         else:
             raise ValueError('Not supported partition. Either (num_x, num_y) or (size_x, size_y) must be specified')
 
-        return [[BBox([self.min_x + i * size_x, self.min_y + j * size_y,
-                       self.min_x + (i + 1) * size_x, self.min_y + (j + 1) * size_y],
-                      crs=self.crs) for j in range(num_y)] for i in range(num_x)]
+        for i in range(num_x):
+            yield [BBox([self.min_x + i * size_x, self.min_y + j * size_y,
+                         self.min_x + (i + 1) * size_x, self.min_y + (j + 1) * size_y], crs=self.crs)
+                   for j in range(num_y)]
 
     def get_transform_vector(self, resx, resy):
         """ Given resolution it returns a transformation vector
@@ -400,24 +485,18 @@ class Geometry(BaseGeometry):
         :return: New Geometry object with switched coordinates
         :rtype: Geometry
         """
-        return Geometry(shapely.ops.transform(lambda x, y: (y, x), self.geometry), crs=self.crs)
+        return Geometry(_map_coordinates([self.geometry], lambda x, y: (y, x))[0], crs=self.crs)
 
     def transform(self, crs):
-        """ Transforms Geometry from current CRS to target CRS
+        """ Transforms Geometry from current CRS to target CRS. Coordinates of all vertices are transformed with a
+        single call.
 
         :param crs: target CRS
         :type crs: constants.CRS
         :return: Geometry in target CRS
         :rtype: Geometry
         """
-        new_crs = CRS(crs)
-
-        geometry = self.geometry
-        if new_crs is not self.crs:
-            transform_function = self.crs.get_transform_function(new_crs)
-            geometry = shapely.ops.transform(transform_function, geometry)
-
-        return Geometry(geometry, crs=new_crs)
+        return transform_many([self], crs)[0]
 
     @property
     def geometry(self):
@@ -524,14 +603,15 @@ class BBoxCollection(BaseGeometry):
         return BBoxCollection([bbox.reverse() for bbox in self.bbox_list])
 
     def transform(self, crs):
-        """ Transforms BBoxCollection from current CRS to target CRS
+        """ Transforms BBoxCollection from current CRS to target CRS. Vertices of all bounding boxes are transformed
+        with a single call.
 
         :param crs: target CRS
         :type crs: constants.CRS
         :return: BBoxCollection in target CRS
         :rtype: BBoxCollection
         """
-        return BBoxCollection([bbox.transform(crs) for bbox in self.bbox_list])
+        return BBoxCollection(BBoxArray.from_bboxes(self.bbox_list).transform(crs).to_bbox_list())
 
     def _get_geometry(self):
         """ Creates a multipolygon of bounding box polygons
@@ -558,3 +638,325 @@ class BBoxCollection(BaseGeometry):
                 raise ValueError('All bounding boxes should have the same CRS')
 
         return bbox_list, crs
+
+
+class BBoxArray(BaseGeometry):
+    """ An array of bounding boxes in the same CRS
+
+    Bounding boxes are stored in a single numpy array of shape `(N, 4)` with columns `min_x`, `min_y`, `max_x` and
+    `max_y`. All operations are vectorized, which makes this class suitable for collections of many bounding boxes.
+    Individual `BBox` objects are created only when the array is iterated or indexed with an integer.
+    """
+    def __init__(self, bboxes, crs):
+        """
+        :param bboxes: An array-like object of shape `(N, 4)`. Each row contains coordinates of one bounding box in a
+            form `(x_1, y_1, x_2, y_2)` of any two opposite vertices.
+        :type bboxes: numpy.ndarray or list(tuple(float))
+        :param crs: Coordinate reference system of bounding boxes
+        :type crs: constants.CRS
+        """
+        bboxes = np.array(bboxes, dtype=np.float64).reshape(-1, 4)
+
+        self._array = np.concatenate([np.minimum(bboxes[:, :2], bboxes[:, 2:]),
+                                      np.maximum(bboxes[:, :2], bboxes[:, 2:])], axis=1)
+        self._array.flags.writeable = False
+
+        super().__init__(crs)
+
+    @classmethod
+    def from_bboxes(cls, bbox_list):
+        """ Creates an array from a list or a collection of bounding boxes
+
+        :param bbox_list: A non-empty list of BBox objects in the same CRS or a collection of bounding boxes
+        :type bbox_list: list(BBox) or BBoxCollection
+        :return: An array of bounding boxes
+        :rtype: BBoxArray
+        """
+        bbox_list, crs = BBoxCollection._parse_bbox_list(bbox_list)  # pylint: disable=protected-access
+        return cls([list(bbox) for bbox in bbox_list], crs=crs)
+
+    def __len__(self):
+        """ Number of bounding boxes in the array
+        """
+        return self._array.shape[0]
+
+    def __iter__(self):
+        """ This method enables iteration over bounding boxes of the array
+        """
+        return (BBox(tuple(row), crs=self.crs) for row in self._array.tolist())
+
+    def __getitem__(self, index):
+        """ Returns a single bounding box for an integer index and a new array otherwise, e.g. for a slice, an array of
+        indices or a boolean mask
+        """
+        if isinstance(index, (int, np.integer)):
+            return BBox(tuple(self._array[index].tolist()), crs=self.crs)
+        return BBoxArray(self._array[index], crs=self.crs)
+
+    def __repr__(self):
+        """ Class representation
+        """
+        return '{}(<{} bounding boxes>, crs={})'.format(self.__class__.__name__, len(self), repr(self.crs))
+
+    def __eq__(self, other):
+        """ Method for comparing two arrays of bounding boxes
+
+        :param other: Another array of bounding boxes
+        :type other: BBoxArray
+        :return: `True` if arrays have the same coordinates and the same CRS and `False` otherwise
+        :rtype: bool
+        """
+        return isinstance(other, BBoxArray) and self.crs == other.crs and np.array_equal(self.array, other.array)
+
+    @property
+    def array(self):
+        """ Returns a read-only numpy array of coordinates
+
+        :return: An array of shape `(N, 4)` with columns `min_x`, `min_y`, `max_x`, `max_y`
+        :rtype: numpy.ndarray
+        """
+        return self._array
+
+    @property
+    def middle(self):
+        """ Returns middle points of bounding boxes
+
+        :return: An array of shape `(N, 2)`
+        :rtype: numpy.ndarray
+        """
+        return (self._array[:, :2] + self._array[:, 2:]) / 2
+
+    @property
+    def geometry(self):
+        """ Returns shapely object representing geometry
+
+        :return: A multipolygon of bounding boxes
+        :rtype: shapely.geometry.MultiPolygon
+        """
+        return shapely.geometry.MultiPolygon([shapely.geometry.box(*row) for row in self._array.tolist()])
+
+    @property
+    def bbox(self):
+        """ Returns BBox object representing bounding box around all bounding boxes of the array
+
+        :return: A bounding box, with same CRS
+        :rtype: BBox
+        """
+        if len(self) == 0:
+            raise ValueError('An empty array of bounding boxes has no bounding box')
+
+        return BBox((*self._array[:, :2].min(axis=0), *self._array[:, 2:].max(axis=0)), crs=self.crs)
+
+    def to_bbox_list(self):
+        """ Converts the array into a list of bounding boxes
+
+        :return: A list of bounding boxes
+        :rtype: list(BBox)
+        """
+        return list(self)
+
+    def to_bbox_collection(self):
+        """ Converts the array into a collection of bounding boxes
+
+        :return: A collection of bounding boxes
+        :rtype: BBoxCollection
+        """
+        return BBoxCollection(self.to_bbox_list())
+
+    def reverse(self):
+        """ Returns a new array where x and y coordinates are switched
+
+        :return: New array of bounding boxes with switched coordinates
+        :rtype: BBoxArray
+        """
+        return BBoxArray(self._array[:, [1, 0, 3, 2]], crs=self.crs)
+
+    def transform(self, crs):
+        """ Transforms bounding boxes from current CRS to target CRS. The same as `BBox.transform` it transforms the
+        lower left and upper right vertex of each bounding box, but all of them are transformed with a single call.
+
+        :param crs: target CRS
+        :type crs: constants.CRS
+        :return: An array of bounding boxes in target CRS
+        :rtype: BBoxArray
+        """
+        new_crs = CRS(crs)
+        if new_crs == self.crs:
+            return BBoxArray(self._array, crs=new_crs)
+
+        corners = self._array.reshape(-1, 2)
+        new_x, new_y = self.crs.get_transform_function(new_crs)(corners[:, 0], corners[:, 1])
+
+        return BBoxArray(np.stack([new_x, new_y], axis=1).reshape(-1, 4), crs=new_crs)
+
+    def buffer(self, buffer):
+        """ Changes dimensions of all bounding boxes by a percentage of size of each dimension. If number is negative,
+        the size will decrease.
+
+        :param buffer: A percentage of size change
+        :type buffer: float
+        :return: A new array of buffered bounding boxes
+        :rtype: BBoxArray
+        """
+        if buffer < -1:
+            raise ValueError('Cannot reduce the bounding box to nothing, buffer must be >= -1.0')
+
+        ratio = 1 + buffer
+        middle = np.tile(self.middle, 2)
+        return BBoxArray(middle - (middle - self._array) * ratio, crs=self.crs)
+
+    def get_partition(self, num_x=None, num_y=None, size_x=None, size_y=None):
+        """ Partitions each bounding box into smaller bounding boxes, the same way as `BBox.get_partition`
+
+        :param num_x: Number of parts each bounding box will be horizontally divided into.
+        :type num_x: int or None
+        :param num_y: Number of parts each bounding box will be vertically divided into.
+        :type num_y: int or None
+        :param size_x: Physical dimension of parts along easting coordinate
+        :type size_x: float or None
+        :param size_y: Physical dimension of parts along northing coordinate
+        :type size_y: float or None
+        :return: A flat array of parts. Parts of each bounding box are consecutive and in the same order as in the
+            flattened output of `BBox.get_partition`, i.e. columns first.
+        :rtype: BBoxArray
+        """
+        widths = self._array[:, 2] - self._array[:, 0]
+        heights = self._array[:, 3] - self._array[:, 1]
+
+        if (num_x is not None and num_y is not None) and (size_x is None and size_y is None):
+            sizes_x, sizes_y = widths / num_x, heights / num_y
+            nums_x, nums_y = np.full(len(self), num_x), np.full(len(self), num_y)
+        elif (size_x is not None and size_y is not None) and (num_x is None and num_y is None):
+            sizes_x, sizes_y = np.full(len(self), float(size_x)), np.full(len(self), float(size_y))
+            nums_x, nums_y = np.ceil(widths / size_x).astype(int), np.ceil(heights / size_y).astype(int)
+        else:
+            raise ValueError('Not supported partition. Either (num_x, num_y) or (size_x, size_y) must be specified')
+
+        part_counts = nums_x * nums_y
+        bbox_indices = np.repeat(np.arange(len(self)), part_counts)
+        part_indices = np.arange(part_counts.sum()) - np.repeat(np.cumsum(part_counts) - part_counts, part_counts)
+
+        column_indices, row_indices = np.divmod(part_indices, nums_y[bbox_indices])
+        origin_x, origin_y = self._array[bbox_indices, 0], self._array[bbox_indices, 1]
+        part_size_x, part_size_y = sizes_x[bbox_indices], sizes_y[bbox_indices]
+
+        return BBoxArray(np.stack([origin_x + column_indices * part_size_x, origin_y + row_indices * part_size_y,
+                                   origin_x + (column_indices + 1) * part_size_x,
+                                   origin_y + (row_indices + 1) * part_size_y], axis=1), crs=self.crs)
+
+    def intersects(self, other):
+        """ Checks which bounding boxes intersect with another bounding box or with bounding boxes of another array.
+        Bounding boxes which only touch also intersect.
+
+        :param other: A bounding box or an array of bounding boxes in the same CRS
+        :type other: BBox or BBoxArray
+        :return: A boolean array of shape `(N,)` for a bounding box or `(N, M)` for an array of `M` bounding boxes
+        :rtype: numpy.ndarray
+        """
+        if other.crs != self.crs:
+            raise ValueError('Bounding boxes should be in the same CRS, got {} and {}'.format(self.crs, other.crs))
+
+        is_single = isinstance(other, BBox)
+        other_array = np.array([list(other)]) if is_single else other.array
+
+        mask = (self._array[:, np.newaxis, 0] <= other_array[np.newaxis, :, 2]) & \
+               (other_array[np.newaxis, :, 0] <= self._array[:, np.newaxis, 2]) & \
+               (self._array[:, np.newaxis, 1] <= other_array[np.newaxis, :, 3]) & \
+               (other_array[np.newaxis, :, 1] <= self._array[:, np.newaxis, 3])
+
+        return mask[:, 0] if is_single else mask
+
+    def contains(self, other):
+        """ Checks which bounding boxes entirely contain another bounding box
+
+        :param other: A bounding box in the same CRS
+        :type other: BBox
+        :return: A boolean array of shape `(N,)`
+        :rtype: numpy.ndarray
+        """
+        if other.crs != self.crs:
+            raise ValueError('Bounding boxes should be in the same CRS, got {} and {}'.format(self.crs, other.crs))
+
+        return (self._array[:, 0] <= other.min_x) & (self._array[:, 1] <= other.min_y) & \
+            (other.max_x <= self._array[:, 2]) & (other.max_y <= self._array[:, 3])
+
+
+def transform_many(geometries, crs):
+    """ Transforms a list of geometries into target CRS. Coordinates of all geometries with the same CRS are
+    transformed together with a single call, which is much faster than transforming each geometry separately.
+
+    :param geometries: A list of geometries, which can be in different CRS
+    :type geometries: list(Geometry)
+    :param crs: target CRS
+    :type crs: constants.CRS
+    :return: A list of geometries in target CRS, in the same order as given geometries
+    :rtype: list(Geometry)
+    """
+    new_crs = CRS(crs)
+
+    crs_to_indices = {}
+    for index, geometry in enumerate(geometries):
+        if not isinstance(geometry, Geometry):
+            raise ValueError('Expected a list of {} objects, got {}'.format(Geometry.__name__, type(geometry)))
+        crs_to_indices.setdefault(geometry.crs, []).append(index)
+
+    new_geometries = [None] * len(geometries)
+    for old_crs, indices in crs_to_indices.items():
+        shapes = [geometries[index].geometry for index in indices]
+        if old_crs is not new_crs:
+            shapes = _map_coordinates(shapes, old_crs.get_transform_function(new_crs))
+
+        for index, shape in zip(indices, shapes):
+            new_geometries[index] = Geometry(shape, crs=new_crs)
+
+    return new_geometries
+
+
+def _map_coordinates(shapes, function):
+    """ Applies a vectorized function on coordinates of polygons and multipolygons. Coordinates of all rings are
+    collected into a single array, so that the function is called only once. Geometries with z coordinates are
+    transformed one by one with `shapely.ops.transform`.
+
+    :param shapes: A list of shapely polygons or multipolygons
+    :type shapes: list(shapely.geometry.Polygon or shapely.geometry.MultiPolygon)
+    :param function: A function which takes arrays of x and y coordinates and returns new arrays of x and y coordinates
+    :type function: function
+    :return: A list of new shapely geometries
+    :rtype: list(shapely.geometry.Polygon or shapely.geometry.MultiPolygon)
+    """
+    is_vectorized = [not shape.is_empty and not shape.has_z for shape in shapes]
+    polygon_lists = [_get_polygons(shape) for shape, vectorized in zip(shapes, is_vectorized) if vectorized]
+
+    ring_coords = [np.asarray(ring.coords) for polygons in polygon_lists for polygon in polygons
+                   for ring in [polygon.exterior, *polygon.interiors]]
+
+    if ring_coords:
+        coords = np.concatenate(ring_coords)
+        new_x, new_y = function(coords[:, 0], coords[:, 1])
+        new_coords = np.stack([new_x, new_y], axis=1)
+        ring_iterator = iter(np.split(new_coords, np.cumsum([len(ring) for ring in ring_coords])[:-1]))
+
+    new_polygon_lists = iter([
+        [shapely.geometry.Polygon(next(ring_iterator), [next(ring_iterator) for _ in polygon.interiors])
+         for polygon in polygons]
+        for polygons in polygon_lists
+    ])
+
+    new_shapes = []
+    for shape, vectorized in zip(shapes, is_vectorized):
+        if not vectorized:
+            new_shapes.append(shape if shape.is_empty else shapely.ops.transform(function, shape))
+        elif isinstance(shape, shapely.geometry.MultiPolygon):
+            new_shapes.append(shapely.geometry.MultiPolygon(next(new_polygon_lists)))
+        else:
+            new_shapes.append(next(new_polygon_lists)[0])
+
+    return new_shapes
+
+
+def _get_polygons(shape):
+    """ Provides a list of polygons of a polygon or a multipolygon
+    """
+    if isinstance(shape, shapely.geometry.MultiPolygon):
+        return list(shape.geoms)
+    return [shape]
@@ -3,17 +3,25 @@ Module for working with Sentinel Hub OGC services
 """
 import logging
 import datetime
+import json
+from bisect import bisect_right
 from base64 import b64encode
+from collections.abc import Sequence
 from urllib.parse import urlencode
 
+import dateutil.parser
+import numpy as np
 import shapely.geometry
+import shapely.ops
 
-from .constants import ServiceType, DataSource, MimeType, CRS, SHConstants, CustomUrlParam
+from .constants import ServiceType, DataSource, MimeType, CRS, SHConstants, CustomUrlParam, RequestType
 from .config import SHConfig
 from .geo_utils import get_image_dimension
 from .geometry import BBox, Geometry
-from .download import DownloadRequest, get_json
+from .spatial_index import GeometryIndex
+from .download import DownloadRequest, DownloadClient
 from .time_utils import parse_time_interval, filter_times
+from .wfs_cache import WfsCache
 
 LOGGER = logging.getLogger(__name__)
 
@@ -77,12 +85,12 @@ class OgcImageService(OgcService):
         :param request: QGC-type request with specified bounding box, time interval, and cloud coverage for specific
                         product.
         :type request: OgcRequest or GeopediaRequest
-        :return: list of DownloadRequests
+        :return: A sequence of DownloadRequests, which are created once they are accessed
+        :rtype: Sequence(DownloadRequest)
         """
         size_x, size_y = self.get_image_dimensions(request)
-        return [DownloadRequest(url=self.get_url(request=request, date=date, size_x=size_x, size_y=size_y),
-                                data_type=request.image_format, headers=SHConstants.HEADERS)
-                for date in self.get_dates(request)]
+        url_template = self.get_url_template(request, size_x=size_x, size_y=size_y)
+        return _OgcDownloadList(url_template, self.get_dates(request), request.image_format)
 
     def get_url(self, request, *, date=None, size_x=None, size_y=None, geometry=None):
         """ Returns url to Sentinel Hub's OGC service for the product specified by the OgcRequest and date.
@@ -115,6 +123,32 @@ class OgcImageService(OgcService):
 
         return '{}/{}?{}'.format(url, authority, urlencode(params))
 
+    def get_url_template(self, request, *, size_x=None, size_y=None):
+        """ Returns a template of urls to Sentinel Hub's WMS or WCS service for all dates of the request. Parameters
+        which are the same for all dates are encoded only once. For each date the template gives the same url as
+        `get_url` method.
+
+        :param request: OGC-type request with specified bounding box, cloud coverage for specific product.
+        :type request: OgcRequest or GeopediaRequest
+        :param size_x: horizontal image dimension
+        :type size_x: int or str
+        :param size_y: vertical image dimension
+        :type size_y: int or str
+        :return: A template of urls
+        :rtype: OgcUrlTemplate
+        """
+        url = self.get_base_url(request)
+        authority = request.theme if hasattr(request, 'theme') else self.config.instance_id
+
+        params = {**self._get_common_url_parameters(request), **self._get_wms_wcs_url_parameters(request, None)}
+        if request.service_type is ServiceType.WMS:
+            date_params = self._get_wms_url_parameters(request, size_x, size_y)
+        else:
+            date_params = self._get_wcs_url_parameters(request, size_x, size_y)
+
+        return OgcUrlTemplate('{}/{}?{}'.format(url, authority, urlencode(params)), urlencode(date_params),
+                              getattr(request, 'time_difference', None))
+
     def get_base_url(self, request):
         """ Creates base url string.
 
@@ -195,11 +229,7 @@ class OgcImageService(OgcService):
         }
 
         if date is not None:
-            start_date = date if request.time_difference < datetime.timedelta(
-                seconds=0) else date - request.time_difference
-            end_date = date if request.time_difference < datetime.timedelta(
-                seconds=0) else date + request.time_difference
-            params['TIME'] = '{}/{}'.format(start_date.isoformat(), end_date.isoformat())
+            params['TIME'] = OgcUrlTemplate.get_time_parameter(date, request.time_difference)
 
         return params
 
@@ -294,6 +324,9 @@ class OgcImageService(OgcService):
         When a time_difference threshold is set to a positive value, the function filters out all datetimes which
         are within the time difference. The oldest datetime is preserved, all others all deleted.
 
+        If the request has a `date_filter` set, dates which would give mostly empty or clouded images are removed as
+        well, see `_prune_dates`.
+
         :param request: OGC-type request
         :type request: WmsRequest or WcsRequest
         :return: List of dates of existing acquisitions for the given request
@@ -311,9 +344,61 @@ class OgcImageService(OgcService):
         dates = self.wfs_iterator.get_dates()
         dates = filter_times(dates, request.time_difference)
 
+        if getattr(request, 'date_filter', None) is not None:
+            dates = self._prune_dates(request, dates)
+
         LOGGER.debug('Initializing requests for dates: %s', dates)
         return dates
 
+    def _prune_dates(self, request, dates):
+        """ Removes dates for which satellite tiles cover too small a part of the bounding box or are too cloudy over
+        it. Tiles are assigned to the date which they are joined into by `filter_times`. The coverage of a date is the
+        area of the union of its tile footprints within the bounding box divided by the area of the bounding box. Its
+        cloud coverage is an average of `cloudCoverPercentage` values of its tiles, weighted by their areas within the
+        bounding box. Tiles without a footprint are assumed to cover the entire bounding box and tiles without cloud
+        coverage info are assumed to be cloudless.
+
+        :param request: OGC-type request
+        :type request: WmsRequest or WcsRequest
+        :param dates: A sorted list of dates obtained with `filter_times`
+        :type dates: list(datetime.datetime)
+        :return: A list of remaining dates
+        :rtype: list(datetime.datetime)
+        """
+        bbox_polygon = request.bbox.geometry
+        min_coverage, bbox_maxcc = request.date_filter
+
+        date_tiles = [[] for _ in dates]
+        for tile_info, tile_date in zip(self.wfs_iterator, self.wfs_iterator.get_dates()):
+            date_index = bisect_right(dates, tile_date) - 1
+            if date_index >= 0:
+                date_tiles[date_index].append(tile_info)
+
+        pruned_dates = []
+        for date, tile_list in zip(dates, date_tiles):
+            footprints = []
+            cloud_area = 0
+            for tile_info in tile_list:
+                footprint = bbox_polygon
+                if tile_info.get('geometry'):
+                    footprint = shapely.geometry.shape(tile_info['geometry']).intersection(bbox_polygon)
+                footprints.append(footprint)
+                cloud_area += footprint.area * (tile_info['properties'].get('cloudCoverPercentage') or 0) / 100
+
+            footprint_area = sum(footprint.area for footprint in footprints)
+            coverage = shapely.ops.unary_union(footprints).area / bbox_polygon.area if footprints else 0
+            cloud_coverage = cloud_area / footprint_area if footprint_area else 0
+
+            if min_coverage is not None and coverage < min_coverage:
+                continue
+            if bbox_maxcc is not None and cloud_coverage > bbox_maxcc:
+                continue
+            pruned_dates.append(date)
+
+        LOGGER.debug('Pruned %d out of %d dates with insufficient coverage', len(dates) - len(pruned_dates),
+                     len(dates))
+        return pruned_dates
+
     @staticmethod
     def get_image_dimensions(request):
         """ Verifies or calculates image dimensions.
@@ -351,8 +436,20 @@ class WebFeatureService(OgcService):
     The class is an iterator over info data of all available satellite tiles for requested parameters. It collects data
     from Sentinel Hub service only during the first iteration. During next iterations it returns already obtained data.
     The data is in the order returned by Sentinel Hub WFS service.
+
+    Pages of results are requested in batches of consecutive feature offsets, which are downloaded in parallel. The
+    first batch contains a single page and each next batch twice as many pages, up to `prefetch_pages`. Pages after
+    the first page with fewer features than requested are discarded.
+
+    A long time interval can be split into sub-intervals, which are queried in parallel. Because the service returns
+    features from the newest to the oldest, results of later sub-intervals come first. Features on the boundary of two
+    sub-intervals are returned only once.
+
+    If configuration parameter `wfs_cache_folder` is set, obtained features are stored in a persistent `WfsCache` and
+    the service is queried only for time ranges which are not in the cache yet.
     """
-    def __init__(self, bbox, time_interval, *, data_source=DataSource.SENTINEL2_L1C, maxcc=1.0, **kwargs):
+    def __init__(self, bbox, time_interval, *, data_source=DataSource.SENTINEL2_L1C, maxcc=1.0, prefetch_pages=4,
+                 max_interval=None, **kwargs):
         """
         :param bbox: Bounding box of the requested image. Coordinates must be in the specified coordinate reference
             system.
@@ -363,22 +460,61 @@ class WebFeatureService(OgcService):
         :type data_source: constants.DataSource
         :param maxcc: Maximum accepted cloud coverage of an image. Float between 0.0 and 1.0. Default is 1.0.
         :type maxcc: float
+        :param prefetch_pages: Maximum number of consecutive pages of results which are requested at the same time
+        :type prefetch_pages: int
+        :param max_interval: If given, the time interval is split into sub-intervals of at most this length, which
+            are queried in parallel. By default the entire time interval is queried at once.
+        :type max_interval: datetime.timedelta or None
         :param config: A custom instance of config class to override parameters from the saved configuration.
         :type config: SHConfig or None
         """
         super().__init__(**kwargs)
 
+        if not isinstance(prefetch_pages, int) or prefetch_pages < 1:
+            raise ValueError('Parameter prefetch_pages should be a positive integer, got {}'.format(prefetch_pages))
+        if max_interval is not None and max_interval <= datetime.timedelta(0):
+            raise ValueError('Parameter max_interval should be a positive time difference, got {}'.format(max_interval))
+
         self.bbox = bbox
         self.time_interval = parse_time_interval(time_interval)
         self.data_source = data_source
         self.maxcc = maxcc
+        self.prefetch_pages = prefetch_pages
 
         self.tile_list = []
         self.index = 0
-        self.feature_offset = 0
         self.latest_time_only = time_interval == SHConstants.LATEST
         self.max_features_per_request = 1 if self.latest_time_only else SHConfig().max_wfs_records_per_query
 
+        self.max_interval = None if self.latest_time_only else max_interval
+        self._queries = [_WfsQuery(interval) for interval in self._split_time_interval(self.time_interval,
+                                                                                       self.max_interval)]
+        self._feature_keys = set() if len(self._queries) > 1 else None
+
+        self._cache = WfsCache(self.config.wfs_cache_folder,
+                               latest_ttl_seconds=self.config.wfs_cache_latest_ttl_seconds) \
+            if self.config.wfs_cache_folder else None
+
+    @classmethod
+    def from_tile_list(cls, bbox, time_interval, tile_list, **kwargs):
+        """ Creates an iterator over already obtained info about satellite tiles, which doesn't query the service. It
+        can be used as `wfs_iterator` of `WmsRequest` and `WcsRequest`.
+
+        :param bbox: Bounding box of the tiles
+        :type bbox: geometry.BBox
+        :param time_interval: Time interval of the tiles
+        :type time_interval: (str, str)
+        :param tile_list: A list of dictionaries containing info about product tiles, in the order of the service
+        :type tile_list: list(dict)
+        :param kwargs: Other parameters of `WebFeatureService`
+        :return: An iterator over the given tile info
+        :rtype: WebFeatureService
+        """
+        wfs_iterator = cls(bbox, time_interval, **kwargs)
+        wfs_iterator.tile_list = list(tile_list)
+        wfs_iterator._queries = []
+        return wfs_iterator
+
     def __iter__(self):
         """ Iteration method
 
@@ -394,7 +530,7 @@ class WebFeatureService(OgcService):
         :return: dictionary containing info about product tiles
         :rtype: dict
         """
-        while self.index >= len(self.tile_list) and self.feature_offset is not None:
+        while self.index >= len(self.tile_list) and self._queries:
             self._fetch_features()
 
         if self.index < len(self.tile_list):
@@ -403,11 +539,123 @@ class WebFeatureService(OgcService):
 
         raise StopIteration
 
+    @staticmethod
+    def _split_time_interval(time_interval, max_interval):
+        """ Splits a time interval into sub-intervals of at most given length, ordered from the latest to the earliest.
+        Neighbouring sub-intervals share a boundary time.
+
+        :param time_interval: A pair of start and end time in ISO 8601 format
+        :type time_interval: (str, str)
+        :param max_interval: Maximal length of a sub-interval. If `None` the time interval is not split.
+        :type max_interval: datetime.timedelta or None
+        :return: A list of sub-intervals
+        :rtype: list((str, str))
+        """
+        if max_interval is None:
+            return [time_interval]
+
+        start_time, end_time = [dateutil.parser.parse(time) for time in time_interval]
+
+        time_intervals = []
+        while end_time - start_time > max_interval:
+            time_intervals.append(((end_time - max_interval).isoformat(), end_time.isoformat()))
+            end_time -= max_interval
+        time_intervals.append((start_time.isoformat(), end_time.isoformat()))
+
+        return time_intervals
+
     def _fetch_features(self):
-        """ Collects data from WFS service
+        """ Collects data from WFS service. It downloads the next batch of pages of each unfinished query and then moves
+        features of finished queries into `tile_list` in the service order.
+        """
+        if self._cache is not None:
+            self._fetch_cached_features()
+            return
 
-        :return: dictionary containing info about product tiles
-        :rtype: dict
+        self._download_next_pages()
+
+        while self._queries:
+            query = self._queries[0]
+            self._collect_tiles(query.tile_list)
+            query.tile_list = []
+
+            if not query.is_finished:
+                break
+            self._queries.pop(0)
+
+    def _fetch_cached_features(self):
+        """ Collects data from WFS service only for time ranges which are not in the cache yet, stores it into the cache
+        and then reads all features of the time interval from the cache
+        """
+        cache_key = WfsCache.get_query_key(self._base_url,
+                                           DataSource.get_wfs_typename(self.data_source, config=self.config),
+                                           self.maxcc, self.bbox.crs.value)
+
+        if self.latest_time_only:
+            tile_list = self._cache.get_latest(cache_key, self.bbox)
+            if tile_list is None:
+                self._download_all_pages()
+                tile_list = [tile_info for query in self._queries for tile_info in query.tile_list]
+                self._cache.set_latest(cache_key, self.bbox, tile_list)
+        else:
+            missing_intervals = self._cache.get_missing_intervals(cache_key, self.bbox, self.time_interval)
+            self._queries = [_WfsQuery(interval) for missing_interval in missing_intervals
+                             for interval in self._split_time_interval(missing_interval, self.max_interval)]
+
+            query_time = datetime.datetime.utcnow()
+            self._download_all_pages()
+            for query in self._queries:
+                self._cache.add_features(cache_key, self.bbox, query.time_interval, query.tile_list,
+                                         query_time=query_time)
+
+            tile_list = self._cache.get_features(cache_key, self.bbox, self.time_interval)
+
+        self._queries = []
+        self._collect_tiles(tile_list)
+
+    def _download_all_pages(self):
+        """ Downloads pages of all queries until each of them is finished
+        """
+        while not all(query.is_finished for query in self._queries):
+            self._download_next_pages()
+
+    def _download_next_pages(self):
+        """ Downloads the next batch of pages of each unfinished query in parallel and adds obtained features to
+        queries
+        """
+        download_requests, request_queries = [], []
+        for query in self._queries:
+            if query.is_finished:
+                continue
+            for page_index in range(query.batch_size):
+                feature_offset = query.feature_offset + page_index * self.max_features_per_request
+                download_requests.append(self._get_page_request(query.time_interval, feature_offset))
+                request_queries.append(query)
+
+        client = DownloadClient(config=self.config)
+        responses = client.download(download_requests, max_threads=len(download_requests))
+
+        for query, response in zip(request_queries, responses):
+            if query.is_finished:
+                continue
+
+            query.tile_list.extend(response['features'])
+            query.feature_offset += self.max_features_per_request
+            if len(response['features']) < self.max_features_per_request or self.latest_time_only:
+                query.is_finished = True
+
+        for query in self._queries:
+            query.batch_size = min(2 * query.batch_size, self.prefetch_pages)
+
+    def _get_page_request(self, time_interval, feature_offset):
+        """ Creates a request for a single page of WFS results
+
+        :param time_interval: A pair of start and end time in ISO 8601 format
+        :type time_interval: (str, str)
+        :param feature_offset: An offset of the first feature in the page
+        :type feature_offset: int
+        :return: A download request
+        :rtype: DownloadRequest
         """
         main_url = '{}/{}/{}?'.format(self._base_url, ServiceType.WFS.value, self.config.instance_id)
 
@@ -419,30 +667,37 @@ class WebFeatureService(OgcService):
             'BBOX': str(self.bbox.reverse()) if self.bbox.crs is CRS.WGS84 else str(self.bbox),
             'OUTPUTFORMAT': MimeType.get_string(MimeType.JSON),
             'SRSNAME': CRS.ogc_string(self.bbox.crs),
-            'TIME': '{}/{}'.format(self.time_interval[0], self.time_interval[1]),
+            'TIME': '{}/{}'.format(time_interval[0], time_interval[1]),
             'MAXCC': 100.0 * self.maxcc,
             'MAXFEATURES': self.max_features_per_request,
-            'FEATURE_OFFSET': self.feature_offset
+            'FEATURE_OFFSET': feature_offset
         }
 
         url = main_url + urlencode(params)
 
         LOGGER.debug("URL=%s", url)
-        response = get_json(url)
+        return DownloadRequest(url=url, request_type=RequestType.GET, save_response=False, return_data=True,
+                               data_type=MimeType.JSON)
 
+    def _collect_tiles(self, tile_list):
+        """ Adds tiles to `tile_list`. Sentinel-1 tiles which don't match the data source are skipped. If the time
+        interval was split into multiple sub-intervals, tiles which were already obtained from a neighbouring
+        sub-interval are skipped as well.
+        """
         is_sentinel1 = self.data_source.is_sentinel1()
-        for tile_info in response["features"]:
-            if is_sentinel1:
-                if self._sentinel1_product_check(tile_info['properties']['id'], self.data_source) and \
-                        self.data_source.contains_orbit_direction(tile_info['properties']['orbitDirection']):
-                    self.tile_list.append(tile_info)
-            else:
-                self.tile_list.append(tile_info)
+        for tile_info in tile_list:
+            if is_sentinel1 and not (
+                    self._sentinel1_product_check(tile_info['properties']['id'], self.data_source) and
+                    self.data_source.contains_orbit_direction(tile_info['properties']['orbitDirection'])):
+                continue
 
-        if len(response["features"]) < self.max_features_per_request or self.latest_time_only:
-            self.feature_offset = None
-        else:
-            self.feature_offset += self.max_features_per_request
+            if self._feature_keys is not None:
+                feature_key = json.dumps(tile_info['properties'], sort_keys=True)
+                if feature_key in self._feature_keys:
+                    continue
+                self._feature_keys.add(feature_key)
+
+            self.tile_list.append(tile_info)
 
     def get_dates(self):
         """ Returns a list of acquisition times from tile info data
@@ -490,3 +745,231 @@ class WebFeatureService(OgcService):
         """
         props = tile_url.rsplit('/', 7)
         return ''.join(props[1:4]), '-'.join(props[4:7]), int(props[7])
+
+
+class BatchWebFeatureService(OgcService):
+    """ Collects info about available satellite tiles for many bounding boxes with a small number of WFS queries
+
+    Bounding boxes are grouped by CRS and split into spatially compact chunks of at most `max_bboxes_per_query`
+    bounding boxes. The service is queried once for the envelope of each chunk and features are then assigned to those
+    bounding boxes of the chunk which their footprints intersect, using a spatial index of footprints.
+    """
+    def __init__(self, bbox_list, time_interval, *, data_source=DataSource.SENTINEL2_L1C, maxcc=1.0,
+                 max_bboxes_per_query=1000, config=None, **kwargs):
+        """
+        :param bbox_list: A list of bounding boxes
+        :type bbox_list: list(geometry.BBox)
+        :param time_interval: interval with start and end date of the form YYYY-MM-DDThh:mm:ss or YYYY-MM-DD
+        :type time_interval: (str, str)
+        :param data_source: Source of requested satellite data. Default is Sentinel-2 L1C data.
+        :type data_source: constants.DataSource
+        :param maxcc: Maximum accepted cloud coverage of an image. Float between 0.0 and 1.0. Default is 1.0.
+        :type maxcc: float
+        :param max_bboxes_per_query: Maximum number of bounding boxes covered by a single WFS query
+        :type max_bboxes_per_query: int
+        :param config: A custom instance of config class to override parameters from the saved configuration.
+        :type config: SHConfig or None
+        :param kwargs: Optional parameters of `WebFeatureService`, e.g. `prefetch_pages` and `max_interval`
+        """
+        super().__init__(config=config)
+
+        if time_interval == SHConstants.LATEST:
+            raise ValueError('Batch WFS queries cannot be made for the latest acquisition only')
+        if not isinstance(max_bboxes_per_query, int) or max_bboxes_per_query < 1:
+            raise ValueError('Parameter max_bboxes_per_query should be a positive integer, got '
+                             '{}'.format(max_bboxes_per_query))
+
+        self.bbox_list = list(bbox_list)
+        self.time_interval = parse_time_interval(time_interval)
+        self.data_source = data_source
+        self.maxcc = maxcc
+        self.max_bboxes_per_query = max_bboxes_per_query
+        self.wfs_params = kwargs
+
+        self._wfs_iterators = None
+
+    def get_wfs_iterators(self):
+        """ Provides an iterator over info about satellite tiles for each bounding box. The service is queried only
+        the first time this method is called. Each iterator can be set as `wfs_iterator` of a `WmsRequest` or
+        `WcsRequest` with the same bounding box, so that the request doesn't query the service again.
+
+        :return: A list of iterators in the same order as bounding boxes
+        :rtype: list(WebFeatureService)
+        """
+        if self._wfs_iterators is None:
+            wfs_iterators = [None] * len(self.bbox_list)
+            for positions in self._get_chunks():
+                self._collect_chunk(positions, wfs_iterators)
+            self._wfs_iterators = wfs_iterators
+
+        return self._wfs_iterators
+
+    def get_dates(self, time_difference=datetime.timedelta(seconds=-1)):
+        """ Provides acquisition dates for each bounding box in the same way as `OgcImageService.get_dates` does for a
+        single request
+
+        :param time_difference: Dates which are within this time difference are joined, preserving only the oldest one
+        :type time_difference: datetime.timedelta
+        :return: A list of lists of acquisition dates, one for each bounding box
+        :rtype: list(list(datetime.datetime) or [None])
+        """
+        if DataSource.is_timeless(self.data_source):
+            return [[None] for _ in self.bbox_list]
+
+        return [filter_times(wfs_iterator.get_dates(), time_difference) for wfs_iterator in self.get_wfs_iterators()]
+
+    def _get_chunks(self):
+        """ Groups bounding boxes by CRS and splits each group into chunks. A group is recursively split in half at the
+        median of bounding box centers along the axis with the larger spread until each chunk is small enough.
+
+        :return: A list of arrays with positions of bounding boxes in the list
+        :rtype: list(numpy.ndarray)
+        """
+        crs_groups = {}
+        for position, bbox in enumerate(self.bbox_list):
+            crs_groups.setdefault(bbox.crs, []).append(position)
+
+        chunks = []
+        for positions in crs_groups.values():
+            positions = np.array(positions)
+            bounds = np.array([tuple(self.bbox_list[position]) for position in positions], dtype=np.float64)
+            centers = (bounds[:, :2] + bounds[:, 2:]) / 2
+
+            stack = [np.arange(len(positions))]
+            while stack:
+                indices = stack.pop()
+                if len(indices) <= self.max_bboxes_per_query:
+                    chunks.append(positions[indices])
+                    continue
+
+                axis = np.argmax(np.ptp(centers[indices], axis=0))
+                sorted_indices = indices[np.argsort(centers[indices, axis], kind='stable')]
+                half = len(sorted_indices) // 2
+                stack.extend([sorted_indices[half:], sorted_indices[:half]])
+
+        return chunks
+
+    def _collect_chunk(self, positions, wfs_iterators):
+        """ Queries the service for the envelope of a chunk of bounding boxes and assigns features to bounding boxes
+        """
+        bbox_list = [self.bbox_list[position] for position in positions]
+        bounds = np.array([tuple(bbox) for bbox in bbox_list], dtype=np.float64)
+        chunk_bbox = BBox((*bounds[:, :2].min(axis=0), *bounds[:, 2:].max(axis=0)), crs=bbox_list[0].crs)
+
+        wfs_params = dict(data_source=self.data_source, maxcc=self.maxcc, config=self.config, **self.wfs_params)
+        chunk_wfs = WebFeatureService(chunk_bbox, self.time_interval, **wfs_params)
+        tile_list = list(chunk_wfs)
+
+        # Features without a geometry can't be located, therefore they are assigned to every bounding box of the chunk
+        located_indices = [index for index, tile_info in enumerate(tile_list) if tile_info.get('geometry')]
+        unlocated_indices = sorted(set(range(len(tile_list))).difference(located_indices))
+        footprints = [shapely.geometry.shape(tile_list[index]['geometry']) for index in located_indices]
+        footprint_index = GeometryIndex(footprints)
+
+        for position, bbox in zip(positions, bbox_list):
+            polygon = bbox.geometry
+            indices = sorted(unlocated_indices + [located_indices[index] for index in footprint_index.query(polygon)
+                                                  if footprints[index].intersects(polygon)])
+            wfs_iterators[position] = WebFeatureService.from_tile_list(bbox, self.time_interval,
+                                                                       [tile_list[index] for index in indices],
+                                                                       **wfs_params)
+
+
+class OgcUrlTemplate:
+    """ A template of urls to Sentinel Hub's WMS or WCS service which differ only in the `TIME` parameter
+
+    The `TIME` parameter is positioned between the already encoded parameters which come before and after it. This way
+    urls are exactly the same as if all parameters were encoded together.
+    """
+    def __init__(self, url_prefix, url_suffix, time_difference):
+        """
+        :param url_prefix: A part of url up to and including encoded parameters which come before `TIME`
+        :type url_prefix: str
+        :param url_suffix: Encoded parameters which come after `TIME`
+        :type url_suffix: str
+        :param time_difference: The time difference of the request
+        :type time_difference: datetime.timedelta or None
+        """
+        self.url_prefix = url_prefix
+        self.url_suffix = url_suffix
+        self.time_difference = time_difference
+
+    def get_url(self, date):
+        """ Creates url for the given date
+
+        :param date: acquisition date or None
+        :type date: datetime.datetime or None
+        :return: url to Sentinel Hub's OGC service
+        :rtype: str
+        """
+        if date is None:
+            return '{}&{}'.format(self.url_prefix, self.url_suffix)
+
+        time_param = urlencode({'TIME': self.get_time_parameter(date, self.time_difference)})
+        return '{}&{}&{}'.format(self.url_prefix, time_param, self.url_suffix)
+
+    @staticmethod
+    def get_time_parameter(date, time_difference):
+        """ Returns the value of `TIME` parameter for the given date
+
+        :param date: acquisition date
+        :type date: datetime.datetime
+        :param time_difference: The time difference of the request. If it is negative only the exact date is used.
+        :type time_difference: datetime.timedelta
+        :return: A time interval in ISO 8601 format
+        :rtype: str
+        """
+        if time_difference < datetime.timedelta(seconds=0):
+            return '{}/{}'.format(date.isoformat(), date.isoformat())
+        return '{}/{}'.format((date - time_difference).isoformat(), (date + time_difference).isoformat())
+
+
+class _OgcDownloadList(Sequence):
+    """ A sequence of download requests of an OGC request, one for each date
+
+    Download requests are created from the url template only once they are accessed. Afterwards they are kept, so that
+    any changes of their attributes persist.
+    """
+    def __init__(self, url_template, dates, image_format):
+        """
+        :param url_template: A template of urls
+        :type url_template: OgcUrlTemplate
+        :param dates: A list of dates
+        :type dates: list(datetime.datetime or None)
+        :param image_format: Format of downloaded images
+        :type image_format: MimeType
+        """
+        self.url_template = url_template
+        self.dates = dates
+        self.image_format = image_format
+
+        self._download_requests = [None] * len(dates)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[item_index] for item_index in range(*index.indices(len(self)))]
+
+        download_request = self._download_requests[index]
+        if download_request is None:
+            download_request = DownloadRequest(url=self.url_template.get_url(self.dates[index]),
+                                               data_type=self.image_format, headers=SHConstants.HEADERS)
+            self._download_requests[index] = download_request
+        return download_request
+
+
+class _WfsQuery:
+    """ A state of a WFS query for a single time interval
+    """
+    def __init__(self, time_interval):
+        """
+        :param time_interval: A pair of start and end time in ISO 8601 format
+        :type time_interval: (str, str)
+        """
+        self.time_interval = time_interval
+        self.feature_offset = 0
+        self.batch_size = 1
+        self.is_finished = False
+        self.tile_list = []
@@ -0,0 +1,288 @@
+"""
+Module implementing estimation of processing units and duration of Sentinel Hub Processing API requests
+
+Documentation: https://docs.sentinel-hub.com/api/latest/#/API/processing_unit
+"""
+import math
+import re
+from threading import Lock
+
+import dateutil.parser
+import shapely.geometry
+
+from .download import DownloadRequest
+
+
+class ProcessingCostEstimator:
+    """ Estimates how many processing units Sentinel Hub Processing API requests will consume and how long it will take
+    to execute them under the rate limiting policies of an account
+
+    The estimate of a single request is a product of the following factors:
+      - output area, where an output of 512x512 pixels counts as 1,
+      - number of input bands divided by 3, where band `dataMask` is not counted,
+      - 2 for `FLOAT32` output sample type and 1 otherwise,
+      - number of acquisitions for `ORBIT` and `TILE` mosaicking, estimated from the length of the time range,
+      - 2 if orthorectification is requested.
+
+    Costs of multiple `input_data` entries are summed. Because the estimate is only approximate, it can be calibrated
+    with the number of processing units which the service actually reports in response headers.
+    """
+    UNITS_SPENT_HEADER = 'X-ProcessingUnits-Spent'
+
+    BASE_AREA = 512 * 512
+    MINIMAL_AREA_FACTOR = 0.01
+    MINIMAL_COST = 0.005
+    SECONDS_PER_DAY = 24 * 60 * 60
+
+    def __init__(self, revisit_days=5, minimal_cost=MINIMAL_COST):
+        """
+        :param revisit_days: Expected number of days between two acquisitions. It is used to estimate the number of
+            acquisitions in a time range for evalscripts with `ORBIT` or `TILE` mosaicking.
+        :type revisit_days: float
+        :param minimal_cost: The minimal number of processing units a single request can cost
+        :type minimal_cost: float
+        """
+        if revisit_days <= 0:
+            raise ValueError('Parameter revisit_days should be a positive number')
+
+        self.revisit_days = revisit_days
+        self.minimal_cost = minimal_cost
+
+        self._estimated_units = 0
+        self._spent_units = 0
+        self._lock = Lock()
+
+    @property
+    def correction_factor(self):
+        """ A ratio between the number of processing units reported by the service and the number of processing units
+        estimated for the same requests. Before any calibration it is equal to 1.
+
+        :return: A correction factor which multiplies all estimates
+        :rtype: float
+        """
+        if not self._estimated_units:
+            return 1.0
+        return self._spent_units / self._estimated_units
+
+    def estimate(self, request):
+        """ Estimates the number of processing units of a single request
+
+        :param request: A request or its Processing API payload
+        :type request: SentinelHubRequest or DownloadRequest or dict
+        :return: Estimated number of processing units
+        :rtype: float
+        """
+        return self._estimate_uncorrected(self._get_payload(request)) * self.correction_factor
+
+    def calibrate(self, request, headers):
+        """ Calibrates the estimator with the number of processing units which the service reported for a request
+
+        :param request: A request or its Processing API payload
+        :type request: SentinelHubRequest or DownloadRequest or dict
+        :param headers: Headers of a response obtained from Sentinel Hub service. Responses without information about
+            spent processing units and requests which are not Processing API requests are ignored.
+        :type headers: dict
+        """
+        spent_units = headers.get(self.UNITS_SPENT_HEADER)
+        payload = self._get_payload(request)
+        if spent_units is None or not payload or 'input' not in payload:
+            return
+
+        estimated_units = self._estimate_uncorrected(payload)
+        with self._lock:
+            self._estimated_units += estimated_units
+            self._spent_units += float(spent_units)
+
+    def plan(self, requests, policy_buckets=None, num_processes=1, request_duration=0.0):
+        """ Estimates the total cost of a collection of requests and the time it will take to execute them
+
+        The duration is determined by the most restrictive of policy buckets. A bucket which is not refilled and doesn't
+        have enough content makes the execution impossible, in which case the duration is infinite.
+
+        :param requests: A collection of requests or their Processing API payloads
+        :type requests: iterable(SentinelHubRequest or DownloadRequest or dict)
+        :param policy_buckets: Policy buckets of the account. If not given, rate limits are not taken into account.
+        :type policy_buckets: list(PolicyBucket) or None
+        :param num_processes: Number of requests which will be executed in parallel
+        :type num_processes: int
+        :param request_duration: Expected number of seconds it takes the service to process a single request
+        :type request_duration: float
+        :return: A plan with total number of requests, processing units and expected duration in seconds
+        :rtype: CostPlan
+        """
+        request_count = 0
+        processing_units = 0
+        for request in requests:
+            request_count += 1
+            processing_units += self.estimate(request)
+
+        durations = [math.ceil(request_count / num_processes) * request_duration]
+        for bucket in policy_buckets or []:
+            cost = request_count if bucket.is_request_bucket() else processing_units
+            missing_content = max(cost - bucket.content, 0)
+
+            if bucket.is_fixed():
+                durations.append(math.inf if missing_content else 0)
+            else:
+                durations.append(missing_content / bucket.refill_per_second)
+
+        return CostPlan(request_count, processing_units, max(durations))
+
+    def _estimate_uncorrected(self, payload):
+        """ Estimates processing units of a payload without applying the correction factor
+        """
+        evalscript = payload.get('evalscript', '')
+        area_factor = max(self._get_output_area(payload) / self.BASE_AREA, self.MINIMAL_AREA_FACTOR)
+        sample_type_factor = 2 if _parse_sample_type(evalscript) == 'FLOAT32' else 1
+        is_multi_temporal = _parse_mosaicking(evalscript) in ('ORBIT', 'TILE')
+        band_groups = _parse_input_bands(evalscript)
+
+        cost = 0
+        for input_data in payload['input']['data']:
+            band_factor = max(len(_select_bands(band_groups, input_data.get('id'))), 1) / 3
+            sample_factor = self._get_acquisition_count(input_data) if is_multi_temporal else 1
+            processing_factor = 2 if input_data.get('processing', {}).get('orthorectify') else 1
+
+            cost += area_factor * band_factor * sample_type_factor * sample_factor * processing_factor
+
+        return max(cost, self.minimal_cost)
+
+    @staticmethod
+    def _get_payload(request):
+        """ Provides a Processing API payload of a request
+        """
+        if isinstance(request, dict):
+            return request
+        if isinstance(request, DownloadRequest):
+            return request.post_values
+        return request.payload
+
+    @staticmethod
+    def _get_output_area(payload):
+        """ Calculates the number of output pixels either from the output size or from the output resolution and
+        bounds of the request
+        """
+        output = payload.get('output', {})
+        if 'width' in output and 'height' in output:
+            return output['width'] * output['height']
+
+        bounds = payload['input']['bounds']
+        if 'bbox' in bounds:
+            min_x, min_y, max_x, max_y = bounds['bbox']
+        else:
+            min_x, min_y, max_x, max_y = shapely.geometry.shape(bounds['geometry']).bounds
+
+        width = round(abs(max_x - min_x) / output['resx'])
+        height = round(abs(max_y - min_y) / output['resy'])
+        return width * height
+
+    def _get_acquisition_count(self, input_data):
+        """ Estimates the number of acquisitions in the time range of input data
+        """
+        time_range = input_data.get('dataFilter', {}).get('timeRange', {})
+        if not (time_range.get('from') and time_range.get('to')):
+            return 1
+
+        start_time = dateutil.parser.parse(time_range['from'])
+        end_time = dateutil.parser.parse(time_range['to'])
+        days = (end_time - start_time).total_seconds() / self.SECONDS_PER_DAY
+
+        return max(math.ceil(days / self.revisit_days), 1)
+
+
+class CostPlan:
+    """ A result of cost planning for a collection of requests
+    """
+    def __init__(self, request_count, processing_units, duration):
+        """
+        :param request_count: Number of requests
+        :type request_count: int
+        :param processing_units: Estimated number of processing units of all requests
+        :type processing_units: float
+        :param duration: Estimated number of seconds it will take to execute all requests
+        :type duration: float
+        """
+        self.request_count = request_count
+        self.processing_units = processing_units
+        self.duration = duration
+
+    def __repr__(self):
+        """ Representation of the plan
+        """
+        return '{}(request_count={}, processing_units={:.3f}, duration={:.1f})' \
+               ''.format(self.__class__.__name__, self.request_count, self.processing_units, self.duration)
+
+
+def _parse_input_bands(evalscript):
+    """ Parses the `input` section of evalscript setup and returns a list of pairs of datasource identifier and a list
+    of its bands. Band `dataMask` is not included.
+    """
+    input_section = _get_bracket_content(evalscript, r'\binput\s*:\s*\[')
+    if input_section is None:
+        return []
+
+    if not re.search(r'\bbands\s*:', input_section):
+        return [(None, _get_band_names(input_section))]
+
+    band_groups = []
+    for input_object in re.findall(r'{[^{}]*}', input_section):
+        datasource_match = re.search(r'\bdatasource\s*:\s*["\']([^"\']*)["\']', input_object)
+        bands_match = re.search(r'\bbands\s*:\s*\[([^\]]*)\]', input_object)
+        if bands_match:
+            datasource = datasource_match.group(1) if datasource_match else None
+            band_groups.append((datasource, _get_band_names(bands_match.group(1))))
+
+    return band_groups
+
+
+def _select_bands(band_groups, datasource):
+    """ Selects bands of a datasource. If the datasource doesn't have its own bands, bands without a datasource are
+    used and if there are none of those, all bands.
+    """
+    for selected_datasource in [datasource, None]:
+        bands = [band for group_datasource, group_bands in band_groups for band in group_bands
+                 if group_datasource == selected_datasource]
+        if bands:
+            return bands
+
+    return [band for _, group_bands in band_groups for band in group_bands]
+
+
+def _get_band_names(text):
+    """ Collects all quoted band names from a piece of evalscript
+    """
+    return [band for band in re.findall(r'["\']([^"\']+)["\']', text) if band != 'dataMask']
+
+
+def _parse_sample_type(evalscript):
+    """ Parses output sample type from evalscript setup
+    """
+    match = re.search(r'\bsampleType\s*:\s*(?:SampleType\.|["\'])(\w+)', evalscript)
+    return match.group(1).upper() if match else 'AUTO'
+
+
+def _parse_mosaicking(evalscript):
+    """ Parses mosaicking type from evalscript setup
+    """
+    match = re.search(r'\bmosaicking\s*:\s*(?:Mosaicking\.|["\'])(\w+)', evalscript)
+    return match.group(1).upper() if match else 'SIMPLE'
+
+
+def _get_bracket_content(text, start_pattern):
+    """ Finds the first match of a pattern ending with an opening bracket and returns the content until the matching
+    closing bracket
+    """
+    match = re.search(start_pattern, text)
+    if match is None:
+        return None
+
+    depth = 1
+    for index in range(match.end(), len(text)):
+        if text[index] == '[':
+            depth += 1
+        elif text[index] == ']':
+            depth -= 1
+            if depth == 0:
+                return text[match.end(): index]
+
+    return None
@@ -2,9 +2,13 @@
 
 Documentation: https://docs.sentinel-hub.com/api/latest/reference/
 """
+import copy
+import math
+
+import dateutil.parser
 
 from .constants import MimeType, DataSource, RequestType
-from .download import DownloadRequest, SentinelHubDownloadClient
+from .download import DownloadRequest, SentinelHubDownloadClient, OutputAssembler
 from .data_request import DataRequest
 from .geometry import Geometry, BBox
 from .time_utils import parse_time_interval
@@ -12,9 +16,14 @@ from .time_utils import parse_time_interval
 
 class SentinelHubRequest(DataRequest):
     """ Sentinel Hub API request class
+
+    If the requested output is larger than `max_size` pixels in any direction, the request is split into a grid of
+    tiles. Tiles are downloaded in parallel and `get_data` assembles them into a single output.
     """
+    MAX_SIZE = 2500
+
     def __init__(self, evalscript, input_data, responses, bbox=None, geometry=None, size=None, resolution=None,
-                 **kwargs):
+                 max_size=MAX_SIZE, **kwargs):
         """
         For details of certain parameters check the
         `Processing API reference <https://docs.sentinel-hub.com/api/latest/reference/#operation/process>`_.
@@ -35,6 +44,9 @@ class SentinelHubRequest(DataRequest):
         :type size: Tuple[int, int]
         :param resolution: Resolution of the image. It has to be in units compatible with the given CRS.
         :type resolution: Tuple[float, float]
+        :param max_size: Maximal width and height of an output in pixels which can be obtained with a single request. If
+            the requested output is larger, it will be split into tiles. If set to `None` requests are never split.
+        :type max_size: int or None
         :param data_folder: location of the directory where the fetched data will be saved.
         :type data_folder: str
         :param config: A custom instance of config class to override parameters from the saved configuration.
@@ -56,23 +68,213 @@ class SentinelHubRequest(DataRequest):
             evalscript=evalscript
         )
 
+        self.output_size = self._get_output_size(bbox or geometry.bbox, size, resolution)
+        self.tile_payloads = []
+        self.tile_windows = []
+        self.output_shape = None
+        if max_size is not None:
+            self._plan_tiles(bbox or geometry.bbox, max_size)
+
         super().__init__(SentinelHubDownloadClient, **kwargs)
 
     def create_request(self):
-        """ Prepares a download request
+        """ Prepares a download request, or one download request for each tile if the output has to be split
         """
         headers = {'content-type': MimeType.JSON.get_string(), "accept": self.mime_type.get_string()}
 
         self.download_list = [DownloadRequest(
             request_type=RequestType.POST,
             url=self.config.get_sh_processing_api_url(),
-            post_values=self.payload,
+            post_values=payload,
             data_folder=self.data_folder,
             save_response=bool(self.data_folder),
             data_type=self.mime_type,
             headers=headers,
             use_session=True
-        )]
+        ) for payload in self.tile_payloads or [self.payload]]
+
+    def is_tiled(self):
+        """ Checks if the output of the request is split into multiple tiles
+
+        :return: `True` if the request is executed as multiple tile requests and `False` otherwise
+        :rtype: bool
+        """
+        return len(self.tile_payloads) > 1
+
+    def requires_assembly(self, decode_data=True):
+        """ Decoded outputs of a tiled request have to be assembled from tiles by `get_data` method
+
+        :param decode_data: Whether data will be decoded
+        :type decode_data: bool
+        :return: `True` if data has to be obtained with `get_data` and `False` otherwise
+        :rtype: bool
+        """
+        return decode_data and self.is_tiled()
+
+    def get_data(self, *, save_data=False, redownload=False, data_filter=None, max_threads=None, decode_data=True,
+                 raise_download_errors=True, memmap_folder=None):
+        """ Get requested data either by downloading it or by reading it from the disk (if it was previously
+        downloaded and saved).
+
+        If the request is split into tiles, their decoded outputs are written into a single preallocated array as soon
+        as they are downloaded and a list with the assembled output is returned. Outputs which are not images, such as
+        `userdata.json` in a TAR response, are returned as lists with one item per tile. If data is not decoded, a list
+        of binary tile responses is returned instead.
+
+        :param save_data: flag to turn on/off saving of data to disk. Default is `False`.
+        :type save_data: bool
+        :param redownload: if `True`, download again the requested data even though it's already saved to disk.
+        :type redownload: bool
+        :param data_filter: Used to specify which items will be returned by the method and in which order.
+        :type data_filter: list(int) or None
+        :param max_threads: Maximum number of threads to be used for download in parallel.
+        :type max_threads: int or None
+        :param decode_data: If `True` (default) it decodes data, otherwise it returns binary data.
+        :type decode_data: bool
+        :param raise_download_errors: If `True` any error in download process should be raised as
+            ``DownloadFailedException``. If `False` failed downloads will only raise warnings and areas of failed tiles
+            will be filled with zeros.
+        :type raise_download_errors: bool
+        :param memmap_folder: If given, assembled images of a tiled request are stored in `.npy` files in this folder
+            and returned as memory-mapped arrays. Files are named by identifiers of responses.
+        :type memmap_folder: str or None
+        :return: A list of requested outputs
+        :rtype: list
+        """
+        if not self.is_tiled() or not decode_data:
+            return super().get_data(save_data=save_data, redownload=redownload, data_filter=data_filter,
+                                    max_threads=max_threads, decode_data=decode_data,
+                                    raise_download_errors=raise_download_errors)
+
+        self._preprocess_request(save_data, True)
+        data_list = [self._download_tiles(redownload, max_threads, raise_download_errors, memmap_folder)]
+
+        if data_filter is None:
+            return data_list
+        try:
+            return [data_list[index] for index in data_filter]
+        except (IndexError, TypeError) as exception:
+            raise ValueError('Tiled request has a single output, therefore data_filter can only contain index '
+                             '0') from exception
+
+    @staticmethod
+    def get_cube(requests, *, save_data=False, redownload=False, max_threads=None, raise_download_errors=True,
+                 memmap_folder=None):
+        """ Downloads a time series of requests, typically the same request for a sequence of time intervals, into a
+        single cube. The cube is allocated only once and each response is decoded straight into its time slice.
+
+        :param requests: A list of requests with outputs of the same size
+        :type requests: list(SentinelHubRequest)
+        :param save_data: flag to turn on/off saving of data to disk. Default is `False`.
+        :type save_data: bool
+        :param redownload: if `True`, download again the requested data even though it's already saved to disk.
+        :type redownload: bool
+        :param max_threads: Maximum number of threads to be used for download in parallel.
+        :type max_threads: int or None
+        :param raise_download_errors: If `True` any error in download process should be raised as
+            ``DownloadFailedException``. If `False` failed downloads will only raise warnings and their parts of the
+            cube will be filled with zeros.
+        :type raise_download_errors: bool
+        :param memmap_folder: If given, the cube is stored in `.npy` files in this folder and returned as
+            memory-mapped arrays. Files are named by identifiers of responses.
+        :type memmap_folder: str or None
+        :return: A cube of shape ``[time, height, width, channels]`` (or a dictionary of such cubes for TAR responses)
+            and a list of start times of the first input data of each request
+        :rtype: (numpy.ndarray or dict, list(datetime.datetime or None))
+        """
+        output_sizes = {request.output_size for request in requests}
+        if len(output_sizes) > 1:
+            raise ValueError('All requests in a cube should have outputs of the same size, got sizes '
+                             '{}'.format(sorted(output_sizes)))
+
+        jobs = []
+        for time_index, request in enumerate(requests):
+            client, download_list = request.prepare_download(save_data=save_data, redownload=redownload,
+                                                             raise_download_errors=raise_download_errors)
+            windows = [(time_index,) + window for window in request.tile_windows] or \
+                [(time_index, slice(None), slice(None))]
+            jobs.extend((client, download_request, len(jobs) + index, window)
+                        for index, (download_request, window) in enumerate(zip(download_list, windows)))
+
+        output_shape = (len(requests),) + tuple(reversed(requests[0].output_size)) if requests else (0,)
+        default_name = requests[0].payload['output']['responses'][0]['identifier'] if requests else 'default'
+        assembler = OutputAssembler(output_shape, len(jobs), default_name, memmap_folder=memmap_folder)
+        assembler.download(jobs, max_threads=max_threads)
+
+        return assembler.get_result(), [request.get_start_time() for request in requests]
+
+    def get_start_time(self):
+        """ Provides the start of the time range of the first input data of the request
+
+        :return: Start time or `None` if the time range is not specified
+        :rtype: datetime.datetime or None
+        """
+        time_from = self.payload['input']['data'][0].get('dataFilter', {}).get('timeRange', {}).get('from')
+        if not time_from:
+            return None
+        return dateutil.parser.parse(time_from).replace(tzinfo=None)
+
+    @staticmethod
+    def _get_output_size(bbox, size, resolution):
+        """ Provides the width and height of the output in pixels, which is either given or computed from the
+        resolution and the bounding box
+        """
+        if size:
+            return tuple(size)
+
+        min_x, min_y, max_x, max_y = list(bbox)
+        return round(abs(max_x - min_x) / resolution[0]), round(abs(max_y - min_y) / resolution[1])
+
+    def _plan_tiles(self, bbox, max_size):
+        """ Splits the output into a grid of tiles with at most `max_size` pixels in each direction. Tiles are aligned
+        with the pixels of the entire output.
+        """
+        min_x, min_y, max_x, max_y = list(bbox)
+        width, height = self.output_size
+
+        if width <= max_size and height <= max_size:
+            return
+
+        pixel_width = (max_x - min_x) / width
+        pixel_height = (max_y - min_y) / height
+        column_edges = _split_pixels(width, math.ceil(width / max_size))
+        row_edges = _split_pixels(height, math.ceil(height / max_size))
+
+        for row_start, row_end in zip(row_edges[:-1], row_edges[1:]):
+            for column_start, column_end in zip(column_edges[:-1], column_edges[1:]):
+                tile_bbox = BBox((min_x + column_start * pixel_width, max_y - row_end * pixel_height,
+                                  min_x + column_end * pixel_width, max_y - row_start * pixel_height), crs=bbox.crs)
+
+                self.tile_payloads.append(self._get_tile_payload(tile_bbox, column_end - column_start,
+                                                                 row_end - row_start))
+                self.tile_windows.append((slice(row_start, row_end), slice(column_start, column_end)))
+
+        self.output_shape = height, width
+
+    def _get_tile_payload(self, tile_bbox, width, height):
+        """ Creates a payload of a single tile request with the given bounding box and output size in pixels
+        """
+        tile_payload = copy.deepcopy(self.payload)
+        tile_payload['input']['bounds']['bbox'] = list(tile_bbox)
+        for param in ['resx', 'resy']:
+            tile_payload['output'].pop(param, None)
+        tile_payload['output']['width'] = width
+        tile_payload['output']['height'] = height
+        return tile_payload
+
+    def _download_tiles(self, redownload, max_threads, raise_download_errors, memmap_folder):
+        """ Downloads all tiles in parallel and writes them into the assembled output
+        """
+        client = self._create_download_client(redownload, raise_download_errors)
+        default_name = self.payload['output']['responses'][0]['identifier']
+        assembler = OutputAssembler(self.output_shape, len(self.tile_windows), default_name,
+                                    memmap_folder=memmap_folder)
+
+        jobs = [(client, request, tile_index, window)
+                for tile_index, (request, window) in enumerate(zip(self.download_list, self.tile_windows))]
+        assembler.download(jobs, max_threads=max_threads)
+
+        return assembler.get_result()
 
     @staticmethod
     def input_data(data_source=None, time_interval=None, maxcc=1.0, mosaicking_order='mostRecent', other_args=None):
@@ -259,3 +461,9 @@ class SentinelHubRequest(DataRequest):
             request_bounds.update(other_args)
 
         return request_bounds
+
+
+def _split_pixels(length, num_parts):
+    """ Splits a number of pixels into parts of nearly equal sizes and returns pixel indices of their edges
+    """
+    return [index * length // num_parts for index in range(num_parts + 1)]
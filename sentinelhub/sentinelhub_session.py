@@ -1,8 +1,13 @@
 """
 Module implementing Sentinel Hub session object
 """
+import hashlib
+import json
 import logging
+import os
+import tempfile
 import time
+from threading import Lock, Event, Thread
 
 from oauthlib.oauth2 import BackendApplicationClient
 from requests_oauthlib import OAuth2Session
@@ -19,14 +24,21 @@ class SentinelHubSession:
     """ Sentinel Hub authentication class
 
     The class will do OAuth2 authentication with Sentinel Hub service and store the token. It will make sure that the
-    token is never expired by automatically refreshing it if expiry time is close.
+    token is never expired by automatically refreshing it if expiry time is close. Refreshing is thread-safe and can
+    optionally be done in a background thread before the token expires.
+
+    If configuration parameter `sh_token_cache_folder` is set, tokens are also stored in that folder and shared between
+    all processes on the same machine that use the same credentials.
     """
     SECONDS_BEFORE_EXPIRY = 60
 
-    def __init__(self, config=None):
+    def __init__(self, config=None, refresh_in_background=False):
         """
         :param config: An instance of package configuration class
         :type config: SHConfig
+        :param refresh_in_background: If `True` a daemon thread will refresh the token before it expires. Otherwise the
+            token is refreshed only when it is requested and its expiry time is close.
+        :type refresh_in_background: bool
         """
         self.config = config or SHConfig()
 
@@ -34,9 +46,21 @@ class SentinelHubSession:
             raise ValueError("Configuration parameters 'sh_client_id' and 'sh_client_secret' have to be set in order "
                              "to authenticate with Sentinel Hub service")
 
+        self._cache_key = self.config.sh_client_id, self.config.sh_client_secret, self.config.get_sh_oauth_url()
+        self._token_cache = TokenFileCache(self.config.sh_token_cache_folder) \
+            if self.config.sh_token_cache_folder else None
+
         self._token = None
+        self._token_lock = Lock()
         _ = self.token
 
+        self._stop_event = Event()
+        self._refresh_thread = None
+        if refresh_in_background:
+            self._refresh_thread = Thread(target=self._refresh_periodically, name='SentinelHubSessionRefresh',
+                                          daemon=True)
+            self._refresh_thread.start()
+
     @property
     def token(self):
         """ Always up-to-date session's token
@@ -44,14 +68,15 @@ class SentinelHubSession:
         :return: A token in a form of dictionary of parameters
         :rtype: dict
         """
-        if self._token and self._token['expires_at'] > time.time() + self.SECONDS_BEFORE_EXPIRY:
-            return self._token
+        token = self._token
+        if self._is_token_valid(token, time.time() + self.SECONDS_BEFORE_EXPIRY):
+            return token
 
-        # A request parameter is created only in order for error handling decorators to work correctly
-        request = DownloadRequest(url=self.config.get_sh_oauth_url())
-        self._token = self._fetch_token(request)
+        with self._token_lock:
+            if not self._is_token_valid(self._token, time.time() + self.SECONDS_BEFORE_EXPIRY):
+                self._token = self._collect_token(time.time() + self.SECONDS_BEFORE_EXPIRY)
 
-        return self._token
+            return self._token
 
     @property
     def session_headers(self):
@@ -64,6 +89,56 @@ class SentinelHubSession:
             'Authorization': 'Bearer {}'.format(self.token['access_token'])
         }
 
+    def stop_background_refresh(self):
+        """ Stops a background thread that is refreshing the token. Afterwards the token is refreshed only when it is
+        requested.
+        """
+        self._stop_event.set()
+
+    @staticmethod
+    def _is_token_valid(token, min_expiry_time):
+        """ Checks if a token exists and will not expire before the given time
+        """
+        return bool(token) and token['expires_at'] > min_expiry_time
+
+    def _collect_token(self, min_expiry_time):
+        """ Provides a token which will not expire before the given time. It is either read from the file cache or it is
+        fetched from the service. This method should always be called inside a token lock.
+        """
+        if self._token_cache is not None:
+            cached_token = self._token_cache.load(self._cache_key)
+            if self._is_token_valid(cached_token, min_expiry_time):
+                LOGGER.debug('Using a cached authentication token')
+                return cached_token
+
+        # A request parameter is created only in order for error handling decorators to work correctly
+        request = DownloadRequest(url=self.config.get_sh_oauth_url())
+        token = self._fetch_token(request)
+
+        if self._token_cache is not None:
+            self._token_cache.save(self._cache_key, token)
+
+        return token
+
+    def _refresh_periodically(self):
+        """ Runs in a background thread and refreshes the token before it gets close to its expiry time
+        """
+        while not self._stop_event.is_set():
+            expires_at = self._token['expires_at']
+            wait_time = expires_at - 2 * self.SECONDS_BEFORE_EXPIRY - time.time()
+
+            if wait_time > 0:
+                self._stop_event.wait(wait_time)
+                continue
+
+            try:
+                with self._token_lock:
+                    if self._token['expires_at'] == expires_at:
+                        self._token = self._collect_token(expires_at)
+            except Exception as exception:  # pylint: disable=broad-except
+                LOGGER.warning('Failed to refresh authentication token in background: %s', exception)
+                self._stop_event.wait(self.config.download_sleep_time)
+
     @retry_temporal_errors
     @fail_user_errors
     def _fetch_token(self, request):
@@ -78,3 +153,57 @@ class SentinelHubSession:
                 client_id=self.config.sh_client_id,
                 client_secret=self.config.sh_client_secret
             )
+
+
+class TokenFileCache:
+    """ A cache of OAuth tokens stored in a local folder
+
+    Each token is stored in its own file, which is readable only by the owner. Files are named by a hash of the cache
+    key so that credentials never appear in file names. Tokens are written atomically, therefore many processes can
+    safely share the same cache folder.
+    """
+    def __init__(self, cache_folder):
+        """
+        :param cache_folder: A folder where tokens will be stored
+        :type cache_folder: str
+        """
+        self.cache_folder = os.path.expanduser(cache_folder)
+
+    def load(self, cache_key):
+        """ Loads a token from the cache
+
+        :param cache_key: A tuple of values identifying the credentials
+        :type cache_key: tuple(str)
+        :return: A token or `None` if it doesn't exist in the cache
+        :rtype: dict or None
+        """
+        try:
+            with open(self._get_filename(cache_key), 'r') as token_file:
+                return json.load(token_file)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, cache_key, token):
+        """ Saves a token into the cache
+
+        :param cache_key: A tuple of values identifying the credentials
+        :type cache_key: tuple(str)
+        :param token: A token in a form of dictionary of parameters
+        :type token: dict
+        """
+        try:
+            os.makedirs(self.cache_folder, mode=0o700, exist_ok=True)
+
+            file_descriptor, temp_filename = tempfile.mkstemp(dir=self.cache_folder, suffix='.tmp')
+            with os.fdopen(file_descriptor, 'w') as token_file:
+                json.dump(token, token_file)
+
+            os.replace(temp_filename, self._get_filename(cache_key))
+        except OSError as exception:
+            LOGGER.warning('Failed to cache authentication token in %s: %s', self.cache_folder, exception)
+
+    def _get_filename(self, cache_key):
+        """ Provides a filename of a cached token
+        """
+        hashed_key = hashlib.sha256('\n'.join(cache_key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_folder, '{}.json'.format(hashed_key))
@@ -0,0 +1,269 @@
+"""
+Module implementing spatial indices of geometries
+"""
+import itertools
+import warnings
+
+import numpy as np
+import shapely.geometry
+import shapely.ops
+import shapely.prepared
+from shapely.geometry import Polygon, MultiPolygon, GeometryCollection
+from shapely.strtree import STRtree
+
+
+class GeometryIndex:
+    """ A spatial index of shapely geometries, which finds geometries whose envelopes intersect an envelope of a given
+    geometry
+
+    It wraps shapely STR-tree and works with all versions of shapely, although in versions below 2.0 the tree returns
+    geometries and in later versions it returns their indices.
+    """
+    def __init__(self, geometries):
+        """
+        :param geometries: A list of shapely geometries
+        :type geometries: list(shapely.geometry.base.BaseGeometry)
+        """
+        self.geometries = list(geometries)
+
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='STRtree will be changed')
+            self._tree = STRtree(self.geometries)
+
+        self._indices = {id(geometry): index for index, geometry in enumerate(self.geometries)}
+
+    def query(self, geometry):
+        """ Finds geometries whose envelopes intersect an envelope of the given geometry
+
+        :param geometry: A shapely geometry
+        :type geometry: shapely.geometry.base.BaseGeometry
+        :return: A sorted list of indices of found geometries
+        :rtype: list(int)
+        """
+        if hasattr(self._tree, 'query_items'):
+            results = self._tree.query_items(geometry)
+        else:
+            results = self._tree.query(geometry)
+
+        return sorted(self._indices[id(result)] if isinstance(result, shapely.geometry.base.BaseGeometry)
+                      else int(result) for result in results)
+
+    def query_geometries(self, geometry):
+        """ Finds geometries whose envelopes intersect an envelope of the given geometry
+
+        :param geometry: A shapely geometry
+        :type geometry: shapely.geometry.base.BaseGeometry
+        :return: A list of found geometries in the order of the index
+        :rtype: list(shapely.geometry.base.BaseGeometry)
+        """
+        return [self.geometries[index] for index in self.query(geometry)]
+
+
+class AreaIndex:
+    """ A spatial index of an area, which speeds up repeated intersection tests of many polygons against the same area
+
+    It consists of a prepared geometry of the entire area and an STR-tree of its component polygons. Bounding boxes
+    which are completely inside the area are accepted without computing an exact intersection and bounding boxes on
+    the boundary of the area are intersected only with components of the area which they can touch.
+
+    :param area_shape: A shape of the area
+    :type area_shape: shapely.geometry.multipolygon.MultiPolygon or shapely.geometry.polygon.Polygon
+    """
+    BLOCK_SIZE = 8
+    MAX_PIECE_VERTICES = 1000
+
+    def __init__(self, area_shape):
+        self.area_shape = area_shape
+        self.prepared_area = shapely.prepared.prep(area_shape)
+
+        self.polygons = self._get_polygons(area_shape)
+        self.tree = GeometryIndex(self.polygons)
+
+        self._edge_extent = None
+
+    @staticmethod
+    def _get_polygons(shape):
+        """ Collects all polygons of a shape
+        """
+        if isinstance(shape, Polygon):
+            return [shape] if not shape.is_empty else []
+        if isinstance(shape, (MultiPolygon, GeometryCollection)):
+            return [polygon for geo_object in shape.geoms for polygon in AreaIndex._get_polygons(geo_object)]
+        return []
+
+    def intersects(self, polygon):
+        """ Checks if a polygon intersects the area
+
+        :param polygon: A polygon in the same CRS as the area
+        :type polygon: shapely.geometry.polygon.Polygon
+        :return: `True` if the polygon intersects the area and `False` otherwise
+        :rtype: bool
+        """
+        return self.prepared_area.intersects(polygon)
+
+    def contains(self, polygon):
+        """ Checks if a polygon is completely inside the area
+
+        :param polygon: A polygon in the same CRS as the area
+        :type polygon: shapely.geometry.polygon.Polygon
+        :return: `True` if the polygon is inside the area and `False` otherwise
+        :rtype: bool
+        """
+        return self.prepared_area.contains(polygon)
+
+    def intersects_many(self, polygons):
+        """ Checks which of the given polygons intersect the area. Polygons whose envelopes don't overlap with any
+        component of the area are rejected without an exact test.
+
+        :param polygons: A list of polygons in the same CRS as the area
+        :type polygons: list(shapely.geometry.polygon.Polygon)
+        :return: A list of flags, one for each polygon
+        :rtype: list(bool)
+        """
+        return [bool(self.tree.query(polygon)) and self.prepared_area.intersects(polygon) for polygon in polygons]
+
+    def clip(self, bbox):
+        """ Calculates an intersection of a bounding box and the area. Bounding boxes on the boundary of the area are
+        clipped only with nearby components of the area, using an algorithm which is much faster than a general
+        polygon intersection.
+
+        :param bbox: A bounding box in the same CRS as the area
+        :type bbox: BBox
+        :return: A shape of intersection
+        :rtype: shapely.geometry.base.BaseGeometry
+        """
+        polygon = bbox.geometry
+        if self.prepared_area.contains(polygon):
+            return polygon
+
+        clipped_polygons = [clipped_polygon for candidate in self.tree.query_geometries(polygon)
+                            for clipped_polygon in self._get_polygons(shapely.ops.clip_by_rect(candidate, *bbox))]
+        if not clipped_polygons:
+            return polygon.intersection(self.area_shape)
+        if len(clipped_polygons) == 1:
+            return clipped_polygons[0]
+        return MultiPolygon(clipped_polygons)
+
+    def clip_bounds(self, bounds):
+        """ Calculates bounds of intersections of bounding boxes with the area. The result is the same as bounds of
+        shapes obtained with `clip`.
+
+        Bounding boxes are processed in spatial blocks. Blocks which are completely inside or outside the area are
+        resolved at once. For blocks on the boundary of the area, large components of the area are first clipped to
+        the block envelope, extended by twice the longest edge of the area, and then each bounding box is clipped only
+        with these smaller pieces. Because of the extension, all edges of the area which can intersect a bounding
+        box are the same as in the original components, therefore the result is the same up to floating point
+        rounding.
+
+        :param bounds: An array of shape `(n, 4)` with bounds of bounding boxes in the same CRS as the area
+        :type bounds: numpy.ndarray
+        :return: An array of shape `(n, 4)` with bounds of intersections. Rows of bounding boxes which don't intersect
+            the area contain NaN values.
+        :rtype: numpy.ndarray
+        """
+        bounds = np.asarray(bounds, dtype=np.float64).reshape(-1, 4)
+        clipped_bounds = np.full(bounds.shape, np.nan)
+
+        for block_rows in self._get_blocks(bounds):
+            block_bounds = bounds[block_rows]
+            block_polygon = shapely.geometry.box(*block_bounds[:, :2].min(axis=0), *block_bounds[:, 2:].max(axis=0))
+
+            if self.prepared_area.contains(block_polygon):
+                clipped_bounds[block_rows] = block_bounds
+            elif self.prepared_area.intersects(block_polygon):
+                pieces = self._get_block_pieces(block_polygon)
+                for row_index, row_bounds in zip(block_rows.tolist(), block_bounds.tolist()):
+                    clipped_bounds[row_index] = self._clip_bounds_with_pieces(row_bounds, pieces)
+
+        return clipped_bounds
+
+    def _get_edge_extent(self):
+        """ Calculates the largest extent of a single edge of area components along each axis
+        """
+        if self._edge_extent is None:
+            extent = np.zeros(2)
+            for polygon in self.polygons:
+                for ring in itertools.chain([polygon.exterior], polygon.interiors):
+                    coords = np.asarray(ring.coords)[:, :2]
+                    if len(coords) > 1:
+                        extent = np.maximum(extent, np.abs(np.diff(coords, axis=0)).max(axis=0))
+            self._edge_extent = extent
+        return self._edge_extent
+
+    def _get_blocks(self, bounds):
+        """ Groups rows of bounds into spatial blocks of about `BLOCK_SIZE` times `BLOCK_SIZE` bounding boxes
+
+        :return: A list of arrays of row indices
+        :rtype: list(numpy.ndarray)
+        """
+        if bounds.shape[0] == 0:
+            return []
+
+        sizes = np.median(bounds[:, 2:] - bounds[:, :2], axis=0)
+        block_sizes = np.maximum(self.BLOCK_SIZE * sizes, 2 * self._get_edge_extent())
+        block_sizes[block_sizes == 0] = 1
+
+        block_indices = np.floor((bounds[:, :2] - bounds[:, :2].min(axis=0)) / block_sizes).astype(np.int64)
+        _, block_ids = np.unique(block_indices, axis=0, return_inverse=True)
+        block_ids = block_ids.reshape(-1)
+
+        order = np.argsort(block_ids, kind='stable')
+        return np.split(order, np.flatnonzero(np.diff(block_ids[order])) + 1)
+
+    def _get_block_pieces(self, block_polygon):
+        """ Collects components of the area which are near a block. Large components are clipped to the extended block
+        envelope.
+        """
+        margin_x, margin_y = 2 * self._get_edge_extent()
+        min_x, min_y, max_x, max_y = block_polygon.bounds
+        min_x, min_y, max_x, max_y = min_x - margin_x, min_y - margin_y, max_x + margin_x, max_y + margin_y
+
+        pieces = []
+        for candidate in self.tree.query_geometries(block_polygon):
+            candidate_min_x, candidate_min_y, candidate_max_x, candidate_max_y = candidate.bounds
+            is_inside = min_x < candidate_min_x and min_y < candidate_min_y and candidate_max_x < max_x and \
+                candidate_max_y < max_y
+
+            if is_inside or count_vertices(candidate) <= self.MAX_PIECE_VERTICES:
+                pieces.append(candidate)
+            else:
+                pieces.extend(self._get_polygons(shapely.ops.clip_by_rect(candidate, min_x, min_y, max_x, max_y)))
+
+        return [(piece.bounds, piece) for piece in pieces]
+
+    def _clip_bounds_with_pieces(self, row_bounds, pieces):
+        """ Calculates bounds of an intersection between a bounding box and the area from nearby pieces of the area
+        """
+        min_x, min_y, max_x, max_y = row_bounds
+        polygon = shapely.geometry.box(min_x, min_y, max_x, max_y)
+        if self.prepared_area.contains(polygon):
+            return polygon.bounds
+
+        part_bounds = []
+        for (piece_min_x, piece_min_y, piece_max_x, piece_max_y), piece in pieces:
+            if piece_max_x < min_x or piece_min_x > max_x or piece_max_y < min_y or piece_min_y > max_y:
+                continue
+
+            if min_x <= piece_min_x and min_y <= piece_min_y and piece_max_x <= max_x and piece_max_y <= max_y:
+                part_bounds.append((piece_min_x, piece_min_y, piece_max_x, piece_max_y))
+            else:
+                clipped_shape = shapely.ops.clip_by_rect(piece, min_x, min_y, max_x, max_y)
+                part_bounds.extend(part.bounds for part in self._get_polygons(clipped_shape))
+
+        if not part_bounds:
+            if not self.prepared_area.intersects(polygon):
+                return np.nan, np.nan, np.nan, np.nan
+            part_bounds.append(polygon.intersection(self.area_shape).bounds)
+
+        part_bounds = np.array(part_bounds)
+        return (*part_bounds[:, :2].min(axis=0), *part_bounds[:, 2:].max(axis=0))
+
+
+def count_vertices(geometry):
+    """ Counts vertices of polygons in a geometry
+    """
+    if isinstance(geometry, Polygon):
+        return sum(len(ring.coords) for ring in itertools.chain([geometry.exterior], geometry.interiors))
+    if hasattr(geometry, 'geoms'):
+        return sum(count_vertices(part) for part in geometry.geoms)
+    return 0
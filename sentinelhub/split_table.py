@@ -0,0 +1,175 @@
+"""
+Module for storing results of an area split in columns of NumPy arrays
+"""
+
+import struct
+import zipfile
+
+import numpy as np
+
+from .constants import CRS
+from .geometry import BBox
+
+
+class SplitTable:
+    """ Bounding boxes and info dictionaries of a split stored in columns of NumPy arrays
+
+    Columns are:
+      - `bbox`, an array of shape `(n, 4)` with bounding box coordinates,
+      - `crs`, an array of shape `(n,)` with indices into `crs_codes`,
+      - `crs_codes`, an array of CRS codes,
+      - `info_fields`, an array of shape `(k, 2)` with names and types of info fields,
+      - `info.<name>` for each info field, which for `BBox` values has shape `(n, 4)` and is accompanied by a column
+        `info.<name>.crs`.
+    """
+    CHUNK_SIZE = 4096
+    FIELD_TYPES = [(bool, 'bool'), (int, 'int'), (float, 'float'), (str, 'str'), (BBox, 'bbox')]
+    FIELD_DTYPES = {'bool': np.bool_, 'int': np.int64, 'float': np.float64, 'str': str}
+
+    def __init__(self, columns):
+        """
+        :param columns: A dictionary of columns
+        :type columns: dict(str, numpy.ndarray)
+        """
+        self.columns = columns
+        self.info_fields = [tuple(field) for field in columns['info_fields'].tolist()]
+        self.crs_list = [CRS(code) for code in columns['crs_codes'].tolist()]
+
+    def __len__(self):
+        return len(self.columns['bbox'])
+
+    @classmethod
+    def from_split(cls, split_iterator):
+        """ Collects a split into columns
+
+        :param split_iterator: An iterator over pairs of a bounding box and its info dictionary
+        :type split_iterator: Iterator[(BBox, dict)]
+        :return: A split table
+        :rtype: SplitTable
+        :raises: ValueError
+        """
+        crs_indices = {}
+        bbox_rows, crs_rows = [], []
+        info_fields, info_rows = None, None
+
+        for bbox, info in split_iterator:
+            if info_fields is None:
+                info_fields = [(name, cls._get_field_type(name, value)) for name, value in info.items()]
+                info_rows = [[] for _ in info_fields]
+            elif len(info) != len(info_fields):
+                raise ValueError('All info dictionaries of a split must have the same keys')
+
+            bbox_rows.append(tuple(bbox))
+            crs_rows.append(crs_indices.setdefault(bbox.crs, len(crs_indices)))
+
+            for (name, field_type), rows in zip(info_fields, info_rows):
+                value = info[name]
+                if cls._get_field_type(name, value) != field_type:
+                    raise ValueError('Values of info field {} must all be of type {}'.format(name, field_type))
+
+                if field_type == 'bbox':
+                    rows.append((tuple(value), crs_indices.setdefault(value.crs, len(crs_indices))))
+                else:
+                    rows.append(value)
+
+        columns = {
+            'bbox': np.array(bbox_rows, dtype=np.float64).reshape(-1, 4),
+            'crs': np.array(crs_rows, dtype=np.int32),
+            'info_fields': np.array(info_fields or [], dtype=str).reshape(-1, 2)
+        }
+        for (name, field_type), rows in zip(info_fields or [], info_rows or []):
+            if field_type == 'bbox':
+                columns['info.{}'.format(name)] = np.array([coords for coords, _ in rows], dtype=np.float64)
+                columns['info.{}.crs'.format(name)] = np.array([index for _, index in rows], dtype=np.int32)
+            else:
+                columns['info.{}'.format(name)] = np.array(rows, dtype=cls.FIELD_DTYPES[field_type])
+
+        crs_codes = sorted(crs_indices, key=crs_indices.get)
+        columns['crs_codes'] = np.array([crs.value for crs in crs_codes], dtype=str)
+
+        return cls(columns)
+
+    @classmethod
+    def _get_field_type(cls, name, value):
+        """ Determines a type of an info value
+        """
+        for value_type, field_type in cls.FIELD_TYPES:
+            if isinstance(value, value_type):
+                return field_type
+        raise ValueError('Info field {} has a value of unsupported type {}'.format(name, type(value)))
+
+    def iter_rows(self, start=0, step=1):
+        """ Yields bounding boxes and info dictionaries at positions `start`, `start + step`, ... Rows are read from
+        columns in chunks.
+
+        :param start: Position of the first row
+        :type start: int
+        :param step: Distance between positions of consecutive rows
+        :type step: int
+        :return: A generator of pairs of a bounding box and its info dictionary
+        :rtype: Iterator[(BBox, dict)]
+        """
+        positions = range(start, len(self), step)
+
+        for chunk_start in range(0, len(positions), self.CHUNK_SIZE):
+            chunk_positions = positions[chunk_start: chunk_start + self.CHUNK_SIZE]
+            chunk = slice(chunk_positions.start, chunk_positions.stop, step)
+
+            bboxes = self._read_bboxes('bbox', 'crs', chunk)
+            info_values = []
+            for name, field_type in self.info_fields:
+                column_name = 'info.{}'.format(name)
+                if field_type == 'bbox':
+                    info_values.append(self._read_bboxes(column_name, '{}.crs'.format(column_name), chunk))
+                else:
+                    info_values.append(self.columns[column_name][chunk].tolist())
+
+            for row_index, bbox in enumerate(bboxes):
+                yield bbox, {name: values[row_index] for (name, _), values in zip(self.info_fields, info_values)}
+
+    def _read_bboxes(self, coords_column, crs_column, chunk):
+        """ Creates bounding boxes from a chunk of a coordinate column and a CRS column
+        """
+        crs_list = self.crs_list
+        return [BBox(tuple(coords), crs=crs_list[crs_index]) for coords, crs_index in
+                zip(self.columns[coords_column][chunk].tolist(), self.columns[crs_column][chunk].tolist())]
+
+
+NPY_HEADER_READERS = {
+    (1, 0): np.lib.format.read_array_header_1_0,
+    (2, 0): np.lib.format.read_array_header_2_0
+}
+
+
+def read_npz_columns(filename):
+    """ Reads arrays from an `npz` file. Arrays which are stored uncompressed are memory-mapped.
+
+    :param filename: Path to the file
+    :type filename: str
+    :return: A dictionary of arrays
+    :rtype: dict(str, numpy.ndarray)
+    """
+    columns = {}
+    with zipfile.ZipFile(filename) as zip_file, open(filename, 'rb') as file:
+        for zip_info in zip_file.infolist():
+            name = zip_info.filename[:-len('.npy')] if zip_info.filename.endswith('.npy') else zip_info.filename
+
+            if zip_info.compress_type == zipfile.ZIP_STORED:
+                # Data of a stored member starts after its local header, which has a fixed size of 30 bytes followed
+                # by a file name and an extra field
+                file.seek(zip_info.header_offset + 26)
+                name_length, extra_length = struct.unpack('<HH', file.read(4))
+                file.seek(zip_info.header_offset + 30 + name_length + extra_length)
+
+                read_header = NPY_HEADER_READERS.get(np.lib.format.read_magic(file))
+                if read_header is not None:
+                    shape, fortran_order, dtype = read_header(file)
+                    if shape and not dtype.hasobject and np.prod(shape) > 0:
+                        columns[name] = np.memmap(filename, dtype=dtype, mode='r', offset=file.tell(), shape=shape,
+                                                  order='F' if fortran_order else 'C')
+                        continue
+
+            with zip_file.open(zip_info) as member_file:
+                columns[name] = np.lib.format.read_array(member_file)
+
+    return columns
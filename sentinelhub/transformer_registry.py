@@ -0,0 +1,279 @@
+"""
+Module implementing a registry of cached pyproj objects which are used for transformations between coordinate reference
+systems
+"""
+import itertools
+from collections import OrderedDict, namedtuple
+from threading import Lock, local
+from weakref import WeakSet
+
+import pyproj
+
+
+class CacheInfo(namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])):
+    """ Statistics of registry caches, summed over all threads
+    """
+    __slots__ = ()
+
+    @property
+    def hit_rate(self):
+        """ A share of lookups which were served from a cache
+
+        :return: A number between 0 and 1
+        :rtype: float
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class TransformerRegistry:
+    """ A registry of pyproj projections, CRS objects and transformers
+
+    Creating pyproj objects is expensive, therefore they are cached. Because pyproj objects are not thread-safe, each
+    thread has its own caches. Each cache keeps at most `cache_size` of the most recently used objects.
+
+    By default all CRS objects use the instance obtained with `TransformerRegistry.get_instance`.
+    """
+    DEFAULT_CACHE_SIZE = 512
+
+    _INSTANCE = None
+    _INSTANCE_LOCK = Lock()
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        """
+        :param cache_size: Maximum number of objects of each type kept in a cache of a single thread
+        :type cache_size: int
+        """
+        self._validate_cache_size(cache_size)
+        self.cache_size = cache_size
+
+        self._local = local()
+        self._thread_caches = WeakSet()
+        self._lock = Lock()
+
+    @classmethod
+    def get_instance(cls):
+        """ Provides a registry instance which is shared within the process
+
+        :return: A shared transformer registry
+        :rtype: TransformerRegistry
+        """
+        with cls._INSTANCE_LOCK:
+            if cls._INSTANCE is None:
+                cls._INSTANCE = cls()
+            return cls._INSTANCE
+
+    def set_cache_size(self, cache_size):
+        """ Changes the maximum size of caches. Caches which are larger are reduced by removing the least recently used
+        objects.
+
+        :param cache_size: Maximum number of objects of each type kept in a cache of a single thread
+        :type cache_size: int
+        """
+        self._validate_cache_size(cache_size)
+        self.cache_size = cache_size
+
+        with self._lock:
+            for thread_cache in self._thread_caches:
+                thread_cache.resize(cache_size)
+
+    def get_projection(self, definition):
+        """ Provides a pyproj projection object
+
+        :param definition: A pyproj CRS definition
+        :type definition: str
+        :return: pyproj projection class
+        :rtype: pyproj.Proj
+        """
+        return self._get_thread_cache().projections.get(definition, self._create_projection)
+
+    def get_pyproj_crs(self, definition):
+        """ Provides a pyproj CRS object
+
+        :param definition: A pyproj CRS definition
+        :type definition: str
+        :return: pyproj CRS class
+        :rtype: pyproj.CRS
+        """
+        return self._get_thread_cache().crs.get(definition, pyproj.CRS)
+
+    def get_transformer(self, source_definition, target_definition):
+        """ Provides a pyproj transformer object. The object must be used only in the thread which obtained it.
+
+        :param source_definition: A pyproj definition of the source CRS
+        :type source_definition: str
+        :param target_definition: A pyproj definition of the target CRS
+        :type target_definition: str
+        :return: pyproj transformer class
+        :rtype: pyproj.Transformer
+        """
+        return self._get_thread_cache().transformers.get((source_definition, target_definition),
+                                                         self._create_transformer)
+
+    def prewarm(self, crs_list, target_crs_list=None):
+        """ Creates transformers between given CRS in the current thread, so that later transformations don't have to
+        wait for them
+
+        Because pyproj objects are not thread-safe they can't be shared with other threads. The method therefore has no
+        effect on transformations in other threads, e.g. in download workers. To prepare transformers for such threads
+        the method has to be called in each of them.
+
+        Example of preparing transformations between all UTM CRS and WGS84 or Popular Web Mercator CRS:
+
+        ``registry.prewarm([crs for crs in CRS if crs.is_utm()], [CRS.WGS84, CRS.POP_WEB])``
+
+        :param crs_list: A list of CRS
+        :type crs_list: list(CRS)
+        :param target_crs_list: If given, transformers are created between each CRS from `crs_list` and each CRS from
+            this list in both directions. Otherwise they are created between all pairs of CRS from `crs_list`.
+        :type target_crs_list: list(CRS) or None
+        """
+        definitions = [crs.get_pyproj_projection_def() for crs in crs_list]
+
+        if target_crs_list is None:
+            definition_pairs = itertools.permutations(definitions, 2)
+        else:
+            target_definitions = [crs.get_pyproj_projection_def() for crs in target_crs_list]
+            definition_pairs = itertools.chain(
+                itertools.product(definitions, target_definitions),
+                itertools.product(target_definitions, definitions)
+            )
+
+        for source_definition, target_definition in definition_pairs:
+            self.get_transformer(source_definition, target_definition)
+
+    def cache_info(self):
+        """ Collects statistics of caches of all running threads
+
+        :return: Numbers of cache hits and misses, maximal size of a cache and current number of cached objects
+        :rtype: CacheInfo
+        """
+        hits, misses, currsize = 0, 0, 0
+        with self._lock:
+            for thread_cache in self._thread_caches:
+                for cache in thread_cache:
+                    hits += cache.hits
+                    misses += cache.misses
+                    currsize += len(cache)
+
+        return CacheInfo(hits, misses, self.cache_size, currsize)
+
+    def clear(self):
+        """ Removes all cached objects and resets statistics
+        """
+        with self._lock:
+            for thread_cache in self._thread_caches:
+                thread_cache.clear()
+
+    def _get_thread_cache(self):
+        """ Provides caches of the current thread
+        """
+        try:
+            return self._local.cache
+        except AttributeError:
+            thread_cache = _ThreadCache(self.cache_size)
+            with self._lock:
+                self._thread_caches.add(thread_cache)
+            self._local.cache = thread_cache
+            return thread_cache
+
+    @staticmethod
+    def _create_projection(definition):
+        """ Creates a new projection object
+        """
+        return pyproj.Proj(definition, preserve_units=True)
+
+    def _create_transformer(self, definitions):
+        """ Creates a new transformer object from cached projections
+        """
+        source_definition, target_definition = definitions
+        return pyproj.Transformer.from_proj(self.get_projection(source_definition),
+                                            self.get_projection(target_definition), skip_equivalent=True)
+
+    @staticmethod
+    def _validate_cache_size(cache_size):
+        """ Checks that the cache size is a positive integer
+        """
+        if not isinstance(cache_size, int) or cache_size < 1:
+            raise ValueError('Parameter cache_size should be a positive integer, got {}'.format(cache_size))
+
+
+class _ThreadCache:
+    """ Caches of pyproj objects owned by a single thread
+    """
+    def __init__(self, cache_size):
+        self.projections = _LRUCache(cache_size)
+        self.crs = _LRUCache(cache_size)
+        self.transformers = _LRUCache(cache_size)
+
+    def __iter__(self):
+        return iter([self.projections, self.crs, self.transformers])
+
+    def resize(self, cache_size):
+        """ Changes the size of all caches
+        """
+        for cache in self:
+            cache.resize(cache_size)
+
+    def clear(self):
+        """ Clears all caches
+        """
+        for cache in self:
+            cache.clear()
+
+
+class _LRUCache:
+    """ A cache which removes the least recently used objects once it is full
+
+    Lookups are made by the thread owning the cache, however resizing and clearing can be done by another thread.
+    Because the underlying dictionary is modified with single atomic operations the cache never gets corrupted.
+    """
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, factory):
+        """ Returns a cached object or creates a new one by calling the factory with the key
+        """
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            value = factory(key)
+            self._data[key] = value
+            self._reduce()
+            return value
+
+        self.hits += 1
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            pass
+        return value
+
+    def resize(self, maxsize):
+        """ Sets a new maximal size
+        """
+        self.maxsize = maxsize
+        self._reduce()
+
+    def clear(self):
+        """ Removes all objects and resets statistics
+        """
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _reduce(self):
+        """ Removes the least recently used objects which don't fit into the cache
+        """
+        while len(self._data) > self.maxsize:
+            try:
+                self._data.popitem(last=False)
+            except KeyError:
+                break
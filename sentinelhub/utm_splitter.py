@@ -0,0 +1,317 @@
+"""
+Module implementing splitters of an area into bounding boxes of fixed size aligned to UTM zones or UTM grid tiles
+"""
+
+import os
+import functools
+import concurrent.futures
+import itertools
+import json
+import math
+from abc import abstractmethod
+
+import numpy as np
+import shapely.geometry
+import shapely.prepared
+from shapely.geometry import Polygon, MultiPolygon, GeometryCollection
+
+from .areas import AreaSplitter
+from .constants import CRS
+from .geometry import BBox, Geometry
+
+
+class BaseUtmSplitter(AreaSplitter):
+    """ Base splitter that returns bboxes of fixed size aligned to UTM zones or UTM grid tiles as defined by the MGRS
+
+    UTM cells can be split in parallel by multiple processes. Areas which overlap with fewer than `MIN_PARALLEL_CELLS`
+    UTM cells are always split in a single process because starting a process pool would take longer than the split.
+    """
+    MIN_PARALLEL_CELLS = 4
+
+    def __init__(self, shape_list, crs, bbox_size, workers=1, grid_size=None, simplify_tolerance=None, min_area=None):
+        """
+        :param shape_list: A list of geometrical shapes describing the area of interest
+        :type shape_list: list(shapely.geometry.multipolygon.MultiPolygon or shapely.geometry.polygon.Polygon)
+        :param crs: Coordinate reference system of the shapes in `shape_list`
+        :type crs: CRS
+        :param bbox_size: Physical size in metres of generated bounding boxes. Could be a float or tuple of floats
+        :type bbox_size: int or (int, int) or float or (float, float)
+        :param workers: Maximum number of processes which split UTM cells in parallel. If `None` it will use the number
+            of processors on the system. By default the split is done in the current process.
+        :type workers: int or None
+        :param grid_size: A cell size of a grid to which coordinates of shapes are snapped, see `AreaSplitter`
+        :type grid_size: float or None
+        :param simplify_tolerance: A tolerance of simplification of the area, see `AreaSplitter`
+        :type simplify_tolerance: float or None
+        :param min_area: Polygons and holes of the area with a smaller area are removed, see `AreaSplitter`
+        :type min_area: float or None
+        """
+        super().__init__(shape_list, crs, grid_size=grid_size, simplify_tolerance=simplify_tolerance,
+                         min_area=min_area)
+
+        if workers is not None and (not isinstance(workers, int) or workers < 1):
+            raise ValueError('Parameter workers should be a positive integer or None, got {}'.format(workers))
+
+        self.bbox_size = self._parse_split_parameters(bbox_size, allow_float=True)
+        self.workers = workers or os.cpu_count() or 1
+
+        self.shape_geometry = Geometry(self.area_shape, self.crs).transform(CRS.WGS84)
+
+        self.utm_grid = self._get_utm_polygons()
+        self._utm_cell_splits = None
+
+        self._make_split()
+
+    @abstractmethod
+    def _get_utm_polygons(self):
+        raise NotImplementedError
+
+    def _select_overlapping_cells(self, utm_geom_list, utm_prop_list, utm_bounds):
+        """ Selects UTM cells whose envelopes overlap with the envelope of the area. The order of cells is preserved.
+
+        :param utm_geom_list: Geometries of all UTM cells in WGS84
+        :type utm_geom_list: tuple(shapely.geometry.Polygon or shapely.geometry.MultiPolygon)
+        :param utm_prop_list: Properties of all UTM cells
+        :type utm_prop_list: tuple(dict)
+        :param utm_bounds: An array of shape `(n, 4)` with bounds of all UTM cells
+        :type utm_bounds: numpy.ndarray
+        :return: List of geometries and properties of selected UTM cells
+        :rtype: list
+        """
+        min_x, min_y, max_x, max_y = self.shape_geometry.geometry.bounds
+        overlaps = (utm_bounds[:, 0] <= max_x) & (utm_bounds[:, 2] >= min_x) & \
+            (utm_bounds[:, 1] <= max_y) & (utm_bounds[:, 3] >= min_y)
+
+        return [(utm_geom_list[index], dict(utm_prop_list[index])) for index in np.flatnonzero(overlaps)]
+
+    @staticmethod
+    def _get_utm_from_props(utm_dict):
+        """ Return the UTM CRS corresponding to the UTM described by the properties dictionary
+
+        :param utm_dict: Dictionary reporting name of the UTM zone and MGRS grid
+        :type utm_dict: dict
+        :return: UTM coordinate reference system
+        :rtype: sentinelhub.CRS
+        """
+        return CRS('32{}{}'.format(6 if utm_dict['direction'] == 'N' else 7, str(utm_dict['zone']).zfill(2)))
+
+    @staticmethod
+    def _align_bbox_to_size(bbox, bbox_size):
+        """ Align input bbox coordinates to be multiples of the bbox size
+
+        :param bbox: Bounding box in UTM coordinates
+        :type bbox: sentinelhub.BBox
+        :param bbox_size: Physical size in metres of generated bounding boxes
+        :type bbox_size: (float, float)
+        :return: BBox objects with coordinates multiples of the bbox size
+        :rtype: sentinelhub.BBox
+        """
+        size_x, size_y = bbox_size
+        lower_left_x, lower_left_y = bbox.lower_left
+        return BBox([(math.floor(lower_left_x / size_x) * size_x, math.floor(lower_left_y / size_y) * size_y),
+                     bbox.upper_right], crs=bbox.crs)
+
+    def _make_split(self):
+        """ Finds positions of bboxes which intersect the area in each UTM cell. Results are collected in the order of
+        UTM cells, regardless of the number of workers.
+        """
+        # the UTM MGRS grid definition contains four 0 zones at the poles (0A, 0B, 0Y, 0Z)
+        utm_cells = [utm_cell for utm_cell in self.utm_grid if utm_cell[1]['zone'] != 0]
+        area_geometry = self.shape_geometry.geometry
+
+        workers = min(self.workers, len(utm_cells))
+        if workers == 1 or len(utm_cells) < self.MIN_PARALLEL_CELLS:
+            cell_splits = _split_utm_cells(utm_cells, area_geometry, self.bbox_size)
+        else:
+            # Cells are distributed round-robin because neighbouring cells usually need a similar amount of work
+            cell_batches = [utm_cells[batch_index::workers] for batch_index in range(workers)]
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                batch_splits = executor.map(_split_utm_cells, cell_batches, itertools.repeat(area_geometry),
+                                            itertools.repeat(self.bbox_size))
+
+                cell_splits = [None] * len(utm_cells)
+                for batch_index, batch_split in enumerate(batch_splits):
+                    cell_splits[batch_index::workers] = batch_split
+
+        self._utm_cell_splits = [cell_split for cell_split in cell_splits if cell_split is not None]
+
+    def _iter_split(self):
+        """ Creates equally sized bboxes in correct UTM zone from positions found in each UTM cell
+        """
+        size_x, size_y = self.bbox_size
+        index = 0
+
+        for utm_cell_prop, (min_x, min_y), utm_crs, bbox_positions in self._utm_cell_splits:
+            for i, j in bbox_positions.tolist():
+                bbox = BBox([min_x + i * size_x, min_y + j * size_y,
+                             min_x + (i + 1) * size_x, min_y + (j + 1) * size_y], crs=utm_crs)
+                yield bbox, dict(crs=utm_crs.name,
+                                 utm_zone=str(utm_cell_prop['zone']).zfill(2),
+                                 utm_row=utm_cell_prop['row'],
+                                 direction=utm_cell_prop['direction'],
+                                 index=index,
+                                 index_x=i,
+                                 index_y=j)
+                index += 1
+
+    def get_bbox_list(self, buffer=None):
+        """ Get list of bounding boxes.
+
+        The CRS is fixed to the computed UTM CRS. This BBox splitter does not support reducing size of output
+        bounding boxes
+
+        :param buffer: A percentage of each BBox size increase. This will cause neighbouring bounding boxes to overlap.
+        :type buffer: float or None
+        :return: List of bounding boxes
+        :rtype: list(BBox)
+        """
+        return super().get_bbox_list(buffer=buffer)
+
+
+class UtmGridSplitter(BaseUtmSplitter):
+    """ Splitter that returns bounding boxes of fixed size aligned to the UTM MGRS grid
+    """
+    def _get_utm_polygons(self):
+        """ Find UTM grid zones overlapping with input area shape
+
+        The grid definition is loaded only once per process.
+
+        :return: List of geometries and properties of UTM grid zones overlapping with input area shape
+        :rtype: list
+        """
+        return self._select_overlapping_cells(*_load_utm_grid())
+
+
+class UtmZoneSplitter(BaseUtmSplitter):
+    """ Splitter that returns bounding boxes of fixed size aligned to the equator and the UTM zones.
+    """
+    LNG_MIN, LNG_MAX, LNG_UTM = -180, 180, 6
+    LAT_MIN, LAT_MAX, LAT_EQ = -80, 84, 0
+
+    def _get_utm_polygons(self):
+        """ Find UTM zones overlapping with input area shape
+
+        The returned geometry corresponds to the a triangle ranging from the equator to the north/south pole. Zone
+        geometries are created only once per process.
+
+        :return: List of geometries and properties of UTM zones overlapping with input area shape
+        :rtype: list
+        """
+        utm_zones = _create_utm_zones(self.LNG_MIN, self.LNG_MAX, self.LNG_UTM, self.LAT_MIN, self.LAT_MAX,
+                                      self.LAT_EQ)
+        return self._select_overlapping_cells(*utm_zones)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_utm_grid():
+    """ Loads the UTM MGRS grid definition
+
+    :return: Geometries and properties of UTM grid zones together with an array of their bounds
+    :rtype: (tuple, tuple, numpy.ndarray)
+    """
+    # file downloaded from faculty.baruch.cuny.edu/geoportal/data/esri/world/utmzone.zip
+    utm_grid_filename = os.path.join(os.path.dirname(__file__), '.utmzones.geojson')
+
+    if not os.path.isfile(utm_grid_filename):
+        raise IOError('UTM grid definition file does not exist: %s' % os.path.abspath(utm_grid_filename))
+
+    with open(utm_grid_filename) as utm_grid_file:
+        utm_grid = json.load(utm_grid_file)['features']
+
+    utm_geom_list = tuple(shapely.geometry.shape(utm_zone['geometry']) for utm_zone in utm_grid)
+    utm_prop_list = tuple(dict(zone=utm_zone['properties']['ZONE'],
+                               row=utm_zone['properties']['ROW_'],
+                               direction='N' if utm_zone['properties']['ROW_'] >= 'N' else 'S')
+                          for utm_zone in utm_grid)
+
+    return utm_geom_list, utm_prop_list, _get_bounds_array(utm_geom_list)
+
+
+@functools.lru_cache(maxsize=1)
+def _create_utm_zones(lng_min, lng_max, lng_utm, lat_min, lat_max, lat_eq):
+    """ Creates geometries of UTM zones, split at the equator
+
+    :return: Geometries and properties of UTM zones together with an array of their bounds
+    :rtype: (tuple, tuple, numpy.ndarray)
+    """
+    utm_geom_list = []
+    for lat in [(lat_eq, lat_max), (lat_min, lat_eq)]:
+        for lng in range(lng_min, lng_max, lng_utm):
+            points = []
+            # A new point is added per each degree - this is inline with geometries used by UtmGridSplitter
+            # In the future the number of points will be calculated according to bbox_size parameter
+            for degree in range(lat[0], lat[1]):
+                points.append((lng, degree))
+            for degree in range(lng, lng + lng_utm):
+                points.append((degree, lat[1]))
+            for degree in range(lat[1], lat[0], -1):
+                points.append((lng + lng_utm, degree))
+            for degree in range(lng + lng_utm, lng, -1):
+                points.append((degree, lat[0]))
+
+            utm_geom_list.append(Polygon(points))
+
+    utm_prop_list = tuple(dict(zone=zone, row='', direction=direction)
+                          for direction in ['N', 'S'] for zone in range(1, 61))
+
+    return tuple(utm_geom_list), utm_prop_list, _get_bounds_array(utm_geom_list)
+
+
+def _split_utm_cells(utm_cells, area_geometry, bbox_size):
+    """ Splits each UTM cell into equally sized bboxes in its UTM zone and finds the ones which intersect the area. The
+    function is executed by worker processes of `BaseUtmSplitter`.
+
+    :param utm_cells: A list of geometries and properties of UTM cells
+    :type utm_cells: list
+    :param area_geometry: Geometry of the area in WGS84
+    :type area_geometry: shapely.geometry.Polygon or shapely.geometry.MultiPolygon
+    :param bbox_size: Physical size in metres of generated bounding boxes
+    :type bbox_size: (float, float)
+    :return: For each UTM cell either `None` if it doesn't intersect the area or a tuple of cell properties, origin of
+        the bbox partition, UTM CRS and an array of shape `(n, 2)` with partition column and row indices of bboxes
+    :rtype: list(tuple or None)
+    """
+    return [_split_utm_cell(utm_cell_geom, utm_cell_prop, area_geometry, bbox_size)
+            for utm_cell_geom, utm_cell_prop in utm_cells]
+
+
+def _split_utm_cell(utm_cell_geom, utm_cell_prop, area_geometry, bbox_size):
+    """ Splits a single UTM cell into equally sized bboxes, see `_split_utm_cells`
+
+    :return: `None` if the cell doesn't intersect the area or a tuple of cell properties, origin of the bbox partition,
+        UTM CRS and an array of partition column and row indices of bboxes
+    :rtype: tuple or None
+    """
+    # pylint: disable=protected-access
+    intersection = utm_cell_geom.intersection(area_geometry)
+
+    if not intersection.is_empty and isinstance(intersection, GeometryCollection):
+        intersection = MultiPolygon(geo_object for geo_object in intersection
+                                    if isinstance(geo_object, (Polygon, MultiPolygon)))
+
+    if intersection.is_empty:
+        return None
+
+    utm_crs = BaseUtmSplitter._get_utm_from_props(utm_cell_prop)
+    intersection = Geometry(intersection, CRS.WGS84).transform(utm_crs)
+    prepared_intersection = shapely.prepared.prep(intersection.geometry)
+
+    size_x, size_y = bbox_size
+    min_x, min_y, max_x, max_y = BaseUtmSplitter._align_bbox_to_size(intersection.bbox, bbox_size)
+    # The same partition as `BBox.get_partition` with given sizes
+    columns, rows = math.ceil((max_x - min_x) / size_x), math.ceil((max_y - min_y) / size_y)
+
+    bbox_positions = []
+    for i, j in itertools.product(range(columns), range(rows)):
+        bbox_polygon = shapely.geometry.box(min_x + i * size_x, min_y + j * size_y,
+                                            min_x + (i + 1) * size_x, min_y + (j + 1) * size_y)
+        if prepared_intersection.intersects(bbox_polygon):
+            bbox_positions.append((i, j))
+
+    return utm_cell_prop, (min_x, min_y), utm_crs, np.array(bbox_positions, dtype=np.int64).reshape(-1, 2)
+
+
+def _get_bounds_array(geometries):
+    """ Collects bounds of geometries into an array of shape `(n, 4)`
+    """
+    return np.array([geometry.bounds for geometry in geometries], dtype=np.float64).reshape(-1, 4)
@@ -0,0 +1,268 @@
+"""
+Module implementing a persistent cache of tile metadata obtained from Sentinel Hub WFS service
+"""
+import datetime
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+import dateutil.parser
+import shapely.geometry
+
+
+class WfsCache:
+    """ A local SQLite store of features obtained from Sentinel Hub WFS service
+
+    Features are stored together with records of which areas and time ranges they fully cover. A query therefore has to
+    fetch from the service only the parts of its time interval which are not yet covered for its bounding box, while
+    the rest is answered locally with the help of a spatial index of feature footprints. Because new acquisitions
+    appear in the service with a delay, the most recent part of each fetched time interval is not recorded as covered
+    and is fetched again by the next query.
+
+    Results of queries for the latest acquisition only are stored separately and expire after `latest_ttl_seconds`.
+
+    Features are stored under a query key, which identifies the service, data source, cloud coverage threshold and CRS
+    of a query. Features of different query keys are never mixed.
+    """
+    FILENAME = 'wfs_cache.sqlite'
+
+    def __init__(self, cache_folder, latest_ttl_seconds=3600, ingestion_delay=datetime.timedelta(days=1)):
+        """
+        :param cache_folder: A folder where the cache database is stored
+        :type cache_folder: str
+        :param latest_ttl_seconds: Number of seconds for which results of queries for the latest acquisition are valid
+        :type latest_ttl_seconds: int
+        :param ingestion_delay: Time ranges which end less than this long before the time of a query are not recorded
+            as covered
+        :type ingestion_delay: datetime.timedelta
+        """
+        self.cache_folder = os.path.expanduser(cache_folder)
+        self.filename = os.path.join(self.cache_folder, self.FILENAME)
+        self.latest_ttl_seconds = latest_ttl_seconds
+        self.ingestion_delay = ingestion_delay
+
+        self._is_initialized = False
+
+    @staticmethod
+    def get_query_key(*values):
+        """ Joins values identifying a WFS query into a single query key
+
+        :param values: Values such as service URL, WFS type name, cloud coverage threshold and CRS
+        :return: A query key
+        :rtype: str
+        """
+        return json.dumps([str(value) for value in values])
+
+    def get_missing_intervals(self, query_key, bbox, time_interval):
+        """ Finds parts of a time interval for which features intersecting the bounding box have not been stored yet
+
+        :param query_key: A key of the query
+        :type query_key: str
+        :param bbox: A bounding box of the query
+        :type bbox: BBox
+        :param time_interval: A pair of start and end time in ISO 8601 format
+        :type time_interval: (str, str)
+        :return: A list of missing time intervals, ordered from the latest to the earliest
+        :rtype: list((str, str))
+        """
+        start_time, end_time = [_normalize_time(time_value) for time_value in time_interval]
+
+        with self._connect() as connection:
+            covered_intervals = connection.execute(
+                'SELECT start_time, end_time FROM coverage WHERE query_key = ? AND min_x <= ? AND min_y <= ? AND '
+                'max_x >= ? AND max_y >= ? AND end_time >= ? AND start_time <= ? ORDER BY start_time',
+                (query_key, *bbox, start_time, end_time)
+            ).fetchall()
+
+        missing_intervals = []
+        for covered_start, covered_end in covered_intervals:
+            if covered_start > start_time:
+                missing_intervals.append((start_time, covered_start))
+            start_time = max(start_time, covered_end)
+        if start_time < end_time or not covered_intervals:
+            missing_intervals.append((start_time, end_time))
+
+        return missing_intervals[::-1]
+
+    def add_features(self, query_key, bbox, time_interval, features, query_time=None):
+        """ Stores features obtained from the service for a bounding box and a time interval and records that the
+        interval is covered, except for its part within `ingestion_delay` of the query time
+
+        :param query_key: A key of the query
+        :type query_key: str
+        :param bbox: A bounding box of the query
+        :type bbox: BBox
+        :param time_interval: A pair of start and end time in ISO 8601 format
+        :type time_interval: (str, str)
+        :param features: A list of features in the order returned by the service
+        :type features: list(dict)
+        :param query_time: A UTC time when the query was sent to the service. By default it is the current time.
+        :type query_time: datetime.datetime or None
+        """
+        query_time = query_time or datetime.datetime.utcnow()
+        start_time, end_time = [_normalize_time(time_value) for time_value in time_interval]
+        covered_end_time = min(end_time, (query_time - self.ingestion_delay).isoformat())
+
+        with self._connect() as connection:
+            for feature in features:
+                feature_key = hashlib.sha1(json.dumps(feature['properties'], sort_keys=True).encode()).hexdigest()
+                geometry = _get_geometry(feature)
+                bounds = tuple(bbox) if geometry is None else geometry.bounds
+
+                cursor = connection.execute(
+                    'INSERT OR IGNORE INTO features (query_key, feature_key, acquisition_time, feature) '
+                    'VALUES (?, ?, ?, ?)', (query_key, feature_key, _get_acquisition_time(feature), json.dumps(feature))
+                )
+                if cursor.rowcount:
+                    connection.execute('INSERT INTO feature_index VALUES (?, ?, ?, ?, ?)',
+                                       (cursor.lastrowid, bounds[0], bounds[2], bounds[1], bounds[3]))
+
+            if start_time <= covered_end_time:
+                connection.execute('INSERT INTO coverage (query_key, min_x, min_y, max_x, max_y, start_time, end_time) '
+                                   'VALUES (?, ?, ?, ?, ?, ?, ?)', (query_key, *bbox, start_time, covered_end_time))
+
+    def get_features(self, query_key, bbox, time_interval):
+        """ Collects stored features which intersect the bounding box and were acquired in the time interval
+
+        :param query_key: A key of the query
+        :type query_key: str
+        :param bbox: A bounding box of the query
+        :type bbox: BBox
+        :param time_interval: A pair of start and end time in ISO 8601 format
+        :type time_interval: (str, str)
+        :return: A list of features from the latest to the earliest acquisition
+        :rtype: list(dict)
+        """
+        start_time, end_time = [_normalize_time(time_value) for time_value in time_interval]
+        min_x, min_y, max_x, max_y = bbox
+
+        with self._connect() as connection:
+            rows = connection.execute(
+                'SELECT features.feature FROM features JOIN feature_index '
+                'ON features.id = feature_index.id WHERE features.query_key = ? AND feature_index.min_x <= ? AND '
+                'feature_index.max_x >= ? AND feature_index.min_y <= ? AND feature_index.max_y >= ? AND '
+                '(features.acquisition_time IS NULL OR features.acquisition_time BETWEEN ? AND ?) '
+                'ORDER BY features.acquisition_time DESC, features.id',
+                (query_key, max_x, min_x, max_y, min_y, start_time, end_time)
+            ).fetchall()
+
+        features = []
+        for feature_json, in rows:
+            feature = json.loads(feature_json)
+            geometry = _get_geometry(feature)
+            if geometry is None or geometry.intersects(bbox.geometry):
+                features.append(feature)
+
+        return features
+
+    def get_latest(self, query_key, bbox):
+        """ Provides a stored result of a query for the latest acquisition if it hasn't expired yet
+
+        :param query_key: A key of the query
+        :type query_key: str
+        :param bbox: A bounding box of the query
+        :type bbox: BBox
+        :return: A list of features or `None` if there is no valid stored result
+        :rtype: list(dict) or None
+        """
+        with self._connect() as connection:
+            row = connection.execute('SELECT query_time, features FROM latest WHERE query_key = ? AND bbox = ?',
+                                     (query_key, str(bbox))).fetchone()
+
+        if row is None or time.time() - row[0] > self.latest_ttl_seconds:
+            return None
+        return json.loads(row[1])
+
+    def set_latest(self, query_key, bbox, features):
+        """ Stores a result of a query for the latest acquisition
+
+        :param query_key: A key of the query
+        :type query_key: str
+        :param bbox: A bounding box of the query
+        :type bbox: BBox
+        :param features: A list of features obtained from the service
+        :type features: list(dict)
+        """
+        with self._connect() as connection:
+            connection.execute('INSERT OR REPLACE INTO latest (query_key, bbox, query_time, features) '
+                               'VALUES (?, ?, ?, ?)', (query_key, str(bbox), time.time(), json.dumps(features)))
+
+    def clear(self):
+        """ Removes all stored features, coverage records and results of queries for the latest acquisition
+        """
+        with self._connect() as connection:
+            for table in ['features', 'feature_index', 'coverage', 'latest']:
+                connection.execute('DELETE FROM {}'.format(table))
+
+    def _connect(self):
+        """ Opens a connection to the database, creating it if it doesn't exist yet. The connection commits a
+        transaction when it is used as a context manager and is closed afterwards.
+        """
+        if not self._is_initialized:
+            os.makedirs(self.cache_folder, exist_ok=True)
+            with _Connection(self.filename) as connection:
+                connection.executescript(
+                    'CREATE TABLE IF NOT EXISTS features (id INTEGER PRIMARY KEY, query_key TEXT NOT NULL, '
+                    'feature_key TEXT NOT NULL, acquisition_time TEXT, feature TEXT NOT NULL, '
+                    'UNIQUE (query_key, feature_key));'
+                    'CREATE INDEX IF NOT EXISTS features_time ON features (query_key, acquisition_time);'
+                    'CREATE VIRTUAL TABLE IF NOT EXISTS feature_index USING rtree (id, min_x, max_x, min_y, max_y);'
+                    'CREATE TABLE IF NOT EXISTS coverage (id INTEGER PRIMARY KEY, query_key TEXT NOT NULL, '
+                    'min_x REAL, min_y REAL, max_x REAL, max_y REAL, start_time TEXT, end_time TEXT);'
+                    'CREATE INDEX IF NOT EXISTS coverage_key ON coverage (query_key);'
+                    'CREATE TABLE IF NOT EXISTS latest (query_key TEXT NOT NULL, bbox TEXT NOT NULL, query_time REAL, '
+                    'features TEXT, PRIMARY KEY (query_key, bbox));'
+                )
+            self._is_initialized = True
+
+        return _Connection(self.filename)
+
+
+class _Connection:
+    """ A context manager which opens an SQLite connection, commits or rolls back the transaction and closes the
+    connection
+    """
+    TIMEOUT = 60
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._connection = None
+
+    def __enter__(self):
+        self._connection = sqlite3.connect(self.filename, timeout=self.TIMEOUT)
+        return self._connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self._connection.commit()
+            else:
+                self._connection.rollback()
+        finally:
+            self._connection.close()
+
+
+def _normalize_time(time_value):
+    """ Converts a time in ISO 8601 format into a form which can be compared as a string
+    """
+    return dateutil.parser.parse(time_value).replace(tzinfo=None).isoformat()
+
+
+def _get_acquisition_time(feature):
+    """ Provides the acquisition time of a feature in ISO 8601 format or `None` if it doesn't have one
+    """
+    properties = feature['properties']
+    if not properties.get('date'):
+        return None
+    return '{}T{}'.format(properties['date'], properties.get('time') or '00:00:00')
+
+
+def _get_geometry(feature):
+    """ Parses the footprint of a feature. Coordinates are in the order of axes of the query CRS, the same as everywhere
+    else in the package.
+    """
+    if not feature.get('geometry'):
+        return None
+    return shapely.geometry.shape(feature['geometry'])
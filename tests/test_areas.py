@@ -1,11 +1,18 @@
 import unittest
 import os
 import itertools
+import json
+from unittest import mock
 
+import numpy as np
 import shapely.geometry
 
 from sentinelhub import BBoxSplitter, OsmSplitter, TileSplitter, CustomGridSplitter, BBox, read_data, CRS, \
-    DataSource, TestSentinelHub, UtmGridSplitter, UtmZoneSplitter
+    DataSource, TestSentinelHub, UtmGridSplitter, UtmZoneSplitter, AdaptiveSplitter, BBoxArray, WebFeatureService, \
+    SHConfig
+from sentinelhub.areas import AreaSplitter
+from sentinelhub.spatial_index import AreaIndex
+from sentinelhub.utm_splitter import _load_utm_grid
 
 
 class TestAreaSplitters(TestSentinelHub):
@@ -65,5 +72,332 @@ class TestAreaSplitters(TestSentinelHub):
                                         "Expected items of type {}, got {}".format(item_type, type(return_item)))
 
 
+class TestIterSplit(TestSentinelHub):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        geojson = read_data(os.path.join(cls.INPUT_FOLDER, 'cies_islands.json'))
+        area = shapely.geometry.shape(geojson)
+
+        cls.splitter_factories = [
+            lambda: BBoxSplitter([area], CRS.WGS84, (7, 5)),
+            lambda: OsmSplitter([area], CRS.WGS84, 15),
+            lambda: UtmZoneSplitter([area], CRS.WGS84, bbox_size=1000)
+        ]
+
+    def test_iter_split(self):
+        for splitter_factory in self.splitter_factories:
+            splitter = splitter_factory()
+            with self.subTest(msg='Splitter {}'.format(splitter.__class__.__name__)):
+                split = list(splitter.iter_split())
+                self.assertIsNone(splitter._bbox_list, msg='Iteration should not create a list of bounding boxes')
+
+                self.assertEqual(split, list(zip(splitter.get_bbox_list(), splitter.get_info_list())))
+                self.assertEqual(list(splitter.iter_split()), split)
+
+                self.assertEqual(list(splitter_factory().iter_split(offset=7)), split[7:])
+
+                shards = [list(splitter_factory().iter_split(offset=3, shard_index=index, num_shards=4))
+                          for index in range(4)]
+                self.assertEqual(shards[1], split[5::4])
+                self.assertEqual(sorted(itertools.chain(*shards), key=split.index), split[3:])
+
+    def test_save_and_load(self):
+        filename = os.path.join(self.OUTPUT_FOLDER, 'split.npz')
+
+        for splitter_factory in self.splitter_factories:
+            splitter = splitter_factory()
+            with self.subTest(msg='Splitter {}'.format(splitter.__class__.__name__)):
+                splitter.save(filename)
+                loaded_splitter = AreaSplitter.load(filename)
+
+                self.assertIsInstance(loaded_splitter, splitter.__class__)
+                self.assertEqual(loaded_splitter.crs, splitter.crs)
+                self.assertEqual(list(loaded_splitter.iter_split(offset=3, shard_index=1, num_shards=2)),
+                                 list(splitter.iter_split(offset=3, shard_index=1, num_shards=2)))
+                self.assertEqual(loaded_splitter.get_bbox_list(), splitter.get_bbox_list())
+                self.assertEqual(loaded_splitter.get_info_list(), splitter.get_info_list())
+                self.assertEqual(loaded_splitter.get_geometry_list(), splitter.get_geometry_list())
+
+        with self.assertRaises(ValueError):
+            OsmSplitter.load(filename)
+
+    def test_load_splitter_state(self):
+        filename = os.path.join(self.OUTPUT_FOLDER, 'split.npz')
+        area = self.splitter_factories[0]().shape_list[0]
+
+        osm_splitter = self.splitter_factories[1]()
+        osm_splitter.save(filename)
+        loaded_splitter = AreaSplitter.load(filename)
+        self.assertEqual(loaded_splitter.zoom_level, 15)
+        self.assertEqual(loaded_splitter.get_tile_array().tolist(), osm_splitter.get_tile_array().tolist())
+
+        tile_list = [{
+            'type': 'Feature',
+            'geometry': shapely.geometry.mapping(shapely.geometry.MultiPolygon([tile_box])),
+            'properties': {'id': tile_name, 'date': date, 'time': '11:22:33', 'crs': 'EPSG:4326',
+                           'mbr': ','.join(map(str, tile_box.bounds)),
+                           'path': 's3://sentinel-s2-l1c/tiles/{}/{}/{}/2017/10/5/0'.format(*tile_name)}
+        } for tile_name, date, tile_box in [(('29', 'T', 'NG'), '2017-10-05', shapely.geometry.box(-9, 42, -8.5, 42.5)),
+                                            (('29', 'T', 'NG'), '2017-10-10', shapely.geometry.box(-9, 42, -8.5, 42.5)),
+                                            (('29', 'T', 'MG'), '2017-10-10', shapely.geometry.box(-9, 41, -8, 42.1))]]
+
+        config = SHConfig()
+        config.instance_id = 'test-instance'
+
+        def create_wfs_iterator(bbox, time_interval, **kwargs):
+            return WebFeatureService.from_tile_list(bbox, time_interval, tile_list, **kwargs)
+
+        with mock.patch('sentinelhub.areas.WebFeatureService', new=create_wfs_iterator):
+            tile_splitter = TileSplitter([area], CRS.WGS84, ('2017-10-01', '2017-10-31'), tile_split_shape=2,
+                                         config=config)
+
+        tile_splitter.save(filename)
+        loaded_splitter = AreaSplitter.load(filename)
+        self.assertIsInstance(loaded_splitter, TileSplitter)
+        self.assertEqual(list(loaded_splitter.iter_split()), list(tile_splitter.iter_split()))
+
+        tile_dict = loaded_splitter.get_tile_dict()
+        self.assertEqual(tile_dict.keys(), tile_splitter.get_tile_dict().keys())
+        for tile_name, tile_props in tile_splitter.get_tile_dict().items():
+            self.assertEqual(tile_dict[tile_name]['bbox'], tile_props['bbox'])
+            self.assertEqual(tile_dict[tile_name]['times'], tile_props['times'])
+            self.assertTrue(all(loaded_geometry.equals(geometry) for loaded_geometry, geometry in
+                                zip(tile_dict[tile_name]['geometries'], tile_props['geometries'])))
+
+    def test_load_unknown_splitter(self):
+        filename = os.path.join(self.OUTPUT_FOLDER, 'split.npz')
+        splitter = self.splitter_factories[0]()
+        splitter.save(filename)
+
+        columns = dict(np.load(filename))
+        metadata = json.loads(str(columns['metadata']))
+        for splitter_name in ['os.system', 'sentinelhub.spatial_index.AreaIndex', 'unknown_module.BBoxSplitter']:
+            with self.subTest(msg='Splitter {}'.format(splitter_name)):
+                metadata['splitter'] = splitter_name
+                columns['metadata'] = np.array(json.dumps(metadata))
+                np.savez(filename, **columns)
+
+                with self.assertRaises(ValueError):
+                    AreaSplitter.load(filename)
+
+    def test_legacy_splitter(self):
+
+        class LegacySplitter(AreaSplitter):
+
+            def __init__(self, shape_list, crs, split_shape):
+                super().__init__(shape_list, crs)
+                self.split_shape = split_shape
+                self._make_split()
+
+            def _make_split(self):
+                bbox_splitter = BBoxSplitter(self.shape_list, self.crs, self.split_shape)
+                self.bbox_list = bbox_splitter.get_bbox_list()
+                self.info_list = bbox_splitter.get_info_list()
+
+        expected_split = list(self.splitter_factories[0]().iter_split())
+
+        splitter = LegacySplitter(self.splitter_factories[0]().shape_list, CRS.WGS84, (7, 5))
+        self.assertEqual(list(splitter.iter_split(offset=2)), expected_split[2:])
+        self.assertEqual(list(zip(splitter.get_bbox_list(), splitter.get_info_list())), expected_split)
+
+        splitter.bbox_list, splitter.info_list = None, None
+        self.assertEqual(splitter.get_bbox_list(), [bbox for bbox, _ in expected_split])
+
+        class EmptySplitter(AreaSplitter):
+            pass
+
+        with self.assertRaises(NotImplementedError):
+            EmptySplitter(splitter.shape_list, CRS.WGS84).get_bbox_list()
+
+    def test_iter_split_parameters(self):
+        splitter = self.splitter_factories[0]()
+        for kwargs in [{'offset': -1}, {'num_shards': 0}, {'shard_index': 2, 'num_shards': 2}, {'shard_index': -1}]:
+            with self.subTest(msg='Parameters {}'.format(kwargs)):
+                with self.assertRaises(ValueError):
+                    splitter.iter_split(**kwargs)
+
+
+class TestAdaptiveSplitter(TestSentinelHub):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        geojson = read_data(os.path.join(cls.INPUT_FOLDER, 'cies_islands.json'))
+        cls.area = shapely.geometry.shape(geojson)
+
+    def test_adaptive_split(self):
+        test_cases = [
+            ('pixels', {'cost_function': 'pixels', 'resolution': 10, 'max_cost': 100000}),
+            ('covered pixels', {'cost_function': 'covered_pixels', 'resolution': 10, 'max_cost': 20000}),
+            ('vertices', {'cost_function': 'vertices', 'max_cost': 30}),
+            ('custom', {'cost_function': lambda bbox, geometry: geometry.area * 1e6, 'max_cost': 1})
+        ]
+
+        for name, kwargs in test_cases:
+            with self.subTest(msg='Test case {}'.format(name)):
+                splitter = AdaptiveSplitter([self.area], CRS.WGS84, **kwargs)
+                merged_splitter = AdaptiveSplitter([self.area], CRS.WGS84, merge_siblings=True, **kwargs)
+
+                for tested_splitter in [splitter, merged_splitter]:
+                    info_list = tested_splitter.get_info_list()
+                    self.assertTrue(all(info['cost'] <= kwargs['max_cost'] for info in info_list))
+
+                    covered_area = sum(geometry.area for geometry in tested_splitter.get_geometry_list())
+                    self.assertAlmostEqual(covered_area, self.area.area, delta=1e-12)
+
+                self.assertGreater(len(splitter.get_bbox_list()), 1)
+                self.assertLess(len(merged_splitter.get_bbox_list()), len(splitter.get_bbox_list()))
+                self.assertTrue(any(info['num_x'] + info['num_y'] == 3 for info in merged_splitter.get_info_list()))
+
+    def test_max_depth(self):
+        splitter = AdaptiveSplitter([self.area], CRS.WGS84, max_cost=0, cost_function='vertices', max_depth=3)
+        self.assertEqual({info['level'] for info in splitter.get_info_list()}, {3})
+
+    def test_parameters(self):
+        for kwargs in [{'cost_function': 'pixels'}, {'cost_function': 'unknown'},
+                       {'cost_function': 'vertices', 'max_depth': -1}]:
+            with self.subTest(msg='Parameters {}'.format(kwargs)):
+                with self.assertRaises(ValueError):
+                    AdaptiveSplitter([self.area], CRS.WGS84, max_cost=1, **kwargs)
+
+
+class TestAreaIndex(TestSentinelHub):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        geojson = read_data(os.path.join(cls.INPUT_FOLDER, 'cies_islands.json'))
+        cls.area = shapely.geometry.shape(geojson)
+        cls.bbox_list = [bbox for bbox_column in BBox(cls.area.bounds, CRS.WGS84).get_partition(num_x=20, num_y=20)
+                         for bbox in bbox_column]
+
+    def test_intersects(self):
+        area_index = AreaIndex(self.area)
+
+        expected_flags = [bbox.geometry.intersects(self.area) for bbox in self.bbox_list]
+        self.assertEqual(area_index.intersects_many([bbox.geometry for bbox in self.bbox_list]), expected_flags)
+        self.assertEqual([area_index.intersects(bbox.geometry) for bbox in self.bbox_list], expected_flags)
+        self.assertTrue(any(expected_flags) and not all(expected_flags))
+
+    def test_clip(self):
+        area_index = AreaIndex(self.area)
+
+        for bbox in self.bbox_list:
+            expected_shape = bbox.geometry.intersection(self.area)
+            clipped_shape = area_index.clip(bbox)
+            self.assertAlmostEqual(clipped_shape.area, expected_shape.area, delta=1e-12)
+            self.assertAlmostEqual(clipped_shape.symmetric_difference(expected_shape).area, 0, delta=1e-12)
+
+    def test_clip_bounds(self):
+        area_index = AreaIndex(self.area)
+        bbox_array = BBoxArray([tuple(bbox) for bbox in self.bbox_list], crs=CRS.WGS84)
+
+        clipped_bounds = area_index.clip_bounds(bbox_array.array)
+        for bbox, bounds in zip(self.bbox_list, clipped_bounds):
+            expected_shape = bbox.geometry.intersection(self.area)
+            if expected_shape.is_empty:
+                self.assertTrue(np.isnan(bounds).all())
+            else:
+                np.testing.assert_allclose(bounds, expected_shape.bounds, atol=1e-12)
+
+    def test_get_bbox_list(self):
+        splitter = BBoxSplitter([self.area], CRS.WGS84, (10, 10), reduce_bbox_sizes=True)
+        bbox_list = splitter.get_bbox_list(reduce_bbox_sizes=False)
+
+        reduced_bbox_list = splitter.get_bbox_list(buffer=0.2, crs=CRS.POP_WEB)
+        for bbox, reduced_bbox in zip(bbox_list, reduced_bbox_list):
+            expected_bounds = bbox.buffer(0.2).geometry.intersection(self.area).bounds
+            expected_bbox = BBox(expected_bounds, CRS.WGS84).transform(CRS.POP_WEB)
+            self.assertEqual(reduced_bbox.crs, CRS.POP_WEB)
+            np.testing.assert_allclose(list(reduced_bbox), list(expected_bbox), atol=1e-6)
+
+
+class TestAreaPreprocessing(TestSentinelHub):
+
+    def test_preprocessing(self):
+        square = shapely.geometry.box(0, 0, 10, 10)
+        shape_list = [
+            shapely.geometry.Polygon(square.exterior, [shapely.geometry.box(1, 1, 1.1, 1.1).exterior]),
+            shapely.geometry.box(10.0001, 0, 20, 10),
+            shapely.geometry.box(30, 30, 30.1, 30.1)
+        ]
+
+        splitter = BBoxSplitter(shape_list, CRS.POP_WEB, 2)
+        self.assertEqual(len(splitter.get_area_shape().geoms), 3)
+
+        splitter = BBoxSplitter(shape_list, CRS.POP_WEB, 2, grid_size=0.01, simplify_tolerance=0.01, min_area=0.1)
+        area_shape = splitter.get_area_shape()
+        self.assertTrue(area_shape.equals(shapely.geometry.box(0, 0, 20, 10)))
+        self.assertEqual(len(area_shape.exterior.coords), 5)
+        self.assertEqual(splitter.get_bbox_list()[0].crs, CRS.POP_WEB)
+
+    def test_parameters(self):
+        area = shapely.geometry.box(0, 0, 1, 1)
+        for parameters in [{'grid_size': 0}, {'simplify_tolerance': -1}, {'min_area': 'big'}, {'min_area': 2},
+                           {'grid_size': 10}]:
+            with self.subTest(msg='Parameters {}'.format(parameters)):
+                with self.assertRaises(ValueError):
+                    BBoxSplitter([area], CRS.WGS84, 2, **parameters)
+
+
+class TestOsmSplitter(TestSentinelHub):
+
+    def test_closed_form_split(self):
+        geojson = read_data(os.path.join(self.INPUT_FOLDER, 'cies_islands.json'))
+        area = shapely.geometry.shape(geojson)
+
+        for zoom_level in [0, 5, 14, 17]:
+            with self.subTest(msg='Zoom level {}'.format(zoom_level)):
+                splitter = OsmSplitter([area, shapely.geometry.box(-8.5, 42, -8, 42.1)], CRS.WGS84, zoom_level)
+                bbox_list, info_list = splitter.get_bbox_list(), splitter.get_info_list()
+
+                tile_array = splitter.get_tile_array()
+                self.assertEqual(tile_array.shape, (len(bbox_list), 3))
+                self.assertEqual(tile_array.tolist(), [[info['index_x'], info['index_y'], info['zoom_level']]
+                                                       for info in info_list])
+
+                splitter.bbox_list, splitter.info_list = [], []
+                splitter._recursive_split(splitter.get_world_bbox(), 0, 0, 0)
+                self.assertEqual(bbox_list, [bbox.transform(CRS.WGS84) for bbox in splitter.bbox_list])
+                self.assertEqual(info_list, splitter.info_list)
+
+
+class TestUtmGrid(TestSentinelHub):
+
+    def test_utm_cell_selection(self):
+        geojson = read_data(os.path.join(self.INPUT_FOLDER, 'cies_islands.json'))
+        area = shapely.geometry.shape(geojson)
+
+        for splitter_class, expected_cells in [(UtmGridSplitter, [(29, 'T')]), (UtmZoneSplitter, [(29, '')])]:
+            with self.subTest(msg='Test case {}'.format(splitter_class.__name__)):
+                splitter = splitter_class([area], CRS.WGS84, bbox_size=5000)
+                cells = [(utm_prop['zone'], utm_prop['row']) for _, utm_prop in splitter.utm_grid]
+                self.assertEqual(cells, expected_cells)
+
+        self.assertIs(_load_utm_grid(), _load_utm_grid(), 'UTM grid should be loaded only once')
+
+    def test_parallel_split(self):
+        area = shapely.geometry.Point(6, 0).buffer(4)
+
+        for splitter_class in [UtmGridSplitter, UtmZoneSplitter]:
+            with self.subTest(msg='Test case {}'.format(splitter_class.__name__)):
+                serial_splitter = splitter_class([area], CRS.WGS84, bbox_size=50000)
+                parallel_splitter = splitter_class([area], CRS.WGS84, bbox_size=50000, workers=2)
+
+                self.assertGreaterEqual(len(parallel_splitter.utm_grid), parallel_splitter.MIN_PARALLEL_CELLS)
+                self.assertEqual(parallel_splitter.get_bbox_list(), serial_splitter.get_bbox_list())
+                self.assertEqual(parallel_splitter.get_info_list(), serial_splitter.get_info_list())
+                self.assertEqual([info['index'] for info in parallel_splitter.get_info_list()],
+                                 list(range(len(parallel_splitter.get_bbox_list()))))
+
+        with self.assertRaises(ValueError):
+            UtmZoneSplitter([area], CRS.WGS84, bbox_size=50000, workers=0)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 
+import numpy as np
 import pyproj
 
 from sentinelhub import CRS, MimeType, TestSentinelHub
@@ -24,6 +25,21 @@ class TestCRS(TestSentinelHub):
                                  msg="Expected {}, got {} for lng={},lat={}".format(epsg, crs.value, str(lng),
                                                                                     str(lat)))
 
+    def test_utm_vectorized(self):
+        lng = np.array([13, 13, -179.9, 180, 5, 5, 8, 20, 30, 40, 50, 2.99])
+        lat = np.array([46, -0.0001, 10, 10, 60, 74, 84, 74, 74, 74, 74, 60])
+
+        utm_crs = CRS.get_utm_from_wgs84(lng, lat)
+        self.assertEqual(utm_crs.shape, lng.shape)
+        self.assertEqual(list(utm_crs), [CRS.get_utm_from_wgs84(*point) for point in zip(lng, lat)])
+
+        utm_crs = CRS.get_utm_from_wgs84(lng.reshape(3, 4), 10)
+        self.assertEqual(utm_crs.shape, (3, 4))
+
+        for lng, lat in [([13, 13], [46, 85]), ([13, 181], [46, 46])]:
+            with self.assertRaises(ValueError):
+                CRS.get_utm_from_wgs84(np.array(lng), np.array(lat))
+
     def test_crs_parsing(self):
         test_cases = [
             (4326, CRS.WGS84),
@@ -4,9 +4,16 @@ Unit tests for download utilities
 import unittest
 import copy
 import os
+import threading
+import time
+from concurrent.futures import Future
+from unittest import mock
 
-from sentinelhub import DownloadRequest, MimeType, DownloadClient
-from sentinelhub.exceptions import SHRuntimeWarning
+from sentinelhub import DownloadRequest, MimeType, DownloadClient, SentinelHubDownloadClient, DownloadService, \
+    AwsTileRequest, SHConfig, SentinelHubRequest, BBox, CRS, DataSource
+from sentinelhub.download.handlers import collect_download_results
+from sentinelhub.download.scheduler import DownloadScheduler
+from sentinelhub.exceptions import SHRuntimeWarning, DownloadFailedException
 from sentinelhub.testing_utils import TestSentinelHub
 
 
@@ -101,5 +108,179 @@ class TestDownloadClient(TestSentinelHub):
         self.assertTrue(results[1] is None and results[2] is None)
 
 
+class TestDownloadService(TestSentinelHub):
+
+    def test_shared_resources(self):
+        service = DownloadService.get_instance()
+        self.assertIs(service, DownloadService.get_instance())
+        self.assertIs(DownloadClient().service, service)
+
+        config = SHConfig()
+        config.instance_id = 'instance-a'
+        other_config = SHConfig()
+        other_config.instance_id = 'instance-b'
+
+        self.assertIs(service.get_rate_limit(config), SentinelHubDownloadClient(config=config).rate_limit)
+        self.assertIsNot(service.get_rate_limit(config), service.get_rate_limit(other_config))
+
+    def test_gather(self):
+        service = DownloadService(max_workers=4)
+        tile_params = dict(tile='10UEV', time='2016-01-09', aws_index=0, bands='')
+        data_requests = [
+            AwsTileRequest(metafiles='tileInfo', **tile_params),
+            AwsTileRequest(metafiles='tileInfo,productInfo', **tile_params)
+        ]
+
+        results = service.gather(data_requests)
+        service.shutdown()
+
+        self.assertEqual([len(data_list) for data_list in results], [1, 2])
+        self.assertEqual(results[0][0], results[1][0])
+        self.assertTrue(all(isinstance(data, dict) for data_list in results for data in data_list))
+
+    def test_gather_assembled(self):
+        service = DownloadService(max_workers=2)
+        tiled_request = SentinelHubRequest(
+            evalscript='return [B02]',
+            input_data=[SentinelHubRequest.input_data(data_source=DataSource.SENTINEL2_L1C,
+                                                      time_interval=('2020-06-01', '2020-06-30'))],
+            responses=[SentinelHubRequest.output_response('default', MimeType.TIFF)],
+            bbox=BBox((500000, 5000000, 505120, 5005120), crs=CRS.UTM_33N),
+            size=(512, 512),
+            max_size=256
+        )
+        self.assertTrue(tiled_request.requires_assembly())
+        self.assertFalse(tiled_request.requires_assembly(decode_data=False))
+
+        with mock.patch.object(tiled_request, 'get_data', return_value=['assembled']) as get_data:
+            results = service.gather([tiled_request])
+        service.shutdown()
+
+        self.assertEqual(results, [['assembled']])
+        get_data.assert_called_once()
+
+    def test_http_session(self):
+        service = DownloadService(max_workers=2)
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(service.http_session))
+        thread.start()
+        thread.join()
+        service.shutdown()
+
+        self.assertIs(service.http_session, service.http_session)
+        self.assertIsNot(service.http_session, sessions[0])
+        self.assertIs(service.http_session.get_adapter('https://'), sessions[0].get_adapter('https://'))
+        self.assertEqual(service.http_session.cookies.get_policy().allowed_domains(), ())
+
+
+class TestDownloadScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = DownloadScheduler(max_workers=1, aging_rate=0)
+        self.blocking_event = threading.Event()
+        self.blocking_future = self.scheduler.submit(self.blocking_event.wait)
+
+    def tearDown(self):
+        self.blocking_event.set()
+        self.scheduler.shutdown()
+
+    def test_priority_order(self):
+        executed = []
+        futures = [self.scheduler.submit(executed.append, name, priority=priority)
+                   for name, priority in [('low', -1), ('normal', 0), ('high', 5), ('normal2', 0)]]
+        self.blocking_event.set()
+
+        for future in futures:
+            future.result(timeout=5)
+        self.assertEqual(executed, ['high', 'normal', 'normal2', 'low'])
+
+    def test_aging(self):
+        self.scheduler.aging_rate = 1000
+        executed = []
+        old_future = self.scheduler.submit(executed.append, 'old', priority=0)
+        time.sleep(0.05)
+        new_future = self.scheduler.submit(executed.append, 'new', priority=10)
+        self.blocking_event.set()
+
+        old_future.result(timeout=5)
+        new_future.result(timeout=5)
+        self.assertEqual(executed, ['old', 'new'], msg='Waiting job should gain priority')
+
+    def test_batch_concurrency(self):
+        scheduler = DownloadScheduler(max_workers=8)
+        lock = threading.Lock()
+        counter = {'running': 0, 'max_running': 0}
+
+        def job(value):
+            with lock:
+                counter['running'] += 1
+                counter['max_running'] = max(counter['max_running'], counter['running'])
+            time.sleep(0.02)
+            with lock:
+                counter['running'] -= 1
+            return value
+
+        futures = scheduler.submit_batch(job, [(index,) for index in range(20)], max_concurrency=2)
+        results = [future.result(timeout=10) for future in futures]
+        scheduler.shutdown()
+
+        self.assertEqual(results, list(range(20)))
+        self.assertLessEqual(counter['max_running'], 2)
+
+    def test_shutdown_during_batch(self):
+        futures = self.scheduler.submit_batch(time.sleep, [(0,)] * 5, max_concurrency=1)
+        self.scheduler.shutdown(wait=False)
+        self.blocking_event.set()
+
+        futures[0].result(timeout=5)
+        for future in futures[1:]:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+        with self.assertRaises(RuntimeError):
+            self.scheduler.submit_batch(time.sleep, [(0,)])
+
+    def test_nested_jobs(self):
+        self.blocking_event.set()
+        self.blocking_future.result(timeout=5)
+
+        future = self.scheduler.submit(lambda: self.scheduler.submit(lambda: 42).result())
+        self.assertEqual(future.result(timeout=5), 42, msg='Nested jobs on a single worker should not deadlock')
+
+    def test_exception(self):
+        self.blocking_event.set()
+        future = self.scheduler.submit(int, 'not a number')
+
+        with self.assertRaises(ValueError):
+            future.result(timeout=5)
+
+
+class TestCollectDownloadResults(unittest.TestCase):
+
+    @staticmethod
+    def _get_future(result=None, exception=None):
+        future = Future()
+        if exception is not None:
+            future.set_exception(exception)
+        elif result is not None:
+            future.set_result(result)
+        return future
+
+    def test_warning(self):
+        futures = [self._get_future(result=1), self._get_future(exception=DownloadFailedException('Failed')),
+                   self._get_future(result=3)]
+
+        with self.assertWarns(SHRuntimeWarning):
+            results = collect_download_results(futures, [True, False, True])
+        self.assertEqual(results, [1, None, 3])
+
+    def test_raise(self):
+        futures = [self._get_future(exception=DownloadFailedException('Failed')), self._get_future()]
+
+        with self.assertRaises(DownloadFailedException):
+            collect_download_results(futures, [True, True])
+        self.assertTrue(futures[1].cancelled(), msg='Remaining downloads should be cancelled')
+
+
 if __name__ == "__main__":
     unittest.main()
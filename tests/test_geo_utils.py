@@ -1,5 +1,7 @@
 import unittest
 
+import numpy as np
+
 from sentinelhub import geo_utils, CRS, BBox, TestSentinelHub
 
 
@@ -27,6 +29,32 @@ class TestGeo(TestSentinelHub):
         crs = geo_utils.get_utm_crs(lng, lat)
         self.assertEqual(crs, expected_crs, msg='Expected {}, got {}'.format(expected_crs, crs))
 
+    def test_vectorized_transforms(self):
+        lng = np.array([15.525078, 13.1, -70.5, 5.5, 0.1])
+        lat = np.array([44.1440478, -10.2, 30.8, 60.1, 0.0])
+
+        utm_crs = geo_utils.get_utm_crs(lng, lat)
+        self.assertEqual(list(utm_crs), [CRS.UTM_33N, CRS.UTM_33S, CRS.UTM_19N, CRS.UTM_32N, CRS.UTM_31N])
+
+        groups = geo_utils.group_by_utm_crs(lng, lat)
+        self.assertEqual(set(groups), {CRS.UTM_33N, CRS.UTM_33S, CRS.UTM_19N, CRS.UTM_32N, CRS.UTM_31N})
+        self.assertEqual(sorted(np.concatenate(list(groups.values()))), list(range(len(lng))))
+
+        east, north = geo_utils.wgs84_to_utm(lng, lat)
+        for index, point in enumerate(zip(lng, lat)):
+            expected_east, expected_north = geo_utils.wgs84_to_utm(*point)
+            self.assertAlmostEqual(east[index], expected_east, delta=1E-6)
+            self.assertAlmostEqual(north[index], expected_north, delta=1E-6)
+
+        east, north = geo_utils.wgs84_to_utm(lng[:1], lat[:1], CRS.UTM_33N)
+        new_lng, new_lat = geo_utils.to_wgs84(east, north, CRS.UTM_33N)
+        self.assertTrue(np.allclose(new_lng, lng[:1]) and np.allclose(new_lat, lat[:1]))
+
+        transform = (500000, 10, 0, 4900000, 0, -10)
+        rows, columns = geo_utils.wgs84_to_pixel(lng[:1], lat[:1], transform, utm_epsg=CRS.UTM_33N)
+        self.assertEqual((rows.dtype.kind, columns.dtype.kind), ('i', 'i'))
+        self.assertEqual((rows[0], columns[0]), geo_utils.wgs84_to_pixel(lng[0], lat[0], transform, CRS.UTM_33N))
+
     def test_bbox_to_resolution(self):
         bbox = BBox(((111.644, 8.655), (111.7, 8.688)), CRS.WGS84)
         resx, resy = geo_utils.bbox_to_resolution(bbox, 512, 512)
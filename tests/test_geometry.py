@@ -1,9 +1,12 @@
 import unittest
 import copy
+import pickle
 
+import numpy as np
 import shapely.geometry
+import shapely.ops
 
-from sentinelhub import BBox, Geometry, BBoxCollection, CRS, TestSentinelHub
+from sentinelhub import BBox, Geometry, BBoxCollection, BBoxArray, CRS, TestSentinelHub, transform_many
 
 
 class TestBBox(TestSentinelHub):
@@ -128,10 +131,32 @@ class TestBBox(TestSentinelHub):
                                                                                                    repr(bbox3)))
         self.assertNotEqual(bbox1, bbox4, "Bounding boxes {} and {} should not be the same".format(repr(bbox1),
                                                                                                    repr(bbox4)))
+        self.assertEqual(bbox1, [46.07, 13.23, 46.24, 13.57])
+        self.assertEqual(bbox3, (46.07, 13.23, 46.24, 13.57))
+        self.assertNotEqual(bbox4, [46.07, 13.23, 46.24, 13.57])
+        self.assertNotEqual(bbox1, '46.07,13.23,46.24,13.57')
+
+    def test_bbox_hash_and_immutability(self):
+        bbox1 = BBox([46.07, 13.23, 46.24, 13.57], CRS.WGS84)
+        bbox2 = BBox(((46.24, 13.57), (46.07, 13.23)), 4326)
+        bbox3 = BBox([46.07, 13.23, 46.24, 13.57], CRS.POP_WEB)
+
+        self.assertEqual(hash(bbox1), hash(bbox2))
+        self.assertEqual(len({bbox1, bbox2, bbox3}), 2)
+        self.assertEqual(pickle.loads(pickle.dumps(bbox1)), bbox1)
+        self.assertFalse(hasattr(bbox1, '__dict__'))
+
+        with self.assertRaises(AttributeError):
+            bbox1.min_x = 0
+        with self.assertRaises(AttributeError):
+            del bbox1.max_y
 
     def test_geometry(self):
         bbox = BBox([46.07, 13.23, 46.24, 13.57], CRS.WGS84)
 
+        self.assertIs(bbox.geometry, bbox.geometry, 'Polygon of a bounding box should be cached')
+        self.assertEqual(bbox.geojson, bbox.get_geojson())
+
         self.assertTrue(isinstance(bbox.get_geojson(), dict),
                         "Expected dictionary, got type {}".format(type(bbox.geometry)))
         self.assertTrue(isinstance(bbox.geometry, shapely.geometry.Polygon),
@@ -162,8 +187,9 @@ class TestGeometry(TestSentinelHub):
         cls.geometry2 = Geometry(cls.wkt_string, CRS.WGS84)
         cls.bbox = BBox(bbox=[14.00, 45.00, 14.03, 45.03], crs=CRS.WGS84)
         cls.bbox_collection = BBoxCollection([cls.bbox, BBox('46,13,47,20', CRS.WGS84)])
+        cls.bbox_array = BBoxArray.from_bboxes(cls.bbox_collection)
 
-        cls.geometry_list = [cls.geometry1, cls.geometry2, cls.bbox, cls.bbox_collection]
+        cls.geometry_list = [cls.geometry1, cls.geometry2, cls.bbox, cls.bbox_collection, cls.bbox_array]
 
     def test_repr(self):
         for geometry in self.geometry_list:
@@ -189,6 +215,23 @@ class TestGeometry(TestSentinelHub):
             self.assertAlmostEqual(geometry.geometry.area, original_geometry.geometry.area, delta=1e-10,
                                    msg='Geometry area should be equal')
 
+    def test_transform_many(self):
+        geometries = [self.geometry1, self.geometry2, Geometry(self.bbox.geometry, self.bbox.crs), self.geometry1]
+        new_geometries = transform_many(geometries, CRS.POP_WEB)
+        self.assertEqual(len(new_geometries), len(geometries))
+
+        for geometry, new_geometry in zip(geometries, new_geometries):
+            expected_geometry = shapely.ops.transform(geometry.crs.get_transform_function(CRS.POP_WEB),
+                                                      geometry.geometry)
+            self.assertEqual(new_geometry.crs, CRS.POP_WEB)
+            self.assertEqual(type(new_geometry.geometry), type(expected_geometry))
+            self.assertTrue(new_geometry.geometry.equals_exact(expected_geometry, 1e-6),
+                            'Vectorized transformation should match the transformation of each vertex')
+
+        self.assertEqual(transform_many([], CRS.WGS84), [])
+        with self.assertRaises(ValueError):
+            transform_many([self.bbox], CRS.POP_WEB)
+
     def test_geojson(self):
         for geometry in [self.geometry1, self.geometry2]:
             self.assertEqual(geometry, Geometry(geometry.geojson, geometry.crs),
@@ -202,9 +245,63 @@ class TestGeometry(TestSentinelHub):
         self.assertEqual(self.geometry2.wkt, self.wkt_string, 'New WKT string does not match the original')
 
     def test_bbox(self):
-        for geometry in [self.geometry1, self.geometry2, self.bbox_collection]:
+        for geometry in [self.geometry1, self.geometry2, self.bbox_collection, self.bbox_array]:
             self.assertEqual(geometry.bbox, BBox(geometry.geometry, geometry.crs), 'Failed bbox property')
 
 
+class TestBBoxArray(TestSentinelHub):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.bbox_list = [
+            BBox((14.0, 45.0, 14.03, 45.03), CRS.WGS84),
+            BBox((14.02, 45.02, 14.1, 45.04), CRS.WGS84),
+            BBox((15.5, 46.0, 15.0, 45.5), CRS.WGS84)
+        ]
+        cls.bbox_array = BBoxArray.from_bboxes(cls.bbox_list)
+
+    def test_conversion(self):
+        self.assertEqual(len(self.bbox_array), 3)
+        self.assertEqual(self.bbox_array.to_bbox_list(), self.bbox_list)
+        self.assertEqual(self.bbox_array.to_bbox_collection(), BBoxCollection(self.bbox_list))
+        self.assertEqual(BBoxArray.from_bboxes(BBoxCollection(self.bbox_list)), self.bbox_array)
+        self.assertEqual(self.bbox_array[2], self.bbox_list[2])
+        self.assertEqual(self.bbox_array[1:].to_bbox_list(), self.bbox_list[1:])
+
+        with self.assertRaises(ValueError):
+            self.bbox_array.array[0, 0] = 0
+
+    def test_transform(self):
+        for crs in [CRS.POP_WEB, CRS.UTM_33N]:
+            expected_bboxes = [bbox.transform(crs) for bbox in self.bbox_list]
+            self.assertEqual(self.bbox_array.transform(crs).to_bbox_list(), expected_bboxes)
+
+    def test_buffer_and_middle(self):
+        self.assertEqual(self.bbox_array.buffer(0.2).to_bbox_list(), [bbox.buffer(0.2) for bbox in self.bbox_list])
+        self.assertTrue(np.allclose(self.bbox_array.middle, [bbox.middle for bbox in self.bbox_list]))
+
+    def test_get_partition(self):
+        for partition_params in [dict(num_x=3, num_y=2), dict(size_x=0.02, size_y=0.015)]:
+            with self.subTest(msg='Partition {}'.format(partition_params)):
+                expected_bboxes = [part for bbox in self.bbox_list
+                                   for column in bbox.get_partition(**partition_params) for part in column]
+                partition = self.bbox_array.get_partition(**partition_params)
+                self.assertEqual(partition.to_bbox_list(), expected_bboxes)
+
+    def test_intersects(self):
+        bbox = self.bbox_list[0]
+        self.assertEqual(self.bbox_array.intersects(bbox).tolist(), [True, True, False])
+        self.assertEqual(self.bbox_array.contains(bbox).tolist(), [True, False, False])
+
+        intersection_matrix = self.bbox_array.intersects(self.bbox_array)
+        self.assertEqual(intersection_matrix.shape, (3, 3))
+        self.assertTrue(np.array_equal(intersection_matrix, intersection_matrix.T))
+
+        with self.assertRaises(ValueError):
+            self.bbox_array.intersects(bbox.transform(CRS.POP_WEB))
+
+
 if __name__ == '__main__':
     unittest.main()
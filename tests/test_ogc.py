@@ -1,11 +1,18 @@
 import unittest
+import os
+import json
 import datetime
-import numpy as np
+from unittest import mock
+from urllib.parse import urlparse, parse_qs
 
+import dateutil.parser
+import numpy as np
+import shapely.geometry
 from shapely.geometry import MultiPolygon
 
 from sentinelhub import WmsRequest, WcsRequest, CRS, MimeType, CustomUrlParam, ServiceType, DataSource, BBox,\
-    WebFeatureService, DownloadFailedException, TestSentinelHub, TestCaseContainer
+    WebFeatureService, BatchWebFeatureService, DownloadFailedException, TestSentinelHub, TestCaseContainer, \
+    DownloadClient, SHConfig, WfsCache, DateFilter
 from sentinelhub.data_request import OgcRequest
 from sentinelhub.ogc import OgcImageService
 
@@ -267,6 +274,20 @@ class TestOgc(TestSentinelHub):
                     self.assertTrue(test_case.url_check in download_url,
                                     "Parameter '{}' not in download url {}.".format(test_case.url_check, download_url))
 
+    def test_url_template(self):
+        ogc_service = OgcImageService()
+        for test_case in self.test_cases:
+            request = test_case.request
+            if request.service_type not in (ServiceType.WMS, ServiceType.WCS):
+                continue
+            with self.subTest(msg='Test case {}'.format(test_case.name)):
+                size_x, size_y = ogc_service.get_image_dimensions(request)
+                expected_urls = [ogc_service.get_url(request, date=date, size_x=size_x, size_y=size_y)
+                                 for date in ogc_service.get_dates(request)]
+                self.assertEqual(request.get_url_list(), expected_urls)
+                self.assertEqual([download_request.url for download_request in request.get_download_list()[::-1]],
+                                 expected_urls[::-1])
+
     def test_get_dates(self):
         for test_case in self.test_cases:
             if test_case.date_check is not None:
@@ -277,6 +298,21 @@ class TestOgc(TestSentinelHub):
                     self.assertEqual(test_case.date_check, dates[0],
                                      msg="Expected date {}, got {}".format(test_case.date_check, dates[0]))
 
+    def test_prune_dates(self):
+        bbox = BBox(bbox=(-5.23, 48.0, -5.03, 48.17), crs=CRS.WGS84)
+        time_interval = ('2017-01-05', '2017-03-16')
+
+        dates = WmsRequest(layer='BANDS-S2-L1C', bbox=bbox, time=time_interval, width=100).get_dates()
+        pruned_dates = WmsRequest(layer='BANDS-S2-L1C', bbox=bbox, time=time_interval, width=100,
+                                  date_filter=DateFilter(min_coverage=0.9, bbox_maxcc=0.5)).get_dates()
+        self.assertTrue(set(pruned_dates).issubset(dates))
+        self.assertEqual(pruned_dates, sorted(pruned_dates))
+
+        with self.assertRaises(ValueError):
+            DateFilter(min_coverage=1.5)
+        with self.assertRaises(ValueError):
+            WmsRequest(layer='BANDS-S2-L1C', bbox=bbox, time=time_interval, width=100, date_filter=0.9)
+
     def test_filter(self):
         for test_case in self.test_cases:
             if test_case.data_filter is not None:
@@ -294,6 +330,14 @@ class TestOgc(TestSentinelHub):
                                  exp_mean=test_case.img_mean, exp_median=test_case.img_median,
                                  test_name=test_case.name)
 
+    def test_get_cube(self):
+        test_case = self.test_cases[0]
+        cube, dates = test_case.request.get_cube(save_data=test_case.save_data)
+
+        self.assertEqual(len(dates), test_case.result_len)
+        self.assertEqual(cube.shape, (test_case.result_len,) + test_case.data[0].shape)
+        self.assertTrue(np.array_equal(cube[0], test_case.data[0]))
+
     def test_to_large_request(self):
         bbox = BBox((-5.23, 48.0, -5.03, 48.17), CRS.WGS84)
         request = WmsRequest(layer='TRUE-COLOR-S2-L1C', height=6000, width=6000, bbox=bbox,
@@ -317,6 +361,10 @@ class TestWebFeatureService(TestSentinelHub):
                               WebFeatureService(wgs84_bbox, time_interval, data_source=DataSource.SENTINEL2_L1C,
                                                 maxcc=0.1),
                               result_len=13),
+            TestCaseContainer('Split time interval',
+                              WebFeatureService(wgs84_bbox, time_interval, data_source=DataSource.SENTINEL2_L1C,
+                                                maxcc=0.1, prefetch_pages=2, max_interval=datetime.timedelta(days=30)),
+                              result_len=13),
             TestCaseContainer('Latest date only',
                               WebFeatureService(wgs84_bbox, 'latest', data_source=DataSource.SENTINEL2_L2A),
                               result_len=1),
@@ -339,6 +387,267 @@ class TestWebFeatureService(TestSentinelHub):
                         self.assertTrue(isinstance(result, expected_type),
                                         msg='Expected type {}, got type {}'.format(expected_type, type(result)))
 
+    def test_batch(self):
+        bbox_list = [BBox(bbox=(-5.23, 48.0, -5.13, 48.1), crs=CRS.WGS84),
+                     BBox(bbox=(-5.13, 48.07, -5.03, 48.17), crs=CRS.WGS84),
+                     BBox(bbox=(500000, 5300000, 510000, 5310000), crs=CRS.UTM_30N)]
+        time_interval = ('2017-01-05', '2017-03-16')
+
+        batch_wfs = BatchWebFeatureService(bbox_list, time_interval, data_source=DataSource.SENTINEL2_L1C, maxcc=0.5,
+                                           max_bboxes_per_query=2)
+        wfs_iterators = batch_wfs.get_wfs_iterators()
+        self.assertEqual(len(wfs_iterators), len(bbox_list))
+
+        for bbox, wfs_iterator in zip(bbox_list, wfs_iterators):
+            expected_features = list(WebFeatureService(bbox, time_interval, data_source=DataSource.SENTINEL2_L1C,
+                                                       maxcc=0.5))
+            self.assertEqual(list(wfs_iterator), expected_features)
+
+        request = WmsRequest(layer='BANDS-S2-L1C', bbox=bbox_list[0], time=time_interval, width=100, maxcc=0.5,
+                             wfs_iterator=wfs_iterators[0])
+        self.assertEqual(request.get_dates(), batch_wfs.get_dates()[0])
+
+        with self.assertRaises(ValueError):
+            BatchWebFeatureService(bbox_list, 'latest')
+
+
+class WfsServiceMock:
+    """ Imitates Sentinel Hub WFS service, which returns pages of features ordered from the latest to the earliest
+    acquisition. Parameters of all requests are recorded.
+    """
+    def __init__(self, features):
+        self.features = features
+        self.requests = []
+
+    @staticmethod
+    def make_feature(feature_id, acquisition_time, geometry, **properties):
+        """ Creates a feature in the same form as returned by WFS service
+        """
+        return {
+            'type': 'Feature',
+            'geometry': json.loads(json.dumps(shapely.geometry.mapping(geometry))) if geometry is not None else None,
+            'properties': {'id': feature_id, 'date': acquisition_time.date().isoformat(),
+                           'time': acquisition_time.time().isoformat(), **properties}
+        }
+
+    def download(self, download_requests, max_threads=None, decode_data=True):
+        # pylint: disable=unused-argument
+        return [self._get_page(download_request) for download_request in download_requests]
+
+    def _get_page(self, download_request):
+        params = {name: values[0] for name, values in parse_qs(urlparse(download_request.url).query).items()}
+        self.requests.append(params)
+
+        start_time, end_time = [dateutil.parser.parse(time) for time in params['TIME'].split('/')]
+        coords = [float(coord) for coord in params['BBOX'].split(',')]
+        if params['SRSNAME'] == CRS.ogc_string(CRS.WGS84):
+            coords = [coords[1], coords[0], coords[3], coords[2]]
+        query_polygon = shapely.geometry.box(*coords)
+
+        features = [feature for feature in self.features
+                    if start_time <= self._get_time(feature) <= end_time and self._intersects(feature, query_polygon)]
+
+        feature_offset, max_features = int(params['FEATURE_OFFSET']), int(params['MAXFEATURES'])
+        return {'type': 'FeatureCollection', 'features': features[feature_offset: feature_offset + max_features]}
+
+    @staticmethod
+    def _intersects(feature, polygon):
+        return feature['geometry'] is None or shapely.geometry.shape(feature['geometry']).intersects(polygon)
+
+    @staticmethod
+    def _get_time(feature):
+        return dateutil.parser.parse('{}T{}'.format(feature['properties']['date'], feature['properties']['time']))
+
+
+class TestWebFeatureServiceMocked(TestSentinelHub):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.config = SHConfig()
+        cls.config.instance_id = 'test-instance'
+        cls.config.wfs_cache_folder = ''
+
+    def _patch_service(self, features):
+        service = WfsServiceMock(features)
+        patcher = mock.patch.object(DownloadClient, 'download', new=service.download)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return service
+
+    def test_paging(self):
+        page_size = SHConfig().max_wfs_records_per_query
+        start_time = datetime.datetime(2020, 1, 1)
+        bbox = BBox((0, 0, 1, 1), CRS.WGS84)
+
+        for feature_num, expected_pages in [(page_size // 2, [0]), (page_size, [0, 1, 2]),
+                                            (3 * page_size + 1, [0, 1, 2, 3, 4, 5, 6])]:
+            with self.subTest(msg='Number of features {}'.format(feature_num)):
+                features = [WfsServiceMock.make_feature(str(index), start_time + datetime.timedelta(minutes=index),
+                                                        None)
+                            for index in range(feature_num - 1, -1, -1)]
+                service = self._patch_service(features)
+
+                wfs_iterator = WebFeatureService(bbox, ('2020-01-01', '2020-01-10'), prefetch_pages=4,
+                                                 config=self.config)
+                self.assertEqual(list(wfs_iterator), features)
+                self.assertEqual([int(params['FEATURE_OFFSET']) for params in service.requests],
+                                 [page * page_size for page in expected_pages])
+                self.assertTrue(all(int(params['MAXFEATURES']) == page_size for params in service.requests))
+
+    def test_time_interval_split(self):
+        features = []
+        for day in range(30, 0, -1):
+            for hour, minute, second in [(23, 59, 59), (12, 0, 0)]:
+                acquisition_time = datetime.datetime(2020, 1, day, hour, minute, second)
+                features.append(WfsServiceMock.make_feature(acquisition_time.isoformat(), acquisition_time, None))
+        service = self._patch_service(features)
+
+        wfs_iterator = WebFeatureService(BBox((0, 0, 1, 1), CRS.WGS84), ('2020-01-01', '2020-01-30'),
+                                         max_interval=datetime.timedelta(days=10), config=self.config)
+        self.assertEqual(list(wfs_iterator), features,
+                         msg='Features should be ordered from the latest and boundary features should not repeat')
+        self.assertEqual(wfs_iterator.get_dates(), sorted(wfs_iterator.get_dates(), reverse=True))
+
+        self.assertEqual([params['TIME'] for params in service.requests],
+                         ['2020-01-20T23:59:59/2020-01-30T23:59:59', '2020-01-10T23:59:59/2020-01-20T23:59:59',
+                          '2020-01-01T00:00:00/2020-01-10T23:59:59'])
+
+    def test_cache(self):
+        cache_folder = os.path.join(self.OUTPUT_FOLDER, 'wfs_cache_mocked')
+        WfsCache(cache_folder).clear()
+
+        config = SHConfig()
+        config.instance_id = 'test-instance'
+        config.wfs_cache_folder = cache_folder
+
+        features = []
+        for day in range(20, 0, -1):
+            for hour, orbit_direction in [(22, 'DESCENDING'), (10, 'ASCENDING')]:
+                acquisition_time = datetime.datetime(2020, 1, day, hour)
+                feature_id = 'S1A_IW_GRDH_1SDV_{}'.format(acquisition_time.strftime('%Y%m%dT%H%M%S'))
+                features.append(WfsServiceMock.make_feature(feature_id, acquisition_time,
+                                                            shapely.geometry.box(0, 0, 2, 2),
+                                                            orbitDirection=orbit_direction))
+        service = self._patch_service(features)
+        bbox = BBox((0.5, 0.5, 1, 1), CRS.WGS84)
+
+        def get_expected_features(last_day, orbit_direction=None):
+            return [feature for feature in features if feature['properties']['date'] <= '2020-01-{:02}'.format(last_day)
+                    and orbit_direction in (None, feature['properties']['orbitDirection'])]
+
+        self.assertEqual(list(WebFeatureService(bbox, ('2020-01-01', '2020-01-10'), config=config)),
+                         get_expected_features(10))
+        self.assertEqual(len(service.requests), 1)
+
+        self.assertEqual(list(WebFeatureService(bbox, ('2020-01-01', '2020-01-10'), config=config)),
+                         get_expected_features(10))
+        self.assertEqual(len(service.requests), 1, msg='A repeated query should be served from the cache')
+
+        self.assertEqual(list(WebFeatureService(bbox, ('2020-01-01', '2020-01-20'), config=config)),
+                         get_expected_features(20))
+        self.assertEqual([params['TIME'] for params in service.requests[1:]],
+                         ['2020-01-10T23:59:59/2020-01-20T23:59:59'], msg='Only the new time range should be queried')
+
+        for data_source, orbit_direction, request_num in [(DataSource.SENTINEL1_IW_ASC, 'ASCENDING', 3),
+                                                          (DataSource.SENTINEL1_IW_DES, 'DESCENDING', 3),
+                                                          (DataSource.SENTINEL1_IW, None, 3)]:
+            with self.subTest(msg='Data source {}'.format(data_source)):
+                wfs_iterator = WebFeatureService(bbox, ('2020-01-01', '2020-01-20'), data_source=data_source,
+                                                 config=config)
+                self.assertEqual(list(wfs_iterator), get_expected_features(20, orbit_direction))
+                self.assertEqual(len(service.requests), request_num)
+
+        self.assertEqual(list(WebFeatureService(bbox, 'latest', config=config)), features[:1])
+        self.assertEqual(list(WebFeatureService(bbox, 'latest', config=config)), features[:1])
+        self.assertEqual([params['MAXFEATURES'] for params in service.requests[3:]], ['1'])
+
+        config.wfs_cache_latest_ttl_seconds = -1
+        self.assertEqual(list(WebFeatureService(bbox, 'latest', config=config)), features[:1])
+        self.assertEqual(len(service.requests), 5, msg='Expired results for the latest acquisition should be queried')
+
+    def test_prune_dates(self):
+        bbox = BBox((0, 0, 1, 1), CRS.WGS84)
+        time_interval = ('2020-01-01', '2020-01-07')
+        tiles = [
+            (datetime.datetime(2020, 1, 1, 10), None, 10),
+            (datetime.datetime(2020, 1, 2, 10), shapely.geometry.box(0, 0, 0.5, 1), 0),
+            (datetime.datetime(2020, 1, 3, 10), shapely.geometry.box(0, 0, 0.6, 1), 0),
+            (datetime.datetime(2020, 1, 3, 10, 30), shapely.geometry.box(0.5, 0, 1, 1), 0),
+            (datetime.datetime(2020, 1, 4, 10), shapely.geometry.box(-1, -1, 2, 2), 80),
+            (datetime.datetime(2020, 1, 5, 10), shapely.geometry.box(0, 0, 1, 0.4), 100),
+            (datetime.datetime(2020, 1, 5, 10, 20), shapely.geometry.box(0, 0, 1, 1), 10),
+            (datetime.datetime(2020, 1, 6, 10), shapely.geometry.box(0.1, 0, 1, 1), None),
+            (datetime.datetime(2020, 1, 7, 10), shapely.geometry.box(5, 5, 6, 6), 0)
+        ]
+        tile_list = [WfsServiceMock.make_feature(str(index), tile_time, geometry, cloudCoverPercentage=cloud_coverage)
+                     for index, (tile_time, geometry, cloud_coverage) in reversed(list(enumerate(tiles)))]
+        wfs_iterator = WebFeatureService.from_tile_list(bbox, time_interval, tile_list, config=self.config)
+
+        dates = [datetime.datetime(2020, 1, day, 10) for day in range(1, 8)]
+        for min_coverage, bbox_maxcc, expected_days in [(None, None, [1, 2, 3, 4, 5, 6, 7]),
+                                                        (0.8, None, [1, 3, 4, 5, 6]),
+                                                        (None, 0.5, [1, 2, 3, 5, 6, 7]),
+                                                        (0.8, 0.5, [1, 3, 5, 6])]:
+            with self.subTest(msg='Parameters min_coverage={}, bbox_maxcc={}'.format(min_coverage, bbox_maxcc)):
+                date_filter = DateFilter(min_coverage=min_coverage, bbox_maxcc=bbox_maxcc)
+                request = WmsRequest(layer='TRUE-COLOR', bbox=bbox, time=time_interval, width=10,
+                                     time_difference=datetime.timedelta(hours=1), date_filter=date_filter,
+                                     wfs_iterator=wfs_iterator, config=self.config)
+                self.assertEqual(request.get_dates(), [dates[day - 1] for day in expected_days])
+
+    def test_batch(self):
+        start_time = datetime.datetime(2020, 1, 1, 10)
+        footprints = [shapely.geometry.box(0, 0, 2, 2), shapely.geometry.box(1.5, 0, 4, 2),
+                      shapely.geometry.box(0, 2.5, 4, 4), shapely.geometry.box(500000, 4000000, 510000, 4010000)]
+        features = [WfsServiceMock.make_feature('{}-{}'.format(index, day), start_time + datetime.timedelta(days=day),
+                                                footprint)
+                    for day in range(9, -1, -1) for index, footprint in enumerate(footprints)]
+        service = self._patch_service(features)
+
+        bbox_list = [BBox((x, y, x + 0.5, y + 0.5), CRS.WGS84) for x, y in [(0.2, 0.2), (1.7, 1.2), (3, 1), (0.5, 3),
+                                                                            (3.2, 3.2), (4.5, 4.5)]]
+        bbox_list.append(BBox((505000, 4005000, 506000, 4006000), CRS.UTM_33N))
+        expected_footprints = [[0], [0, 1], [1], [2], [2], [], [3]]
+        time_interval = ('2020-01-01', '2020-01-10')
+
+        batch_wfs = BatchWebFeatureService(bbox_list, time_interval, max_bboxes_per_query=3, config=self.config)
+        wfs_iterators = batch_wfs.get_wfs_iterators()
+        self.assertEqual(len(service.requests), 3, msg='Expected one query for each chunk of bounding boxes')
+
+        for bbox, wfs_iterator, footprint_indices in zip(bbox_list, wfs_iterators, expected_footprints):
+            with self.subTest(msg='Bounding box {}'.format(bbox)):
+                expected_features = [feature for feature in features
+                                     if int(feature['properties']['id'].split('-')[0]) in footprint_indices]
+                self.assertEqual(list(wfs_iterator), expected_features)
+                self.assertEqual(list(WebFeatureService(bbox, time_interval, config=self.config)), expected_features)
+
+        self.assertEqual(batch_wfs.get_dates()[0], [start_time + datetime.timedelta(days=day) for day in range(10)])
+        self.assertEqual(batch_wfs.get_dates()[5], [])
+        self.assertEqual(len(service.requests), 3 + len(bbox_list))
+
+        request = WmsRequest(layer='TRUE-COLOR', bbox=bbox_list[1], time=time_interval, width=10, config=self.config,
+                             wfs_iterator=wfs_iterators[1])
+        self.assertEqual(len(request.get_download_list()), 10)
+        self.assertEqual(len(service.requests), 3 + len(bbox_list))
+
+    def test_batch_without_geometries(self):
+        start_time = datetime.datetime(2020, 1, 1, 10)
+        footprints = [None, shapely.geometry.box(0, 0, 1, 1)]
+        features = [WfsServiceMock.make_feature('{}-{}'.format(index, day), start_time + datetime.timedelta(days=day),
+                                                footprint)
+                    for day in range(4, -1, -1) for index, footprint in enumerate(footprints)]
+        self._patch_service(features)
+
+        bbox_list = [BBox((0.2, 0.2, 0.5, 0.5), CRS.WGS84), BBox((2, 2, 3, 3), CRS.WGS84)]
+        batch_wfs = BatchWebFeatureService(bbox_list, ('2020-01-01', '2020-01-05'), config=self.config)
+        wfs_iterators = batch_wfs.get_wfs_iterators()
+
+        self.assertEqual(list(wfs_iterators[0]), features)
+        self.assertEqual(list(wfs_iterators[1]), [feature for feature in features if feature['geometry'] is None],
+                         msg='Features without a geometry should be assigned to every bounding box')
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,138 @@
+"""
+Tests for estimation of processing units of Processing API requests
+"""
+import math
+import unittest
+
+from sentinelhub import SentinelHubRequest, ProcessingCostEstimator, BBox, CRS, DataSource, MimeType, \
+    TestCaseContainer
+from sentinelhub.sentinelhub_rate_limit import PolicyBucket, PolicyType
+
+
+class TestProcessingCostEstimator(unittest.TestCase):
+
+    TRUE_COLOR_EVALSCRIPT = """
+        //VERSION=3
+        function setup() {
+            return {
+                input: ["B02", "B03", "B04", "dataMask"],
+                output: { bands: 4 }
+            };
+        }
+    """
+    MULTI_TEMPORAL_EVALSCRIPT = """
+        //VERSION=3
+        function setup() {
+            return {
+                input: [{
+                    bands: ["B04", "B08"],
+                    units: "REFLECTANCE"
+                }],
+                output: { bands: 1, sampleType: SampleType.FLOAT32 },
+                mosaicking: Mosaicking.ORBIT
+            };
+        }
+    """
+    FUSION_EVALSCRIPT = """
+        //VERSION=3
+        function setup() {
+            return {
+                input: [
+                    {datasource: "modis", bands: ["B01", "B02"]},
+                    {datasource: "l2a", bands: ["B02", "B03", "B04", "B08", "B11", "B12"]}
+                ],
+                output: { bands: 3 }
+            };
+        }
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        bbox = BBox((500000, 5000000, 505120, 5005120), crs=CRS.UTM_33N)
+        time_interval = ('2020-06-01', '2020-06-30')
+
+        def make_request(evalscript, input_data, **kwargs):
+            return SentinelHubRequest(
+                evalscript=evalscript,
+                input_data=input_data,
+                responses=[SentinelHubRequest.output_response('default', MimeType.TIFF)],
+                bbox=bbox,
+                **kwargs
+            )
+
+        l1c_input = SentinelHubRequest.input_data(data_source=DataSource.SENTINEL2_L1C, time_interval=time_interval)
+        modis_input = SentinelHubRequest.input_data(data_source=DataSource.MODIS, time_interval=time_interval,
+                                                    other_args={'id': 'modis', 'processing': {'orthorectify': True}})
+        l2a_input = SentinelHubRequest.input_data(data_source=DataSource.SENTINEL2_L2A, time_interval=time_interval,
+                                                  other_args={'id': 'l2a'})
+
+        cls.test_cases = [
+            TestCaseContainer('Simple request', make_request(cls.TRUE_COLOR_EVALSCRIPT, [l1c_input], size=(512, 512)),
+                              expected_units=1),
+            TestCaseContainer('Resolution instead of size',
+                              make_request(cls.TRUE_COLOR_EVALSCRIPT, [l1c_input], resolution=(10, 10)),
+                              expected_units=1),
+            TestCaseContainer('Small request',
+                              make_request(cls.TRUE_COLOR_EVALSCRIPT, [l1c_input], size=(10, 10)),
+                              expected_units=0.01),
+            TestCaseContainer('Multi-temporal float request',
+                              make_request(cls.MULTI_TEMPORAL_EVALSCRIPT, [l1c_input], size=(1024, 512)),
+                              expected_units=2 * 2 / 3 * 2 * 6),
+            TestCaseContainer('Data fusion request',
+                              make_request(cls.FUSION_EVALSCRIPT, [modis_input, l2a_input], size=(512, 512)),
+                              expected_units=2 / 3 * 2 + 6 / 3),
+        ]
+
+    def test_estimate(self):
+        estimator = ProcessingCostEstimator()
+
+        for test_case in self.test_cases:
+            with self.subTest(msg='Test case {}'.format(test_case.name)):
+                self.assertAlmostEqual(estimator.estimate(test_case.request), test_case.expected_units, delta=1e-6)
+                self.assertAlmostEqual(estimator.estimate(test_case.request.payload), test_case.expected_units,
+                                       delta=1e-6)
+
+    def test_calibrate(self):
+        estimator = ProcessingCostEstimator()
+        request = self.test_cases[0].request
+
+        estimator.calibrate(request, {})
+        estimator.calibrate(request.get_download_list()[0], {'Content-Type': 'image/tiff'})
+        self.assertEqual(estimator.correction_factor, 1)
+
+        estimator.calibrate(request, {ProcessingCostEstimator.UNITS_SPENT_HEADER: '1.5'})
+        estimator.calibrate(request.get_download_list()[0], {ProcessingCostEstimator.UNITS_SPENT_HEADER: '2.5'})
+        self.assertAlmostEqual(estimator.correction_factor, 2)
+        self.assertAlmostEqual(estimator.estimate(request), 2)
+
+    def test_plan(self):
+        estimator = ProcessingCostEstimator()
+        requests = [self.test_cases[0].request] * 100
+
+        plan = estimator.plan(requests, num_processes=4, request_duration=2)
+        self.assertEqual(plan.request_count, 100)
+        self.assertAlmostEqual(plan.processing_units, 100)
+        self.assertAlmostEqual(plan.duration, 50)
+
+        policy_buckets = [
+            PolicyBucket(PolicyType.PROCESSING_UNITS, {
+                'capacity': 30,
+                'samplingPeriod': 'PT1M',
+                'nanosBetweenRefills': 2 * 10 ** 9
+            }),
+            PolicyBucket(PolicyType.REQUESTS, {
+                'capacity': 300,
+                'samplingPeriod': 'PT0S',
+                'nanosBetweenRefills': 9223372036854775807
+            })
+        ]
+        plan = estimator.plan(requests, policy_buckets=policy_buckets)
+        self.assertAlmostEqual(plan.duration, 140)
+
+        policy_buckets[1].content = 50
+        plan = estimator.plan(requests, policy_buckets=policy_buckets)
+        self.assertTrue(math.isinf(plan.duration))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,13 +1,17 @@
 """ Tests for the Processing API requests
 """
+import os
 import unittest
+from unittest import mock
 
+import dateutil.parser
 import numpy as np
 from shapely.geometry import Polygon
 from oauthlib.oauth2.rfc6749.errors import CustomOAuth2Error
 
 from sentinelhub import SentinelHubRequest, CRS, BBox, TestSentinelHub, DataSource, MimeType, bbox_to_dimensions, \
-    Geometry, SHConfig
+    Geometry, SHConfig, SentinelHubDownloadClient
+from sentinelhub.sentinelhub_request import _split_pixels
 
 
 class TestSentinelHubRequest(TestSentinelHub):
@@ -157,6 +161,66 @@ class TestSentinelHubRequest(TestSentinelHub):
         self.assertEqual(img.shape, (153, 160, 3))
         self.test_numpy_data(img, exp_min=670, exp_max=6105, exp_mean=1848.2646)
 
+    def test_tiled_output(self):
+        """ Test that an output split into tiles is the same as an output of a single request
+        """
+        evalscript = """
+            //VERSION=3
+
+            function setup() {
+                return {
+                    input: [{
+                        bands: ["B02", "B03", "B04"],
+                        units: "DN"
+                    }],
+                    output: {
+                        bands: 3,
+                        sampleType: "UINT16"
+                    }
+                };
+            }
+
+            function evaluatePixel(sample) {
+                return [sample.B04, sample.B03, sample.B02];
+            }
+        """
+        request_params = dict(
+            evalscript=evalscript,
+            input_data=[
+                SentinelHubRequest.input_data(
+                    data_source=DataSource.SENTINEL2_L1C,
+                    time_interval=('2017-10-14T00:12:03', '2017-12-15T23:12:04'),
+                    mosaicking_order='leastCC'
+                )
+            ],
+            responses=[
+                SentinelHubRequest.output_response('default', MimeType.TIFF)
+            ],
+            bbox=BBox(
+                bbox=[1155360.393335921, 5285081.168940068, 1156965.063795706, 5286609.808304847],
+                crs=CRS.POP_WEB
+            ),
+            resolution=(10.0, 10.0)
+        )
+
+        request = SentinelHubRequest(**request_params)
+        tiled_request = SentinelHubRequest(max_size=64, **request_params)
+
+        self.assertFalse(request.is_tiled())
+        self.assertTrue(tiled_request.is_tiled())
+        self.assertEqual(len(tiled_request.get_download_list()), 9)
+
+        tile_sizes = [(payload['output']['height'], payload['output']['width'])
+                      for payload in tiled_request.tile_payloads]
+        self.assertEqual(sum(height * width for height, width in tile_sizes), 153 * 160)
+        self.assertTrue(all(height <= 64 and width <= 64 for height, width in tile_sizes))
+
+        img = request.get_data()[0]
+        tiled_img = tiled_request.get_data(max_threads=3)[0]
+
+        self.assertEqual(tiled_img.shape, (153, 160, 3))
+        self.assertTrue(np.array_equal(img, tiled_img))
+
     def test_multipart_tar(self):
         """ Test downloading multiple outputs, packed into a TAR file
         """
@@ -372,5 +436,115 @@ class TestSentinelHubRequest(TestSentinelHub):
             request.get_data()
 
 
+class TestTiledRequestMocked(TestSentinelHub):
+    """ Tests of splitting requests into tiles and assembling their outputs, which use an imitation of Processing API
+    """
+    BBOX = BBox((0, 0, 1000, 700), crs=CRS.UTM_33N)
+
+    @staticmethod
+    def _process(client, request, decode_data):
+        """ Instead of downloading, it returns an image of global pixel indices of the requested bounding box, which
+        has the day of month of the requested time range in the last channel
+        """
+        # pylint: disable=unused-argument
+        payload = request.post_values
+        min_x, min_y, max_x, max_y = payload['input']['bounds']['bbox']
+        output = payload['output']
+        width = output.get('width') or round((max_x - min_x) / output['resx'])
+        height = output.get('height') or round((max_y - min_y) / output['resy'])
+
+        column_start = round(min_x / 10)
+        row_start = round((TestTiledRequestMocked.BBOX.max_y - max_y) / 10)
+        rows, columns = np.indices((height, width), dtype=np.uint16)
+        day = dateutil.parser.parse(payload['input']['data'][0]['dataFilter']['timeRange']['from']).day
+
+        return np.stack([rows + row_start, columns + column_start, np.full((height, width), day, dtype=np.uint16)],
+                        axis=-1)
+
+    def setUp(self):
+        patcher = mock.patch.object(SentinelHubDownloadClient, '_single_download', new=self._process)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _get_request(self, day=1, size=None, resolution=(10, 10), max_size=32):
+        return SentinelHubRequest(
+            evalscript='',
+            input_data=[
+                SentinelHubRequest.input_data(data_source=DataSource.SENTINEL2_L1C,
+                                              time_interval=('2020-01-{:02}'.format(day), '2020-01-{:02}'.format(day)))
+            ],
+            responses=[SentinelHubRequest.output_response('default', MimeType.TIFF)],
+            bbox=self.BBOX,
+            size=size,
+            resolution=None if size else resolution,
+            max_size=max_size
+        )
+
+    def _get_expected_image(self, day=1):
+        rows, columns = np.indices((70, 100), dtype=np.uint16)
+        return np.stack([rows, columns, np.full((70, 100), day, dtype=np.uint16)], axis=-1)
+
+    def test_split_pixels(self):
+        self.assertEqual(_split_pixels(100, 4), [0, 25, 50, 75, 100])
+        self.assertEqual(_split_pixels(70, 3), [0, 23, 46, 70])
+        self.assertEqual(_split_pixels(5, 1), [0, 5])
+
+    def test_plan_tiles(self):
+        self.assertFalse(self._get_request(max_size=100).is_tiled())
+        self.assertFalse(self._get_request(max_size=None).is_tiled())
+
+        for request in [self._get_request(), self._get_request(size=(100, 70))]:
+            self.assertTrue(request.is_tiled())
+            self.assertEqual(request.output_shape, (70, 100))
+            self.assertEqual(len(request.get_download_list()), 12)
+
+            coverage = np.zeros(request.output_shape, dtype=int)
+            for payload, (row_window, column_window) in zip(request.tile_payloads, request.tile_windows):
+                coverage[row_window, column_window] += 1
+
+                output = payload['output']
+                self.assertNotIn('resx', output)
+                self.assertEqual((output['height'], output['width']),
+                                 (row_window.stop - row_window.start, column_window.stop - column_window.start))
+                self.assertTrue(output['width'] <= 32 and output['height'] <= 32)
+                self.assertEqual(payload['input']['bounds']['bbox'],
+                                 [column_window.start * 10, 700 - row_window.stop * 10,
+                                  column_window.stop * 10, 700 - row_window.start * 10])
+
+            self.assertTrue(np.all(coverage == 1), msg='Tiles should cover each pixel exactly once')
+
+    def test_tiled_data(self):
+        self.assertTrue(np.array_equal(self._get_request(max_size=None).get_data()[0], self._get_expected_image()))
+
+        request = self._get_request()
+        self.assertTrue(np.array_equal(request.get_data(max_threads=3)[0], self._get_expected_image()))
+        self.assertTrue(np.array_equal(request.get_data(data_filter=[0])[0], self._get_expected_image()))
+
+        with self.assertRaises(ValueError):
+            request.get_data(data_filter=[1])
+
+        memmap_folder = os.path.join(self.OUTPUT_FOLDER, 'tiled_memmap')
+        image = request.get_data(memmap_folder=memmap_folder)[0]
+        self.assertIsInstance(image, np.memmap)
+        self.assertTrue(np.array_equal(np.load(os.path.join(memmap_folder, 'default.npy')),
+                                       self._get_expected_image()))
+
+    def test_get_cube(self):
+        requests = [self._get_request(day=day, max_size=max_size)
+                    for day, max_size in [(3, 32), (1, None), (2, 64)]]
+
+        cube, start_times = SentinelHubRequest.get_cube(requests, max_threads=4)
+        self.assertEqual(cube.shape, (3, 70, 100, 3))
+        for time_index, day in enumerate([3, 1, 2]):
+            self.assertTrue(np.array_equal(cube[time_index], self._get_expected_image(day=day)))
+        self.assertEqual(start_times, [dateutil.parser.parse('2020-01-0{}'.format(day)) for day in [3, 1, 2]])
+
+        for max_size in [None, 32]:
+            with self.subTest(msg='Parameter max_size={}'.format(max_size)):
+                requests = [self._get_request(max_size=max_size), self._get_request(resolution=(20, 20))]
+                with self.assertRaises(ValueError):
+                    SentinelHubRequest.get_cube(requests)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,6 +1,11 @@
 import unittest
+import concurrent.futures
+import os
+import stat
+import time
 
-from sentinelhub import SentinelHubSession
+from sentinelhub import SentinelHubSession, SHConfig, TestSentinelHub
+from sentinelhub.sentinelhub_session import TokenFileCache
 
 
 class TestSession(unittest.TestCase):
@@ -26,5 +31,82 @@ class TestSession(unittest.TestCase):
         self.assertNotEqual(token['access_token'], new_token['access_token'], msg='The token has not been refreshed')
 
 
+class DummySession(SentinelHubSession):
+    """ A session which generates tokens locally and counts how many times a token was fetched
+    """
+    EXPIRES_IN = 3600
+
+    def __init__(self, *args, **kwargs):
+        self.fetch_count = 0
+        super().__init__(*args, **kwargs)
+
+    def _fetch_token(self, request):
+        time.sleep(0.1)
+        self.fetch_count += 1
+        return {
+            'access_token': 'token-{}'.format(self.fetch_count),
+            'expires_in': self.EXPIRES_IN,
+            'expires_at': time.time() + self.EXPIRES_IN
+        }
+
+
+class TestSessionTokenHandling(TestSentinelHub):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.config = SHConfig()
+        cls.config.sh_client_id = 'client-id'
+        cls.config.sh_client_secret = 'client-secret'
+        cls.config.sh_token_cache_folder = ''
+
+    def test_thread_safe_refresh(self):
+        session = DummySession(config=self.config)
+        self.assertEqual(session.fetch_count, 1)
+
+        session.token['expires_at'] = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
+            tokens = list(executor.map(lambda _: session.token, range(20)))
+
+        self.assertEqual(session.fetch_count, 2, msg='Token should be refreshed only once')
+        self.assertTrue(all(token['access_token'] == 'token-2' for token in tokens))
+
+    def test_background_refresh(self):
+        DummySession.EXPIRES_IN = 2 * SentinelHubSession.SECONDS_BEFORE_EXPIRY + 0.3
+        try:
+            session = DummySession(config=self.config, refresh_in_background=True)
+            time.sleep(1)
+            session.stop_background_refresh()
+        finally:
+            DummySession.EXPIRES_IN = 3600
+
+        self.assertGreaterEqual(session.fetch_count, 2, msg='Token was not refreshed in background')
+
+    def test_token_file_cache(self):
+        config = SHConfig()
+        config.sh_client_id = self.config.sh_client_id
+        config.sh_client_secret = self.config.sh_client_secret
+        config.sh_token_cache_folder = os.path.join(self.OUTPUT_FOLDER, 'tokens')
+
+        session = DummySession(config=config)
+        other_session = DummySession(config=config)
+
+        self.assertEqual(session.fetch_count, 1)
+        self.assertEqual(other_session.fetch_count, 0, msg='Token should be obtained from the file cache')
+        self.assertEqual(session.token, other_session.token)
+
+        filenames = os.listdir(config.sh_token_cache_folder)
+        self.assertEqual(len(filenames), 1)
+        self.assertTrue(config.sh_client_secret not in filenames[0])
+
+        file_mode = os.stat(os.path.join(config.sh_token_cache_folder, filenames[0])).st_mode
+        self.assertEqual(stat.S_IMODE(file_mode) & 0o077, 0, msg='Cached token should be readable only by owner')
+
+    def test_missing_cache_entry(self):
+        token_cache = TokenFileCache(os.path.join(self.OUTPUT_FOLDER, 'empty-cache'))
+        self.assertIsNone(token_cache.load(('a', 'b', 'c')))
+
+
 if __name__ == '__main__':
     unittest.main()
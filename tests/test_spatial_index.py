@@ -0,0 +1,30 @@
+"""
+Tests for spatial indices of geometries
+"""
+import unittest
+import warnings
+
+import shapely.geometry
+
+from sentinelhub import TestSentinelHub
+from sentinelhub.spatial_index import GeometryIndex
+
+
+class TestGeometryIndex(TestSentinelHub):
+
+    def test_query(self):
+        geometries = [shapely.geometry.box(x, 0, x + 1, 1) for x in range(10)] + [shapely.geometry.Polygon()]
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            geometry_index = GeometryIndex(geometries)
+
+        query_polygon = shapely.geometry.box(2.5, 0.5, 4.5, 2)
+        self.assertEqual(geometry_index.query(query_polygon), [2, 3, 4])
+        self.assertEqual(geometry_index.query_geometries(query_polygon), geometries[2:5])
+        self.assertEqual(geometry_index.query(shapely.geometry.box(20, 20, 21, 21)), [])
+        self.assertEqual(GeometryIndex([]).query(query_polygon), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
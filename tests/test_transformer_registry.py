@@ -0,0 +1,60 @@
+"""
+Tests for the registry of cached pyproj objects
+"""
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import pyproj
+
+from sentinelhub import TransformerRegistry, CRS, TestSentinelHub
+
+
+class TestTransformerRegistry(TestSentinelHub):
+
+    def test_caching(self):
+        registry = TransformerRegistry(cache_size=2)
+        wgs84_definition, utm_definition = CRS.WGS84.pyproj_crs().srs, CRS.UTM_33N.ogc_string()
+
+        transformer = registry.get_transformer(wgs84_definition, utm_definition)
+        self.assertTrue(isinstance(transformer, pyproj.Transformer))
+        self.assertIs(registry.get_transformer(wgs84_definition, utm_definition), transformer)
+        self.assertTrue(isinstance(registry.get_pyproj_crs(utm_definition), pyproj.CRS))
+
+        cache_info = registry.cache_info()
+        self.assertEqual((cache_info.hits, cache_info.misses, cache_info.maxsize), (1, 4, 2))
+        self.assertAlmostEqual(cache_info.hit_rate, 0.2)
+
+        registry.set_cache_size(1)
+        self.assertEqual(registry.cache_info().currsize, 3)
+
+        registry.clear()
+        self.assertEqual(registry.cache_info(), (0, 0, 1, 0))
+
+        with self.assertRaises(ValueError):
+            TransformerRegistry(cache_size=0)
+
+    def test_thread_caches(self):
+        registry = TransformerRegistry()
+        definitions = CRS.WGS84.ogc_string(), CRS.POP_WEB.ogc_string()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            transformers = list(executor.map(lambda _: registry.get_transformer(*definitions), range(2)))
+
+        main_transformer = registry.get_transformer(*definitions)
+        self.assertTrue(all(transformer is not main_transformer for transformer in transformers))
+
+    def test_prewarm(self):
+        registry = TransformerRegistry.get_instance()
+        registry.clear()
+        registry.prewarm([CRS.WGS84, CRS.POP_WEB])
+        registry.prewarm([crs for crs in CRS if crs.is_utm()], [CRS.WGS84, CRS.POP_WEB])
+
+        cache_info = registry.cache_info()
+        self.assertEqual(cache_info.currsize, (2 + 120) + (2 + 2 * 2 * 120))
+
+        CRS.UTM_12S.get_transform_function(CRS.WGS84)
+        self.assertEqual(registry.cache_info().hits, cache_info.hits + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
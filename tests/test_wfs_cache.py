@@ -0,0 +1,90 @@
+"""
+Tests for the persistent cache of WFS tile metadata
+"""
+import datetime
+import json
+import os
+import unittest
+
+import shapely.geometry
+
+from sentinelhub import WfsCache, BBox, CRS, TestSentinelHub
+from sentinelhub.time_utils import parse_time_interval
+
+
+class TestWfsCache(TestSentinelHub):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+
+        cls.query_key = WfsCache.get_query_key('https://services.sentinel-hub.com', 'S2.TILE', 1.0, CRS.UTM_33N)
+        cls.bbox = BBox((0, 0, 10, 10), CRS.UTM_33N)
+        cls.query_time = datetime.datetime(2020, 1, 31, 12)
+
+        cls.features = []
+        for day in range(31, 0, -1):
+            for index, (min_x, min_y) in enumerate([(-2, -2), (6, 6)]):
+                cls.features.append({
+                    'type': 'Feature',
+                    'geometry': json.loads(json.dumps(shapely.geometry.mapping(
+                        shapely.geometry.box(min_x, min_y, min_x + 4, min_y + 4)))),
+                    'properties': {'id': '{}-{}'.format(index, day), 'date': '2020-01-{:02}'.format(day),
+                                   'time': '10:00:00'}
+                })
+
+    def setUp(self):
+        self.cache = WfsCache(os.path.join(self.OUTPUT_FOLDER, 'wfs_cache'))
+        self.cache.clear()
+
+    def test_features(self):
+        time_interval = '2020-01-01T00:00:00', '2020-01-31T23:59:59'
+        self.assertEqual(self.cache.get_missing_intervals(self.query_key, self.bbox, time_interval), [time_interval])
+
+        self.cache.add_features(self.query_key, self.bbox, time_interval, self.features, query_time=self.query_time)
+        self.cache.add_features(self.query_key, self.bbox, time_interval, self.features, query_time=self.query_time)
+
+        features = self.cache.get_features(self.query_key, self.bbox, time_interval)
+        self.assertEqual([feature['properties'] for feature in features],
+                         [feature['properties'] for feature in self.features])
+
+        features = self.cache.get_features(self.query_key, BBox((7, 7, 8, 8), CRS.UTM_33N),
+                                           ('2020-01-10', '2020-01-12T12:00:00'))
+        self.assertEqual([feature['properties']['id'] for feature in features], ['1-12', '1-11', '1-10'])
+
+        other_key = WfsCache.get_query_key('https://services.sentinel-hub.com', 'S2.TILE', 0.5, CRS.UTM_33N)
+        self.assertEqual(self.cache.get_features(other_key, self.bbox, time_interval), [])
+
+    def test_missing_intervals(self):
+        self.cache.add_features(self.query_key, self.bbox, ('2020-01-05T00:00:00', '2020-01-10T00:00:00'), [],
+                                query_time=self.query_time)
+        self.cache.add_features(self.query_key, self.bbox, ('2020-01-20T00:00:00', '2020-01-31T23:59:59'), [],
+                                query_time=self.query_time)
+
+        test_cases = [
+            (self.bbox, ('2020-01-01', '2020-01-31'),
+             [('2020-01-30T12:00:00', '2020-01-31T23:59:59'), ('2020-01-10T00:00:00', '2020-01-20T00:00:00'),
+              ('2020-01-01T00:00:00', '2020-01-05T00:00:00')]),
+            (BBox((2, 2, 8, 8), CRS.UTM_33N), ('2020-01-06', '2020-01-08'), []),
+            (BBox((2, 2, 12, 8), CRS.UTM_33N), ('2020-01-06', '2020-01-08'),
+             [('2020-01-06T00:00:00', '2020-01-08T23:59:59')]),
+        ]
+        for bbox, time_interval, expected_intervals in test_cases:
+            with self.subTest(msg='Test case {} {}'.format(bbox, time_interval)):
+                missing_intervals = self.cache.get_missing_intervals(self.query_key, bbox,
+                                                                     parse_time_interval(time_interval))
+                self.assertEqual(missing_intervals, expected_intervals)
+
+    def test_latest(self):
+        self.assertIsNone(self.cache.get_latest(self.query_key, self.bbox))
+
+        self.cache.set_latest(self.query_key, self.bbox, self.features[:1])
+        self.assertEqual(self.cache.get_latest(self.query_key, self.bbox), self.features[:1])
+        self.assertIsNone(self.cache.get_latest(self.query_key, BBox((0, 0, 1, 1), CRS.UTM_33N)))
+
+        self.cache.latest_ttl_seconds = -1
+        self.assertIsNone(self.cache.get_latest(self.query_key, self.bbox))
+
+
+if __name__ == '__main__':
+    unittest.main()